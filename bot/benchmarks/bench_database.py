@@ -0,0 +1,125 @@
+import pytest
+
+# Горячие методы FDataBase на синтетической базе (см. conftest.py). Страницы берутся из середины
+# выдачи: OFFSET в SQLite линейный, первая страница не показательна.
+
+PAGE = 50
+
+@pytest.mark.benchmark(group='pagination')
+def bench_events_paginated(benchmark, db, telegram_id):
+    assert benchmark(db.get_events_paginated, telegram_id, PAGE, 1, None)
+
+@pytest.mark.benchmark(group='pagination')
+def bench_partner_events_paginated(benchmark, db, telegram_id):
+    benchmark(db.get_partner_events_paginated, telegram_id, PAGE, 1)
+
+@pytest.mark.benchmark(group='pagination')
+def bench_high_priority_events_paginated(benchmark, db, telegram_id):
+    benchmark(db.get_high_priority_events_paginated, telegram_id, PAGE, 1)
+
+@pytest.mark.benchmark(group='pagination')
+def bench_user_events_paginated(benchmark, db, telegram_id):
+    benchmark(db.get_user_events_paginated, telegram_id, 0, 1)
+
+@pytest.mark.benchmark(group='pagination')
+def bench_pending_events_paginated(benchmark, db):
+    benchmark(db.get_pending_events_paginated, PAGE, 1)
+
+@pytest.mark.benchmark(group='pagination')
+def bench_all_events_paginated(benchmark, db):
+    benchmark(db.get_all_events_paginated, PAGE, 1)
+
+@pytest.mark.benchmark(group='pagination')
+def bench_pending_users_paginated(benchmark, db):
+    benchmark(db.get_pending_users_paginated, PAGE, 1)
+
+@pytest.mark.benchmark(group='counts')
+def bench_total_approved_events(benchmark, db):
+    assert benchmark(db.get_total_approved_events, 'main')
+
+@pytest.mark.benchmark(group='counts')
+def bench_total_priority_events(benchmark, db, telegram_id):
+    benchmark(db.get_total_priority_events, telegram_id)
+
+@pytest.mark.benchmark(group='counts')
+def bench_total_partner_events(benchmark, db, telegram_id):
+    benchmark(db.get_total_partner_events, telegram_id)
+
+@pytest.mark.benchmark(group='counts')
+def bench_total_user_events(benchmark, db, telegram_id):
+    benchmark(db.get_total_user_events, telegram_id)
+
+@pytest.mark.benchmark(group='counts')
+def bench_total_events_count(benchmark, db):
+    benchmark(db.get_total_events_count)
+
+@pytest.mark.benchmark(group='counts')
+def bench_total_pending_events_count(benchmark, db):
+    benchmark(db.get_total_pending_events_count)
+
+@pytest.mark.benchmark(group='search')
+def bench_search_events_by_keywords(benchmark, db, telegram_id):
+    benchmark(db.search_events_by_keywords, telegram_id, ['Python', 'ML'], 20)
+
+@pytest.mark.benchmark(group='search')
+def bench_search_events_with_filters(benchmark, db, telegram_id):
+    benchmark(db.search_events_with_filters, telegram_id, ['Kubernetes'], 'week', 'high')
+
+@pytest.mark.benchmark(group='search')
+def bench_search_admin_events_with_filters(benchmark, db):
+    benchmark(db.search_admin_events_with_filters, ['Highload'], 'pending', 'parser', 20)
+
+@pytest.mark.benchmark(group='search')
+def bench_search_all_events_by_keywords(benchmark, db):
+    benchmark(db.search_all_events_by_keywords, ['AI', 'LLM', 'Data'], 20)
+
+@pytest.mark.benchmark(group='search')
+def bench_check_event_exists_by_url(benchmark, db, volumes):
+    benchmark(db.check_event_exists_by_url, f"https://events.example.com/parser/{volumes['events'] // 2}")
+
+@pytest.mark.benchmark(group='registrations')
+def bench_pending_registrations(benchmark, db):
+    benchmark.pedantic(db.get_pending_registrations, rounds=5, iterations=1)
+
+@pytest.mark.benchmark(group='registrations')
+def bench_events_with_pending_registrations(benchmark, db):
+    benchmark(db.get_events_with_pending_registrations, PAGE, 1)
+
+@pytest.mark.benchmark(group='registrations')
+def bench_total_events_with_pending_regs(benchmark, db):
+    benchmark(db.get_total_events_with_pending_regs)
+
+@pytest.mark.benchmark(group='registrations')
+def bench_pending_registrations_for_event(benchmark, db):
+    # событие 1 — самое популярное (распределение Парето в генераторе)
+    benchmark(db.get_pending_registrations_for_event, 1)
+
+@pytest.mark.benchmark(group='registrations')
+def bench_event_registrations(benchmark, db):
+    benchmark(db.get_event_registrations, 1)
+
+@pytest.mark.benchmark(group='stats')
+def bench_stats(benchmark, db):
+    assert benchmark(db.get_stats)
+
+@pytest.mark.benchmark(group='stats')
+def bench_user_stats(benchmark, db):
+    benchmark(db.get_user_stats, 3)
+
+@pytest.mark.benchmark(group='lookups')
+def bench_get_user(benchmark, db, telegram_id):
+    assert benchmark(db.get_user, telegram_id)
+
+@pytest.mark.benchmark(group='lookups')
+def bench_get_event_by_id_uncached(benchmark, db, volumes, rng):
+    # случайные id шире кэша строк — в основном промахи, то есть стоимость самого SELECT
+    benchmark(lambda: db.get_event_by_id(rng.randint(1, volumes['events'])))
+
+@pytest.mark.benchmark(group='lookups')
+def bench_get_event_by_id_cached(benchmark, db):
+    db.get_event_by_id(1)
+    benchmark(db.get_event_by_id, 1)
+
+@pytest.mark.benchmark(group='lookups')
+def bench_upcoming_events(benchmark, db, telegram_id):
+    benchmark.pedantic(db.get_upcoming_events, args=(telegram_id, 7), rounds=5, iterations=1)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+
+from services.digest import build_digests, period_start
+
+# Дайджест строится один раз на режим: одна выборка событий и по тексту на уникальную когорту рангов.
+# Отдельно — постраничный обход получателей по индексу idx_users_digest.
+
+@pytest.mark.benchmark(group='digest')
+@pytest.mark.parametrize('mode', ['daily', 'weekly'])
+def bench_build_digests(benchmark, db, mode):
+    assert benchmark(build_digests, db, mode, datetime.now())
+
+@pytest.mark.benchmark(group='digest')
+def bench_digest_recipients_scan(benchmark, db):
+    start = period_start('weekly', datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+
+    def scan():
+        after_id, total = 0, 0
+        while True:
+            page = db.get_digest_recipients('weekly', start, after_id, 1000)
+            if not page: return total
+            total += len(page)
+            after_id = page[-1]['id']
+
+    assert benchmark(scan)
@@ -0,0 +1,23 @@
+import pytest
+
+from services.recommendation_service import RecommendationEngine
+
+# Ранжирование всех будущих опубликованных событий под пользователя: скалярное произведение
+# по матрице тем. Матрица собрана заранее — замеряется вектор интересов, dot product и top-k.
+
+@pytest.fixture(scope='module')
+def engine(db, telegram_id):
+    engine = RecommendationEngine()
+    engine.recommend(db, telegram_id)
+    return engine
+
+@pytest.mark.benchmark(group='recommendations')
+def bench_recommend_uncached(benchmark, engine, db, telegram_id):
+    def run():
+        engine.clear()
+        return engine.recommend(db, telegram_id)
+    assert benchmark(run)
+
+@pytest.mark.benchmark(group='recommendations')
+def bench_recommend_cached(benchmark, engine, db, telegram_id):
+    assert benchmark(engine.recommend, db, telegram_id)
@@ -0,0 +1,15 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+# Очередь напоминаний читается по частичному индексу idx_user_events_remind:
+# планировщик спрашивает только ближайший срок и забирает пачку наступивших
+
+@pytest.mark.benchmark(group='reminders')
+def bench_next_reminder_at(benchmark, db):
+    benchmark(db.get_next_reminder_at)
+
+@pytest.mark.benchmark(group='reminders')
+def bench_due_reminders(benchmark, db):
+    now = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S')
+    benchmark(db.get_due_reminders, now, 200)
@@ -0,0 +1,28 @@
+import pytest
+
+from services.search_index import SemanticIndex
+
+# Поиск свободным текстом по векторному индексу (в памяти): косинус по всей матрице, фильтры и top-k.
+# Построение индекса делается один раз в фикстуре и в замер не входит.
+
+@pytest.fixture(scope='module')
+def index(db):
+    index = SemanticIndex(path=None)
+    index.refresh(db)
+    return index
+
+@pytest.mark.benchmark(group='semantic_search')
+def bench_semantic_search(benchmark, index, db):
+    assert benchmark(index.search, db, 'митап по kubernetes и devops', None, 3)
+
+@pytest.mark.benchmark(group='semantic_search')
+def bench_semantic_search_typo(benchmark, index, db):
+    benchmark(index.search, db, 'машинное обучени нейросети', None, 3)
+
+@pytest.mark.benchmark(group='semantic_search')
+def bench_semantic_index_append(benchmark, index, db):
+    # дозапись новых событий по водяной метке: ровно то, что происходит после вставки
+    rows = db.get_events_for_index_after(0, 100)
+    def append():
+        index._index([dict(r, id=r['id'] + 10_000_000) for r in rows])
+    benchmark.pedantic(append, rounds=5, iterations=1)
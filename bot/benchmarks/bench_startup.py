@@ -0,0 +1,16 @@
+import pytest
+
+from startup_report import first_update, importtime
+
+# Холодный старт в отдельном интерпретаторе: время импорта main и время до первого обработанного апдейта
+
+@pytest.mark.benchmark(group='startup')
+def bench_import_main(benchmark):
+    benchmark.pedantic(importtime, rounds=3, iterations=1)
+
+@pytest.mark.benchmark(group='startup')
+def bench_first_update(benchmark):
+    result = benchmark.pedantic(first_update, rounds=3, iterations=1)
+    # dateparser, gigachat, bs4, requests и numpy грузятся лениво — на первый апдейт они не нужны
+    assert result['heavy_loaded'] == []
+    assert result['bot_api_calls'] > 0
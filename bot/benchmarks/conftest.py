@@ -0,0 +1,49 @@
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from database import FDataBase, connect_db
+from generate_data import generate
+
+# Объёмы по умолчанию — как в боевом прогнозе; BENCH_SCALE=0.05 для быстрой проверки.
+# Сгенерированная база кэшируется в benchmarks/.data и переиспользуется между запусками.
+SCALE = float(os.environ.get('BENCH_SCALE', '1'))
+VOLUMES = {'events': int(200_000 * SCALE), 'users': int(50_000 * SCALE), 'user_events': int(1_000_000 * SCALE)}
+
+@pytest.fixture(scope='session')
+def bench_db_path() -> str:
+    path = os.environ.get('BENCH_DB')
+    if path: return path
+    path = BENCH_DIR / '.data' / f"bench_{VOLUMES['events']}_{VOLUMES['users']}_{VOLUMES['user_events']}.db"
+    if not path.exists():
+        path.parent.mkdir(exist_ok=True)
+        generate(str(path), **VOLUMES)
+    return str(path)
+
+@pytest.fixture(scope='session')
+def db(bench_db_path) -> FDataBase:
+    conn = connect_db(bench_db_path)
+    db = FDataBase(conn)
+    db.query_stats.slow_ms = float('inf')
+    yield db
+    conn.close()
+
+@pytest.fixture(scope='session')
+def volumes():
+    return VOLUMES
+
+@pytest.fixture
+def rng():
+    return random.Random(7)
+
+@pytest.fixture(scope='session')
+def telegram_id():
+    # пользователь среднего ранга — видит большую часть событий
+    return 1_000_000 + 2
@@ -0,0 +1,133 @@
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import FDataBase, connect_db
+
+# Генератор синтетической базы в схеме sber_events.db: события всех статусов/источников/приоритетов,
+# пользователи с разными должностями (а значит и рангами) и записи на события.
+# Запуск: python benchmarks/generate_data.py --path bench.db [--events 200000 --users 50000 --user-events 1000000]
+
+EVENT_STATUSES = (('approved', 0.6), ('new', 0.2), ('pending', 0.1), ('rejected', 0.1))
+EVENT_SOURCES = (('parser', 0.7), ('partner', 0.1), ('file', 0.15), ('manual', 0.05))
+PRIORITIES = (('high', 0.2), ('medium', 0.5), ('low', 0.3))
+USER_STATUSES = (('approved', 0.85), ('pending', 0.15))
+REG_STATUSES = (('approved', 0.7), ('pending', 0.3))
+
+POSITIONS = (
+    'Стажёр', 'Junior разработчик', 'Middle разработчик', 'Менеджер проекта', 'Аналитик',
+    'Senior разработчик', 'Тимлид', 'Lead Data Scientist', 'Главный инженер',
+    'Руководитель направления', 'Head of ML', 'Начальник отдела', 'Директор по развитию', 'CEO',
+)
+DEPARTMENTS = ('Разработка', 'Data Science', 'Инфраструктура', 'Продукт', 'HR', 'Маркетинг', 'Безопасность')
+TOPICS = (
+    'Python', 'Go', 'Java', 'Kotlin', 'ML', 'AI', 'LLM', 'Data Science', 'DevOps', 'Kubernetes',
+    'Frontend', 'React', 'Mobile', 'QA', 'Security', 'Highload', 'Product', 'Менеджмент', 'Big Data', 'Cloud',
+)
+FORMATS = ('Митап', 'Конференция', 'Хакатон', 'Воркшоп', 'Вебинар', 'Meetup', 'Summit', 'Лекция')
+LOCATIONS = (
+    'Санкт-Петербург, Невский пр. 1', 'Санкт-Петербург, ИТМО', 'Санкт-Петербург, Экспофорум',
+    'Москва, Сколково', 'Онлайн', 'Санкт-Петербург, Технопарк', 'Казань, IT-парк',
+)
+FIRST_NAMES = ('Александр', 'Мария', 'Иван', 'Анна', 'Дмитрий', 'Елена', 'Сергей', 'Ольга', 'Никита', 'Дарья')
+LAST_NAMES = ('Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Васильев', 'Петрова', 'Соколов', 'Морозова')
+
+def weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+def iter_events(rng: random.Random, count: int, base: datetime):
+    for i in range(count):
+        topic, fmt = rng.choice(TOPICS), rng.choice(FORMATS)
+        when = base + timedelta(days=rng.randint(-180, 365), hours=rng.randint(9, 20))
+        score = max(0, min(100, int(rng.gauss(60, 20))))
+        source = weighted(rng, EVENT_SOURCES)
+        yield {
+            'title': f"{fmt} {topic} #{i}",
+            'description': f"{fmt} про {topic} и {rng.choice(TOPICS)}: доклады, кейсы, нетворкинг. " * rng.randint(1, 6),
+            'location': rng.choice(LOCATIONS),
+            'date_str': when.strftime('%d.%m.%Y %H:%M'),
+            'url': f"https://events.example.com/{source}/{i}",
+            'analysis': json.dumps({'summary': f"{fmt} {topic}", 'target_audience': rng.choice(DEPARTMENTS), 'key_themes': [topic]}, ensure_ascii=False),
+            'score': score,
+            'priority': weighted(rng, PRIORITIES),
+            'required_rank': rng.choices((1, 2, 3, 4, 5), (50, 25, 15, 7, 3))[0],
+            'event_datetime': when.strftime('%Y-%m-%d %H:%M:%S') if rng.random() > 0.02 else None,
+            'status': weighted(rng, EVENT_STATUSES),
+            'source': source,
+        }
+
+def iter_users(rng: random.Random, count: int):
+    for i in range(count):
+        name = f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+        yield (
+            1_000_000 + i, f"user{i}", name, f"user{i}@example.com", f"+7900{i:07d}",
+            rng.choice(DEPARTMENTS), rng.choice(POSITIONS), weighted(rng, USER_STATUSES),
+        )
+
+def iter_user_events(rng: random.Random, count: int, users: int, events: int):
+    # Популярность событий неравномерная: небольшая доля событий собирает большую часть записей
+    seen = set()
+    while len(seen) < count:
+        user_id = rng.randint(1, users)
+        event_id = min(events, int(rng.paretovariate(1.2))) if rng.random() < 0.3 else rng.randint(1, events)
+        if (user_id, event_id) in seen: continue
+        seen.add((user_id, event_id))
+        yield (user_id, event_id, weighted(rng, REG_STATUSES))
+
+def chunks(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+def generate(path: str, events: int, users: int, user_events: int, seed: int = 42, batch: int = 20000):
+    if Path(path).exists():
+        raise SystemExit(f"{path} already exists")
+    rng = random.Random(seed)
+    conn = connect_db(path)
+    db = FDataBase(conn)
+    # пачки по batch строк заведомо дольше порога медленных запросов — не засоряем лог
+    db.query_stats.slow_ms = float('inf')
+    started = time.perf_counter()
+
+    with db.batch(max_rows=batch * 10):
+        for rows in chunks(iter_events(rng, events, datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)), batch):
+            db.add_new_events_bulk(rows)
+    print(f"events:      {events:>9} ({time.perf_counter() - started:.1f}s)")
+
+    # Пользователи и записи генерируются пачками напрямую — в FDataBase они добавляются по одному
+    for rows in chunks(iter_users(rng, users), batch):
+        conn.executemany(
+            "INSERT INTO users (telegram_id, username, full_name, email, phone, department, position, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    conn.commit()
+    print(f"users:       {users:>9} ({time.perf_counter() - started:.1f}s)")
+
+    for rows in chunks(iter_user_events(rng, min(user_events, users * events), users, events), batch):
+        conn.executemany("INSERT INTO user_events (user_id, event_id, status) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    print(f"user_events: {user_events:>9} ({time.perf_counter() - started:.1f}s)")
+
+    conn.execute("ANALYZE")
+    conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a sber_events.db-schema database with synthetic data")
+    parser.add_argument("--path", default="bench.db")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--user-events", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.path, args.events, args.users, args.user_events, args.seed)
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+# Локальная замена GigaChat API (совместима и с OpenAI-форматом /chat/completions): детерминированные
+# JSON-ответы на промпты GigaChatService, настраиваемые задержка, доля ошибок 500 и лимит запросов (429).
+# Запуск: python benchmarks/gigachat_stub.py --port 8090 --latency 300 --error-rate 0.05 --rate-limit 10
+# Бот: GIGACHAT_CONFIG = {'base_url': 'http://127.0.0.1:8090/api/v1', 'auth_url': 'http://127.0.0.1:8090/api/v2/oauth'}
+
+EVENT_TEXT_RE = re.compile(r"ТЕКСТ СОБЫТИЯ:\n(.*?)\n\nКРИТЕРИИ", re.S)
+FILE_TEXT_RE = re.compile(r"Текст: (.*)\nJSON Format:", re.S)
+BASE_DATE = datetime(2026, 1, 1, 10, 0)
+LOCATIONS = ('Санкт-Петербург', 'Москва', 'Онлайн', 'Казань')
+THEMES = ('AI', 'ML', 'Python', 'DevOps', 'Data Science', 'Backend', 'Mobile', 'Security')
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:12], 16)
+
+def _event_date(h: int) -> str:
+    return (BASE_DATE + timedelta(days=h % 180, hours=h % 9)).strftime('%d.%m.%Y %H:%M')
+
+def analyze_event_reply(text: str) -> dict:
+    h = _digest(text)
+    score = h % 101
+    return {
+        'title': text.split('.')[0][:80] or 'Мероприятие',
+        'description': text[:200],
+        'date': _event_date(h),
+        'location': 'Онлайн' if 'онлайн' in text.lower() else LOCATIONS[h % len(LOCATIONS)],
+        'url': '',
+        'score': score,
+        'priority': 'high' if score >= 80 else 'medium' if score >= 50 else 'low',
+        'target_audience': 'IT-специалисты',
+        'key_themes': [THEMES[h % len(THEMES)], THEMES[(h >> 8) % len(THEMES)]],
+    }
+
+def analyze_file_reply(text: str) -> list:
+    events = []
+    for line in text.splitlines():
+        line = line.strip()
+        if len(line) < 15: continue
+        h = _digest(line)
+        events.append({'title': line[:80], 'date': _event_date(h), 'location': LOCATIONS[h % len(LOCATIONS)], 'description': line[:200]})
+    return events[:20]
+
+def reply_for(prompt: str) -> str:
+    match = EVENT_TEXT_RE.search(prompt)
+    if match:
+        return json.dumps(analyze_event_reply(match.group(1).strip()), ensure_ascii=False)
+    match = FILE_TEXT_RE.search(prompt)
+    if match:
+        return json.dumps(analyze_file_reply(match.group(1)), ensure_ascii=False)
+    return json.dumps({'answer': prompt[:100]}, ensure_ascii=False)
+
+class GigaChatStub:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, seed: int = 42):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.stats = {'auth': 0, 'chat': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        # окно в одну секунду: запросы сверх rate_limit получают 429
+        self._window = (0, 0)
+        self.app = web.Application()
+        self.app.router.add_post('/api/v2/oauth', self.auth)
+        self.app.router.add_post('/api/v1/chat/completions', self.chat)
+        self.app.router.add_post('/v1/chat/completions', self.chat)
+        self.app.router.add_get('/stats', self.get_stats)
+        self._runner = None
+
+    async def auth(self, request: web.Request) -> web.Response:
+        self.stats['auth'] += 1
+        expires_at = int((time.time() + 1800) * 1000)
+        return web.json_response({'access_token': f"stub-token-{self.stats['auth']}", 'expires_at': expires_at})
+
+    def _limited(self) -> bool:
+        if not self.rate_limit: return False
+        second = int(time.monotonic())
+        start, count = self._window
+        if start != second: start, count = second, 0
+        self._window = (start, count + 1)
+        return count + 1 > self.rate_limit
+
+    async def chat(self, request: web.Request) -> web.Response:
+        self.stats['chat'] += 1
+        body = await request.json()
+        if self._limited():
+            self.stats['rate_limited'] += 1
+            return web.json_response({'status': 429, 'message': 'Too Many Requests'}, status=429, headers={'Retry-After': '1'})
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'status': 500, 'message': 'Internal Server Error'}, status=500)
+
+        prompt = "\n".join(m.get('content') or '' for m in body.get('messages', []))
+        content = reply_for(prompt)
+        usage = {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        self.stats['ok'] += 1
+        self.stats['prompt_tokens'] += usage['prompt_tokens']
+        self.stats['completion_tokens'] += usage['completion_tokens']
+        return web.json_response({
+            'choices': [{'message': {'role': 'assistant', 'content': content}, 'index': 0, 'finish_reason': 'stop'}],
+            'created': int(time.time()), 'model': body.get('model') or 'GigaChat', 'object': 'chat.completion', 'usage': usage,
+        })
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+async def serve(host: str, port: int, **options):
+    stub = GigaChatStub(**options)
+    base = await stub.start(host, port)
+    print(f"GigaChat stub: base_url={base}/api/v1 auth_url={base}/api/v2/oauth stats={base}/stats")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic local stand-in for the GigaChat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± random latency, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second before 429, 0 — no limit")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, latency_ms=args.latency, jitter_ms=args.jitter,
+                          error_rate=args.error_rate, rate_limit=args.rate_limit, seed=args.seed))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from database import FDataBase, connect_db
+from gigachat_stub import GigaChatStub
+from services.background_jobs import register_jobs
+from services.gigachat_service import GigaChatService
+from services.job_queue import JobQueue
+from services.parser_service import ParserService
+from services.relevance_service import RelevanceClassifier
+
+# Сквозной прогон сканирования источников (то же, что запускает scan_sources_process): задача 'scan'
+# в настоящей JobQueue → ParserService по сохранённым HTML-страницам → GigaChatService через локальную
+# заглушку API → запись событий в свежую базу. Каждая страница из fixtures/ подключается --copies раз
+# под разными адресами, чтобы ссылки не совпадали.
+# Запуск: python benchmarks/ingest_benchmark.py --copies 20 --latency 200 --error-rate 0.05
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+
+async def start_fixture_server(host: str = '127.0.0.1'):
+    async def page(request: web.Request) -> web.Response:
+        path = FIXTURES_DIR / f"{request.match_info['name']}.html"
+        if not path.exists(): raise web.HTTPNotFound()
+        return web.Response(text=path.read_text(encoding='utf-8'), content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/s/{copy}/{name}', page)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    return runner, f"http://{host}:{site._server.sockets[0].getsockname()[1]}"
+
+def register_sources(db: FDataBase, base: str, copies: int) -> int:
+    for source in db.get_active_sources():
+        db.delete_source(source['id'])
+    count = 0
+    for copy in range(copies):
+        for fixture in sorted(FIXTURES_DIR.glob('*.html')):
+            db.add_source(f"{fixture.stem}#{copy}", f"{base}/s/{copy}/{fixture.stem}", f"{base}/s/{copy}/")
+            count += 1
+    return count
+
+async def wait_job(queue: JobQueue, job_id: int, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get_status(job_id)
+        if job and job['status'] in ('done', 'failed'): return job
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"job #{job_id} did not finish in {timeout}s")
+
+async def run(copies: int, latency: float, jitter: float, error_rate: float, rate_limit: float, timeout: float):
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    stub = GigaChatStub(latency_ms=latency, jitter_ms=jitter, error_rate=error_rate, rate_limit=rate_limit)
+    stub_base = await stub.start()
+    fixtures, fixtures_base = await start_fixture_server()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect_db(os.path.join(tmp, 'ingest.db'))
+        db = FDataBase(conn)
+        sources = register_sources(db, fixtures_base, copies)
+
+        parser = ParserService()
+        parser.REQUEST_DELAY = 0
+        gigachat = GigaChatService(api_key='stub', base_url=f"{stub_base}/api/v1", auth_url=f"{stub_base}/api/v2/oauth")
+        queue = JobQueue(db, workers=1, poll_interval=0.05)
+        register_jobs(queue)
+        await queue.start(db=db, parser=parser, gigachat=gigachat, relevance=RelevanceClassifier())
+
+        started = time.perf_counter()
+        try:
+            job_id = queue.enqueue('scan', {'criteria': [], 'criteria_text': 'Все темы'})
+            job = await wait_job(queue, job_id, timeout)
+            elapsed = time.perf_counter() - started
+        finally:
+            await queue.stop()
+            await stub.stop()
+            await fixtures.cleanup()
+            conn.close()
+
+    result = json.loads(job['result']) if isinstance(job.get('result'), str) else job.get('result') or {}
+    added = result.get('added', 0)
+    stats = stub.stats
+    print(f"\njob #{job_id}: {job['status']}  {job.get('error') or ''}")
+    print(f"sources: {sources}  found: {result.get('found', 0)}  added: {added}  elapsed: {elapsed:.2f}s")
+    print(f"throughput: {added / elapsed if elapsed else 0:.1f} events/s")
+    print(f"LLM calls: {stats['chat']} ({stats['chat'] / added if added else 0:.2f} per event), "
+          f"auth: {stats['auth']}, 500: {stats['errors']}, 429: {stats['rate_limited']}, "
+          f"tokens: {stats['prompt_tokens']}+{stats['completion_tokens']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end source scan benchmark against saved HTML and a GigaChat stub")
+    parser.add_argument("--copies", type=int, default=10, help="how many times each fixture page is registered as a source")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub response latency, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± random stub latency, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub responses with 500")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="stub requests per second before 429")
+    parser.add_argument("--timeout", type=float, default=600.0, help="give up waiting for the job after N seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.copies, args.latency, args.jitter, args.error_rate, args.rate_limit, args.timeout))
@@ -0,0 +1,48 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import keyboards as kb
+
+# Микробенчмарк клавиатур: время и выделенная память на один "апдейт" (типичный набор вызовов
+# клавиатур в хендлерах) без кэша (__wrapped__) и с кэшем lru_cache.
+# Запуск: python benchmarks/keyboard_alloc.py
+
+def update_calls(get):
+    get('get_main_keyboard')(False)
+    get('get_admin_main_kb')('TechSupport')
+    get('get_search_filters_keyboard')()
+    get('get_parsing_filters_keyboard')()
+    get('get_cancel_keyboard')()
+    get('get_event_detail_keyboard')(1, 'https://example.com', 'approved', False)
+    get('_events_pagination_keyboard')(1, 3, 10, 'main')
+
+def uncached(name):
+    return getattr(kb, name).__wrapped__
+
+def cached(name):
+    return getattr(kb, name)
+
+def measure(get, label: str, rounds: int = 500):
+    update_calls(get)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        update_calls(get)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(50):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        update_calls(get)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed / rounds * 1e6:8.1f} µs/update   peak allocation {peak:8d} B/update")
+
+if __name__ == "__main__":
+    measure(uncached, "uncached")
+    measure(cached, "cached")
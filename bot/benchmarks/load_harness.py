@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from database import FDataBase, connect_db
+from generate_data import generate
+from webhook_harness import percentile
+
+# Сквозной нагрузочный стенд: настоящий Dispatcher (admin_router, user_router, DataMiddleware)
+# на синтетической базе, исходящие вызовы Bot API уходят в локальный фейковый сервер Telegram.
+# Каждый виртуальный пользователь проходит сценарий: регистрация → подтверждение админом →
+# листание мероприятий → поиск → заявка на мероприятие → подтверждение заявки админом.
+# Запуск: python benchmarks/load_harness.py --users 200 --concurrency 50
+
+TOKEN = "123456:harness"
+ADMIN_ID = 9_000_000
+USER_ID_BASE = 5_000_000
+
+class FakeTelegramAPI:
+    # Отвечает на любой метод Bot API: send*/edit* возвращают Message, остальные — True
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.calls = {}
+        self._message_ids = itertools.count(1)
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/{method}', self.handle)
+        self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = {k: v for k, v in (await request.post()).items() if isinstance(v, str)}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.startswith(('send', 'edit')) and method != 'sendChatAction':
+            chat_id = int(params.get('chat_id') or 0)
+            result = {
+                'message_id': int(params.get('message_id') or next(self._message_ids)), 'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'}, 'text': params.get('text') or params.get('caption') or '',
+            }
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+class HandlerTimings:
+    # Внутренний middleware: сырые замеры по каждому хендлеру для перцентилей
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    async def __call__(self, handler, event, data):
+        name = getattr(getattr(data.get('handler'), 'callback', None), '__name__', '-')
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        finally:
+            self.samples.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+
+class Harness:
+    def __init__(self, bot: Bot, dp, db: FDataBase):
+        self.bot = bot
+        self.dp = dp
+        self.db = db
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1_000_000)
+        self.update_latencies = []
+        self.failed = 0
+
+    def _user(self, user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f"User{user_id}", 'username': f"user{user_id}"}
+
+    def _message(self, user_id: int, text: str = None, from_bot: bool = False) -> dict:
+        message = {
+            'message_id': next(self.message_ids), 'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': 1, 'is_bot': True, 'first_name': 'Bot'} if from_bot else self._user(user_id),
+        }
+        if text is not None: message['text'] = text
+        return message
+
+    async def _feed(self, payload: dict):
+        update = Update.model_validate({'update_id': next(self.update_ids), **payload}, context={'bot': self.bot})
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.failed += 1
+            logging.getLogger(__name__).debug(f"Update failed: {e}")
+        self.update_latencies.append((time.perf_counter() - started) * 1000)
+
+    async def text(self, user_id: int, text: str):
+        await self._feed({'message': self._message(user_id, text)})
+
+    async def tap(self, user_id: int, data: str):
+        await self._feed({'callback_query': {
+            'id': str(next(self.update_ids)), 'from': self._user(user_id), 'chat_instance': str(user_id),
+            'data': data, 'message': self._message(user_id, '...', from_bot=True),
+        }})
+
+    async def journey(self, index: int):
+        uid = USER_ID_BASE + index
+        # регистрация
+        for text in ("/start", f"Пользователь {index}", f"user{index}@example.com", f"+7999{index:07d}", "Middle разработчик"):
+            await self.text(uid, text)
+        await self.tap(uid, "confirm_registration")
+        user = self.db.get_user(uid)
+        if not user: return
+        await self.tap(ADMIN_ID, f"approve_user_{user['id']}")
+        await self.text(uid, "/start")
+
+        # листание
+        await self.text(uid, "📅 Мероприятия")
+        await self.text(uid, "📋 Основные мероприятия")
+        for page in (1, 2, 1):
+            await self.tap(uid, f"main_page_{page}")
+        await self.text(uid, "🔥 Приоритетные")
+        await self.tap(uid, "priority_page_1")
+
+        # поиск
+        await self.text(uid, "🔍 Поиск мероприятий")
+        await self.text(uid, "🤖 AI/ML")
+        await self.text(uid, "❌ Отменить поиск")
+
+        # заявка и подтверждение
+        events = self.db.get_events_paginated(uid, index % 20, 1, None)
+        if not events: return
+        eid = events[0]['id']
+        await self.tap(uid, f"event_details_{eid}")
+        await self.tap(uid, f"request_registration_{eid}")
+        await self.tap(ADMIN_ID, f"approve_single_{user['id']}_{eid}")
+        await self.text(uid, "📅 Мои мероприятия")
+        await self.text(uid, "👤 Профиль")
+
+def prepare_db(path: str, events: int):
+    generate(path, events=events, users=0, user_events=0)
+    db = FDataBase(connect_db(path))
+    db.add_admin(ADMIN_ID, "harness_admin", "TechSupport")
+    db.add_user(ADMIN_ID, "harness_admin", "Admin")
+    db.force_approve_user(ADMIN_ID)
+
+def report(harness: Harness, timings: HandlerTimings, api: FakeTelegramAPI, elapsed: float):
+    total = len(harness.update_latencies)
+    print(f"\nupdates: {total}  failed: {harness.failed}  elapsed: {elapsed:.2f}s  throughput: {total / elapsed:.0f} upd/s")
+    lat = harness.update_latencies
+    print(f"update latency ms: p50={percentile(lat, 0.5):.2f} p95={percentile(lat, 0.95):.2f} p99={percentile(lat, 0.99):.2f} max={max(lat or [0]):.2f}")
+    print(f"Bot API calls: {sum(api.calls.values())} {json.dumps(api.calls, ensure_ascii=False)}\n")
+    print(f"{'handler':<36}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err':>5}")
+    for name, samples in sorted(timings.samples.items(), key=lambda kv: -percentile(kv[1], 0.99)):
+        print(f"{name:<36}{len(samples):>7}{percentile(samples, 0.5):>9.2f}{percentile(samples, 0.95):>9.2f}"
+              f"{percentile(samples, 0.99):>9.2f}{max(samples):>9.2f}{timings.errors.get(name, 0):>5}")
+
+async def run(users: int, concurrency: int, events: int, api_latency: float, db_path: str = None):
+    # Импорт здесь: main настраивает логирование в bot.log — стенду нужен только WARNING в консоль
+    import main
+    logging.getLogger().handlers.clear()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    tmp = None
+    if not db_path:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp.name, 'harness.db')
+        prepare_db(db_path, events)
+
+    conn = connect_db(db_path)
+    db = FDataBase(conn)
+    api = FakeTelegramAPI(api_latency)
+    base = await api.start()
+    bot = Bot(token=TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base)))
+    dp = main.create_dispatcher(db, **main.create_services(db))
+    timings = HandlerTimings()
+    dp.message.middleware(timings)
+    dp.callback_query.middleware(timings)
+
+    harness = Harness(bot, dp, db)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int):
+        async with semaphore:
+            await harness.journey(index)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(limited(i) for i in range(users)))
+        elapsed = time.perf_counter() - started
+        report(harness, timings, api, elapsed)
+    finally:
+        await bot.session.close()
+        await api.stop()
+        conn.close()
+        if tmp: tmp.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end dispatcher load test against a fake Bot API")
+    parser.add_argument("--users", type=int, default=200, help="virtual users, each runs one full journey")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--events", type=int, default=5000, help="synthetic events in a fresh database")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="fake Bot API latency, ms")
+    parser.add_argument("--db", default=None, help="use an existing database instead of a fresh one")
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.concurrency, args.events, args.api_latency, args.db))
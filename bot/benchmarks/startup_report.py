@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BOT_DIR = BENCH_DIR.parent
+
+# Холодный старт бота: разбивка `python -X importtime -c "import main"` по модулям и пакетам
+# и время от запуска процесса до первого обработанного апдейта (/start нового пользователя).
+# Тяжёлые зависимости из HEAVY_MODULES к этому моменту загружены быть не должны.
+# Запуск: python benchmarks/startup_report.py [--top 25] [--runs 3]
+
+HEAVY_MODULES = ('dateparser', 'gigachat', 'bs4', 'requests', 'numpy')
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (str(BOT_DIR), env.get('PYTHONPATH'))))
+    return env
+
+def importtime(module: str = 'main') -> list:
+    # Процесс запускается во временном каталоге: main при импорте открывает bot.log
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+            cwd=tmp, env=_env(), capture_output=True, text=True, check=True
+        )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line: continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append({'name': name.strip(), 'depth': (len(name) - len(name.lstrip())) // 2,
+                     'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return rows
+
+def by_package(rows: list) -> dict:
+    totals = {}
+    for row in rows:
+        package = row['name'].split('.')[0]
+        totals[package] = totals.get(package, 0.0) + row['self_ms']
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+def first_update() -> dict:
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--child'],
+            cwd=tmp, env=_env(), capture_output=True, text=True, check=True
+        )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['wall_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+async def _child() -> dict:
+    t0 = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    import asyncio
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Update
+    from database import FDataBase, connect_db
+    sys.path.insert(0, str(BENCH_DIR))
+    from load_harness import FakeTelegramAPI, TOKEN
+
+    api = FakeTelegramAPI()
+    base = await api.start()
+    conn = connect_db('startup.db')
+    db = FDataBase(conn)
+    bot = Bot(token=TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base)))
+    dp = main.create_dispatcher(db, **main.create_services(db))
+    ready = time.perf_counter()
+
+    user = {'id': 777, 'is_bot': False, 'first_name': 'Startup'}
+    update = Update.model_validate({'update_id': 1, 'message': {
+        'message_id': 1, 'date': int(time.time()), 'chat': {'id': 777, 'type': 'private'}, 'from': user, 'text': '/start',
+    }}, context={'bot': bot})
+    await dp.feed_update(bot, update)
+    handled = time.perf_counter()
+
+    await bot.session.close()
+    await api.stop()
+    conn.close()
+    await asyncio.sleep(0)
+    return {
+        'import_ms': (imported - t0) * 1000, 'init_ms': (ready - imported) * 1000,
+        'first_update_ms': (handled - ready) * 1000, 'total_ms': (handled - t0) * 1000,
+        'bot_api_calls': sum(api.calls.values()),
+        'heavy_loaded': sorted(m for m in HEAVY_MODULES if m in sys.modules),
+    }
+
+def report(top: int, runs: int):
+    rows = importtime()
+    total = sum(r['cumulative_ms'] for r in rows if r['depth'] == 0)
+    print(f"\nimport time, all top-level imports: {total:.0f} ms, modules: {len(rows)}\n")
+    print(f"{'package':<32}{'self ms':>10}")
+    for package, ms in list(by_package(rows).items())[:top]:
+        print(f"{package:<32}{ms:>10.1f}")
+    print(f"\n{'module':<48}{'cumulative ms':>15}")
+    for row in sorted(rows, key=lambda r: -r['cumulative_ms'])[:top]:
+        print(f"{row['name']:<48}{row['cumulative_ms']:>15.1f}")
+
+    samples = [first_update() for _ in range(runs)]
+    print(f"\ntime to first update, {runs} run(s):")
+    for key in ('wall_ms', 'import_ms', 'init_ms', 'first_update_ms', 'total_ms'):
+        values = sorted(s[key] for s in samples)
+        print(f"  {key:<18} median {values[len(values) // 2]:>8.1f}  min {values[0]:>8.1f}")
+    heavy = samples[-1]['heavy_loaded']
+    print(f"  heavy modules loaded by then: {', '.join(heavy) if heavy else 'none'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start report: import time breakdown and time to first update")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        import asyncio
+        print(json.dumps(asyncio.run(_child())))
+    else:
+        report(args.top, args.runs)
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.webhook_server import SECRET_HEADER
+
+# Нагрузочный стенд для webhook-режима: шлёт синтетические апдейты (сообщения и нажатия кнопок)
+# от множества пользователей и печатает пропускную способность и задержки приёма.
+# Запуск: python benchmarks/webhook_harness.py --url http://127.0.0.1:8080/webhook --count 5000
+
+MESSAGE_TEXTS = ["/start", "📅 Все мероприятия", "🔥 Приоритетные", "🔍 Поиск", "👤 Профиль"]
+CALLBACK_DATA = ["events_page_1", "events_page_0", "evt_detail_1"]
+
+def make_update(update_id: int, user_id: int) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+    chat = {"id": user_id, "type": "private", "first_name": user["first_name"]}
+    now = int(time.time())
+    if random.random() < 0.7:
+        return {
+            "update_id": update_id,
+            "message": {"message_id": update_id, "date": now, "chat": chat, "from": user, "text": random.choice(MESSAGE_TEXTS)}
+        }
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id), "from": user, "chat_instance": str(user_id), "data": random.choice(CALLBACK_DATA),
+            "message": {"message_id": update_id, "date": now, "chat": chat, "text": "..."}
+        }
+    }
+
+def percentile(values: list, p: float) -> float:
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+async def run(url: str, secret: str, count: int, concurrency: int, users: int):
+    headers = {SECRET_HEADER: secret} if secret else {}
+    statuses, latencies = {}, []
+    counter = iter(range(1, count + 1))
+
+    async def worker(session):
+        for update_id in counter:
+            payload = make_update(update_id, random.randint(1, users))
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=payload, headers=headers) as resp:
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            except aiohttp.ClientError:
+                statuses['error'] = statuses.get('error', 0) + 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    print(f"Sent {count} updates in {elapsed:.2f}s ({count / elapsed:.0f} upd/s), concurrency {concurrency}")
+    print(f"Statuses: {statuses}")
+    print(f"Latency ms: p50={percentile(latencies, 0.5):.1f} p90={percentile(latencies, 0.9):.1f} p99={percentile(latencies, 0.99):.1f}")
+
+    async with aiohttp.ClientSession() as session:
+        try:
+            async with session.get(url.rsplit('/', 1)[0] + '/healthz') as resp:
+                print(f"Server: {await resp.json()}")
+        except aiohttp.ClientError:
+            pass
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Synthetic webhook load")
+    ap.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    ap.add_argument("--secret", default="", help="WEBHOOK_CONFIG['secret_token'] of the running bot")
+    ap.add_argument("--count", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--users", type=int, default=500)
+    args = ap.parse_args()
+    asyncio.run(run(args.url, args.secret, args.count, args.concurrency, args.users))
@@ -4,6 +4,135 @@ BOT_CONFIG = {
     'admin_ids': [5159491775],
 }
 
+WEBHOOK_CONFIG = {
+    'enabled': False,       # False — long polling, True — встроенный aiohttp-сервер
+    'host': '0.0.0.0',
+    'port': 8080,
+    'path': '/webhook',
+    'url': '',              # публичный адрес (https://...), если пусто — webhook не регистрируется
+    'secret_token': '',     # проверяется в заголовке X-Telegram-Bot-Api-Secret-Token; пусто — генерируется при старте
+                            # (только если задан url), без url и секрета webhook-режим не запустится
+    'queue_size': 1000,     # при переполнении отвечаем 503, Telegram повторит доставку
+    'workers': 8,           # одновременно обрабатываемых апдейтов
+}
+
+METRICS_CONFIG = {
+    'enabled': True,
+    'host': '127.0.0.1',  # /metrics только локально; шард N слушает port + 1 + N
+    'port': 9100,
+}
+
+STARTUP_CONFIG = {
+    'warm_up': True,       # после старта polling в фоне импортировать dateparser, gigachat, bs4, numpy
+    'warm_up_delay': 2.0,  # сек. — сначала ответить на накопившиеся апдейты
+}
+
+SHARDING_CONFIG = {
+    'processes': 0,      # 0 — один процесс; N — супервизор и N процессов, апдейты делятся по chat_id
+    'queue_size': 1000,  # очередь апдейтов на процесс
+    'concurrency': 16,   # одновременно обрабатываемых чатов внутри процесса
+}
+
+LEADER_CONFIG = {
+    'ttl': 10,       # сек. — через столько аренду лидера может забрать другой экземпляр
+    'heartbeat': 3,  # сек. между продлениями аренды
+}
+
+RELEVANCE_CONFIG = {
+    'enabled': True,
+    'threshold': 0.3,   # кандидаты с оценкой ниже порога не отправляются в GigaChat
+    'min_samples': 30,  # минимум отмодерированных событий для обучения
+}
+
+JOBS_CONFIG = {
+    'workers': 2,          # параллельных обработчиков фоновых задач
+    'poll_interval': 1.0,  # сек. между проверками очереди
+    'retry_backoff': 5,    # базовая задержка повтора, растёт экспоненциально
+    'max_attempts': 3,
+    'heartbeat': 5,        # сек. — выполняемая задача продлевает свой updated_at
+    'stale_after': 30,     # сек. без heartbeat — задача считается брошенной и возвращается в очередь
+}
+
+DB_CONFIG = {
+    'batch_rows': 500,  # групповой коммит в db.batch(): не реже чем раз в N строк
+    'batch_ms': 200,    # ...или раз в T миллисекунд
+    'event_cache_size': 2048,  # строк events в read-through кэше get_event_by_id
+    'slow_query_ms': 100,      # запросы дольше порога логируются с параметрами и EXPLAIN QUERY PLAN
+}
+
+ARCHIVE_CONFIG = {
+    'interval': 3600,     # сек. между прогонами архивации
+    'grace_hours': 24,    # событие уходит в архив через столько часов после начала
+    'rejected_days': 30,  # отклонённые события уходят в архив через N дней после создания
+    'batch': 500,         # событий за одну транзакцию
+}
+
+RECOMMEND_CONFIG = {
+    'dim': 256,               # размер хешированного вектора тем
+    'refresh_interval': 30,   # сек. — не чаще пересобирать матрицу событий при изменениях
+    'cache_ttl': 300,         # сек. — сколько живёт готовая выдача пользователя
+    'cache_size': 5000,       # пользователей в кэше выдачи
+    'max_results': 200,       # событий в выдаче
+    'position_weight': 0.5,   # вклад должности и отдела относительно истории записей
+    'score_weight': 0.3,      # вклад общего score и приоритета события
+}
+
+BROADCAST_CONFIG = {
+    'rate': 25,         # сообщений в секунду на весь бот (лимит Telegram — около 30)
+    'concurrency': 10,  # одновременных запросов sendMessage
+    'max_retries': 3,   # повторов после 429 и сетевых ошибок
+}
+
+DIGEST_CONFIG = {
+    'enabled': True,
+    'hour': 10,          # час рассылки (локальное время)
+    'weekday': 0,        # день недели еженедельного дайджеста, 0 — понедельник
+    'interval': 300,     # сек. между проверками, не пора ли рассылать
+    'max_events': 7,     # событий в одном дайджесте
+    'batch': 1000,       # получателей за одну выборку
+    'windows': {'daily': 1, 'weekly': 7},  # режим -> горизонт событий в днях
+}
+
+REMINDER_CONFIG = {
+    'enabled': True,
+    'before_hours': 24,  # за сколько часов до начала напоминать подтверждённым участникам
+    'batch': 200,        # напоминаний за одну выборку
+    'max_sleep': 300,    # сек. — дольше планировщик не спит, даже если ближайшее напоминание позже
+}
+
+SEARCH_CONFIG = {
+    'path': None,             # None — индекс в памяти; путь — memmap-файлы <path>.<host>-<BOT_INSTANCE_ID>...npy,
+                              # свои у каждого экземпляра (без BOT_INSTANCE_ID всё равно в памяти)
+    'dim': 256,
+    'char_ngrams': 3,         # n-граммы символов для опечаток и словоформ, 0 — только слова
+    'reconcile_interval': 60, # сек. — не чаще сверять правки и удаления событий с базой
+    'min_score': 0.15,        # косинус ниже порога в выдачу не попадает
+    'limit': 20,
+}
+
+PREFETCH_CONFIG = {
+    'ttl': 30,           # сек. — сколько живут заранее отрисованные соседние страницы
+    'max_entries': 5000, # страниц в кэше на процесс
+}
+
+FSM_CONFIG = {
+    'ttl': 86400,        # сек. — брошенные сессии (регистрация, поиск) удаляются
+    'cache_size': 1000,  # записей в LRU-кэше перед SQLite
+}
+
+GIGACHAT_CONFIG = {
+    'base_url': None,  # None — адреса SDK по умолчанию; для стенда: http://127.0.0.1:8090/api/v1
+    'auth_url': None,  # ...и http://127.0.0.1:8090/api/v2/oauth
+    'model': 'GigaChat',
+    'timeout': 30,     # сек. на запрос
+}
+
+INGEST_CONFIG = {
+    'chunk_tokens': 1000,   # размер фрагмента файла для одного запроса к GigaChat
+    'overlap_tokens': 100,  # перекрытие соседних фрагментов
+    'concurrency': 4,       # одновременных запросов анализа
+}
+
 EVENT_CRITERIA = {
     'target_audience': [
         'IT-специалисты',
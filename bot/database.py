@@ -1,14 +1,182 @@
 import sqlite3
+import json
+import time
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import List, Dict, Union
 from datetime import datetime, timedelta
 
+try:
+    from config import DB_CONFIG
+except ImportError:
+    DB_CONFIG = {'batch_rows': 500, 'batch_ms': 200, 'event_cache_size': 2048, 'slow_query_ms': 100}
+
+try:
+    from config import REMINDER_CONFIG
+except ImportError:
+    REMINDER_CONFIG = {'enabled': True, 'before_hours': 24, 'batch': 200, 'max_sleep': 300}
+
+from utils.metrics import instrument_methods, DB_SECONDS
+from utils.query_profiler import ProfilingCursor, QueryStats
+
+def connect_db(path: str) -> sqlite3.Connection:
+    # WAL и busy_timeout: базу одновременно читают и пишут несколько процессов бота
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+def serialized(cls):
+    # Одно соединение и один курсор на процесс, а хендлеры вызывают методы и через asyncio.to_thread:
+    # одновременный доступ к курсору из нескольких потоков роняет sqlite3 (вплоть до segfault),
+    # поэтому публичные методы выполняются под общей блокировкой экземпляра
+    def locked(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._lock:
+                return method(self, *args, **kwargs)
+        return wrapper
+
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or name == 'batch' or not callable(attr):
+            continue
+        setattr(cls, name, locked(attr))
+    return cls
+
+@instrument_methods(DB_SECONDS, skip=('batch',))
+@serialized
 class FDataBase:
+    # Общие колонки events и events_archive — для переноса в архив и поиска по обеим таблицам
+    EVENT_COLUMNS = "id, title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source, version, created_at"
+
     def __init__(self, db: sqlite3.Connection):
+        self._lock = threading.RLock()
         self.__db = db
         self.__db.row_factory = sqlite3.Row
-        self.__cur = self.__db.cursor()
+        # Все запросы идут через профилирующий курсор: агрегаты по каждому запросу и лог медленных
+        self.query_stats = QueryStats()
+        self.__cur = ProfilingCursor(self.__db.cursor(), self.__db, self.query_stats)
+        # Глубина batch() живёт в контекстной переменной: её видит только открывший пачку поток или задача,
+        # записи остальных хендлеров коммитятся сразу
+        self._batch_var = contextvars.ContextVar(f"db_batch_{id(self)}", default=0)
+        self._batch_rows = 0
+        self._batch_started = 0.0
+        self._batch_limits = (DB_CONFIG.get('batch_rows', 500), DB_CONFIG.get('batch_ms', 200))
+        # read-through кэш строк events: id -> строка (с версией), сбрасывается всеми мутаторами событий
+        self._event_cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._event_cache_size = DB_CONFIG.get('event_cache_size', 2048)
+        self.event_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        # растёт при любом изменении событий или записей на них — по нему сбрасываются кэши страниц
+        self.events_generation = 0
+        self._data_version = None
+        self._events_version = None
         self._init_tables()
 
+    @property
+    def _batch_depth(self) -> int:
+        return self._batch_var.get()
+
+    def _commit(self, rows: int = 1):
+        # Внутри batch() коммит групповой: раз в max_rows записей или max_ms миллисекунд
+        if not self._batch_depth:
+            self.__db.commit()
+            return
+        if not self._batch_rows:
+            self._batch_started = time.monotonic()
+        self._batch_rows += rows
+        max_rows, max_ms = self._batch_limits
+        if self._batch_rows >= max_rows or (time.monotonic() - self._batch_started) * 1000 >= max_ms:
+            self.flush()
+
+    def flush(self):
+        try:
+            self.__db.commit()
+        except Exception as e:
+            print(f"Error committing batch: {e}")
+        self._batch_rows = 0
+
+    @contextmanager
+    def batch(self, max_rows: int = None, max_ms: int = None):
+        # Только для синхронных циклов записи, без await внутри: блокировка соединения держится
+        # до выхода из пачки, чтобы в открытую транзакцию не попали чужие записи.
+        # Исключение откатывает ещё не закоммиченные записи пачки: шаг задачи и его чекпоинт не расходятся
+        with self._lock:
+            depth = self._batch_var.get()
+            if not depth:
+                self._batch_limits = (
+                    max_rows or DB_CONFIG.get('batch_rows', 500),
+                    max_ms or DB_CONFIG.get('batch_ms', 200)
+                )
+                self._batch_rows = 0
+            token = self._batch_var.set(depth + 1)
+            try:
+                yield self
+            except:
+                if not depth:
+                    self.__db.rollback()
+                    self._batch_rows = 0
+                    self._event_cache.clear()
+                    self._touch_events()
+                raise
+            finally:
+                self._batch_var.reset(token)
+                if not depth:
+                    self.flush()
+
+    @contextmanager
+    def _savepoint(self, name: str):
+        # Несколько запросов одного метода откатываются вместе, не задевая остальное в открытой пачке
+        self.__cur.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except:
+            self.__cur.execute(f"ROLLBACK TO {name}")
+            self.__cur.execute(f"RELEASE {name}")
+            raise
+        self.__cur.execute(f"RELEASE {name}")
+
+    def _sync_external_changes(self):
+        # PRAGMA data_version меняется при любом коммите другого соединения (FSM, аренда лидера, очередь задач),
+        # поэтому это только дешёвый фильтр. Кэш сбрасывается, когда изменилась версия событий
+        # в change_versions — её поднимают триггеры на events и статусы user_events
+        try:
+            data_version = self.__db.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version: return
+            self._data_version = data_version
+            row = self.__db.execute("SELECT version FROM change_versions WHERE name = 'events'").fetchone()
+        except: return
+        version = row[0] if row else 0
+        if version != self._events_version:
+            if self._events_version is not None:
+                self.events_generation += 1
+                if self._event_cache:
+                    self._event_cache.clear()
+                    self.event_cache_stats['invalidations'] += 1
+            self._events_version = version
+
+    def _touch_events(self):
+        self.events_generation += 1
+
+    def _forget_event(self, event_id: int):
+        self._touch_events()
+        if self._event_cache.pop(event_id, None) is not None:
+            self.event_cache_stats['invalidations'] += 1
+
+    def get_events_generation(self) -> int:
+        # С учётом изменений, закоммиченных другими процессами
+        self._sync_external_changes()
+        return self.events_generation
+
+    def get_event_version(self, event_id: int) -> Union[int, None]:
+        self._sync_external_changes()
+        row = self._event_cache.get(event_id)
+        return row['version'] if row else None
+
     def _init_tables(self):
         try:
             sql_script = """
@@ -23,7 +191,9 @@ class FDataBase:
                 position TEXT,
                 status TEXT DEFAULT 'pending',
                 registered_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_activity DATETIME DEFAULT CURRENT_TIMESTAMP
+                last_activity DATETIME DEFAULT CURRENT_TIMESTAMP,
+                digest_mode TEXT DEFAULT 'weekly',
+                digest_sent_at DATETIME
             );
 
             CREATE TABLE IF NOT EXISTS events (
@@ -40,15 +210,39 @@ class FDataBase:
                 event_datetime DATETIME,
                 status TEXT DEFAULT 'new',
                 source TEXT DEFAULT 'parser', 
+                version INTEGER DEFAULT 0,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             );
 
+            CREATE TABLE IF NOT EXISTS events_archive (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT,
+                location TEXT,
+                date_str TEXT,
+                url TEXT,
+                analysis TEXT,
+                score INTEGER DEFAULT 0,
+                priority TEXT DEFAULT 'medium',
+                required_rank INTEGER DEFAULT 1,
+                event_datetime DATETIME,
+                status TEXT DEFAULT 'new',
+                source TEXT DEFAULT 'parser',
+                version INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_events_archive_url ON events_archive (url);
+
             CREATE TABLE IF NOT EXISTS user_events (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER NOT NULL,
                 event_id INTEGER NOT NULL,
                 status TEXT DEFAULT 'pending',
                 registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+                remind_at DATETIME,
+                reminded INTEGER DEFAULT 0,
                 FOREIGN KEY (user_id) REFERENCES users (id),
                 FOREIGN KEY (event_id) REFERENCES events (id),
                 UNIQUE(user_id, event_id)
@@ -72,6 +266,68 @@ class FDataBase:
                 base_url TEXT,
                 is_active BOOLEAN DEFAULT 1
             );
+
+            CREATE TABLE IF NOT EXISTS source_state (
+                source_id INTEGER PRIMARY KEY,
+                content_hash TEXT,
+                seen_links TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT,
+                priority INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'queued',
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                run_after REAL DEFAULT 0,
+                checkpoint TEXT,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_by INTEGER,
+                holder TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority, run_after);
+
+            CREATE TABLE IF NOT EXISTS fsm_storage (
+                key TEXT PRIMARY KEY,
+                state TEXT,
+                data TEXT,
+                expires_at REAL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_fsm_expires ON fsm_storage (expires_at);
+
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS change_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            INSERT OR IGNORE INTO change_versions (name, version) VALUES ('events', 0);
+
+            CREATE TRIGGER IF NOT EXISTS trg_events_insert AFTER INSERT ON events
+            BEGIN UPDATE change_versions SET version = version + 1 WHERE name = 'events'; END;
+            CREATE TRIGGER IF NOT EXISTS trg_events_update AFTER UPDATE ON events
+            BEGIN UPDATE change_versions SET version = version + 1 WHERE name = 'events'; END;
+            CREATE TRIGGER IF NOT EXISTS trg_events_delete AFTER DELETE ON events
+            BEGIN UPDATE change_versions SET version = version + 1 WHERE name = 'events'; END;
+            CREATE TRIGGER IF NOT EXISTS trg_user_events_insert AFTER INSERT ON user_events
+            BEGIN UPDATE change_versions SET version = version + 1 WHERE name = 'events'; END;
+            CREATE TRIGGER IF NOT EXISTS trg_user_events_status AFTER UPDATE OF status ON user_events
+            BEGIN UPDATE change_versions SET version = version + 1 WHERE name = 'events'; END;
+            CREATE TRIGGER IF NOT EXISTS trg_user_events_delete AFTER DELETE ON user_events
+            BEGIN UPDATE change_versions SET version = version + 1 WHERE name = 'events'; END;
             """
             self.__cur.executescript(sql_script)
             
@@ -79,6 +335,32 @@ class FDataBase:
                 self.__cur.execute("ALTER TABLE admins ADD COLUMN notification_day TEXT")
                 self.__cur.execute("ALTER TABLE admins ADD COLUMN notification_time TEXT")
             except: pass
+
+            try:
+                self.__cur.execute("ALTER TABLE events ADD COLUMN version INTEGER DEFAULT 0")
+            except: pass
+
+            try:
+                self.__cur.execute("ALTER TABLE jobs ADD COLUMN holder TEXT")
+            except: pass
+
+            try:
+                self.__cur.execute("ALTER TABLE users ADD COLUMN digest_mode TEXT DEFAULT 'weekly'")
+                self.__cur.execute("ALTER TABLE users ADD COLUMN digest_sent_at DATETIME")
+            except: pass
+            self.__cur.execute("CREATE INDEX IF NOT EXISTS idx_users_digest ON users (digest_mode, status, digest_sent_at)")
+
+            try:
+                self.__cur.execute("ALTER TABLE user_events ADD COLUMN remind_at DATETIME")
+                self.__cur.execute("ALTER TABLE user_events ADD COLUMN reminded INTEGER DEFAULT 0")
+                # Уже подтверждённые записи на будущие события получают напоминание один раз, при миграции
+                self.__cur.execute(
+                    f"UPDATE user_events SET remind_at = {self.REMIND_AT} WHERE status = 'approved' AND event_id IN (SELECT id FROM events WHERE event_datetime > ?)",
+                    (self._remind_modifier(), datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+            except: pass
+            # Очередь напоминаний: частичный индекс только по неотправленным, MIN(remind_at) читается из него
+            self.__cur.execute("CREATE INDEX IF NOT EXISTS idx_user_events_remind ON user_events (remind_at) WHERE reminded = 0")
             
             self.__cur.execute("SELECT COUNT(*) FROM sources")
             if self.__cur.fetchone()[0] == 0:
@@ -93,6 +375,12 @@ class FDataBase:
         except Exception as e:
             print(f"Database initialization error: {e}")
 
+    # Время напоминания считается от даты события; пересчитывается при подтверждении записи и переносе события
+    REMIND_AT = "(SELECT datetime(event_datetime, ?) FROM events WHERE events.id = user_events.event_id)"
+
+    def _remind_modifier(self) -> str:
+        return f"-{REMINDER_CONFIG.get('before_hours', 24)} hours"
+
     def _dict_factory(self, rows) -> List[Dict]:
         if not rows: return []
         try:
@@ -115,6 +403,12 @@ class FDataBase:
         user = self.get_user(telegram_id)
         return self._get_position_rank(user['position']) if user else 1
 
+    def get_user_rank(self, telegram_id: int) -> int:
+        return self._get_user_rank(telegram_id)
+
+    def get_position_rank(self, position: str) -> int:
+        return self._get_position_rank(position)
+
     def get_active_sources(self) -> List[Dict]:
         try:
             self.__cur.execute("SELECT * FROM sources WHERE is_active = 1")
@@ -124,17 +418,223 @@ class FDataBase:
     def add_source(self, name: str, url: str, base_url: str) -> bool:
         try:
             self.__cur.execute("INSERT INTO sources (name, url, base_url) VALUES (?, ?, ?)", (name, url, base_url))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
     def delete_source(self, source_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+            self.__cur.execute("DELETE FROM source_state WHERE source_id = ?", (source_id,))
+            self._commit()
+            return True
+        except: return False
+
+    def get_crawl_state(self) -> Dict:
+        try:
+            self.__cur.execute("SELECT source_id, content_hash, seen_links FROM source_state")
+            return {
+                row['source_id']: {'content_hash': row['content_hash'], 'links': json.loads(row['seen_links'] or '{}')}
+                for row in self.__cur.fetchall()
+            }
+        except: return {}
+
+    def save_crawl_state(self, crawl_state: Dict) -> bool:
+        try:
+            self.__cur.executemany(
+                "INSERT OR REPLACE INTO source_state (source_id, content_hash, seen_links, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                [(sid, st.get('content_hash'), json.dumps(st.get('links', {}), ensure_ascii=False)) for sid, st in crawl_state.items()]
+            )
+            self._commit()
+            return True
+        except Exception as e:
+            print(f"Error saving crawl state: {e}")
+            return False
+
+    def _job_from_row(self, row) -> Union[Dict, None]:
+        if not row: return None
+        job = dict(row)
+        for field in ('payload', 'checkpoint', 'result'):
+            job[field] = json.loads(job[field]) if job.get(field) else None
+        return job
+
+    def enqueue_job(self, kind: str, payload: Dict, priority: int = 0, max_attempts: int = 3, created_by: int = None) -> Union[int, None]:
+        try:
+            self.__cur.execute(
+                "INSERT INTO jobs (kind, payload, priority, max_attempts, created_by) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False), priority, max_attempts, created_by)
+            )
+            self._commit()
+            return self.__cur.lastrowid
+        except Exception as e:
+            print(f"Error enqueueing job: {e}")
+            return None
+
+    # Запущенная задача принадлежит holder: чекпоинты, heartbeat и завершение пишутся только им.
+    # Если задачу перехватил другой лидер, запись старого владельца не проходит (возвращает False)
+    def claim_next_job(self, now: float, holder: str) -> Union[Dict, None]:
+        try:
+            self.__cur.execute("SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY priority DESC, id ASC LIMIT 1", (now,))
+            row = self.__cur.fetchone()
+            if not row: return None
+            self.__cur.execute(
+                "UPDATE jobs SET status = 'running', holder = ?, attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'queued'",
+                (holder, row['id'])
+            )
+            self._commit()
+            if self.__cur.rowcount != 1: return None
+            self.__cur.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],))
+            return self._job_from_row(self.__cur.fetchone())
+        except Exception as e:
+            print(f"Error claiming job: {e}")
+            return None
+
+    def save_job_checkpoint(self, job_id: int, holder: str, checkpoint: Dict, progress: str = None) -> bool:
+        try:
+            self.__cur.execute(
+                "UPDATE jobs SET checkpoint = ?, progress = COALESCE(?, progress), updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'running' AND holder = ?",
+                (json.dumps(checkpoint, ensure_ascii=False), progress, job_id, holder)
+            )
+            held = self.__cur.rowcount > 0
+            self._commit()
+            return held
+        except: return False
+
+    def heartbeat_job(self, job_id: int, holder: str) -> bool:
+        try:
+            self.__cur.execute(
+                "UPDATE jobs SET updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'running' AND holder = ?",
+                (job_id, holder)
+            )
+            held = self.__cur.rowcount > 0
             self.__db.commit()
+            return held
+        except: return False
+
+    def finish_job(self, job_id: int, holder: str, result: Dict = None) -> bool:
+        try:
+            self.__cur.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, holder = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'running' AND holder = ?",
+                (json.dumps(result, ensure_ascii=False) if result is not None else None, job_id, holder)
+            )
+            held = self.__cur.rowcount > 0
+            self._commit()
+            return held
+        except: return False
+
+    def retry_job(self, job_id: int, holder: str, error: str, run_after: float) -> bool:
+        try:
+            self.__cur.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, run_after = ?, holder = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'running' AND holder = ?",
+                (error, run_after, job_id, holder)
+            )
+            held = self.__cur.rowcount > 0
+            self._commit()
+            return held
+        except: return False
+
+    def fail_job(self, job_id: int, holder: str, error: str) -> bool:
+        try:
+            self.__cur.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, holder = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'running' AND holder = ?",
+                (error, job_id, holder)
+            )
+            held = self.__cur.rowcount > 0
+            self._commit()
+            return held
+        except: return False
+
+    def requeue_stale_jobs(self, stale_after: float) -> int:
+        # Возвращаются в очередь только задачи без heartbeat дольше stale_after: после смены лидера
+        # старый владелец мог ещё выполнять их в потоке to_thread
+        try:
+            self.__cur.execute(
+                "UPDATE jobs SET status = 'queued', run_after = 0, holder = NULL WHERE status = 'running' AND updated_at < datetime('now', ?)",
+                (f"-{int(stale_after)} seconds",)
+            )
+            self._commit()
+            return self.__cur.rowcount
+        except: return 0
+
+    def release_jobs(self, holder: str) -> int:
+        # Штатная остановка: свои задачи сразу возвращаются в очередь, не дожидаясь stale_after
+        try:
+            self.__cur.execute("UPDATE jobs SET status = 'queued', run_after = 0, holder = NULL WHERE status = 'running' AND holder = ?", (holder,))
+            self._commit()
+            return self.__cur.rowcount
+        except: return 0
+
+    def get_job(self, job_id: int) -> Union[Dict, None]:
+        try:
+            self.__cur.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            return self._job_from_row(self.__cur.fetchone())
+        except: return None
+
+    def get_recent_jobs(self, limit: int = 10) -> List[Dict]:
+        try:
+            self.__cur.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+            return [self._job_from_row(row) for row in self.__cur.fetchall()]
+        except: return []
+
+    def get_fsm_record(self, key: str) -> Union[Dict, None]:
+        try:
+            self.__cur.execute("SELECT state, data, expires_at FROM fsm_storage WHERE key = ?", (key,))
+            res = self.__cur.fetchone()
+            return dict(res) if res else None
+        except: return None
+
+    def save_fsm_record(self, key: str, state: str, data: str, expires_at: float) -> bool:
+        try:
+            if state is None and not data:
+                self.__cur.execute("DELETE FROM fsm_storage WHERE key = ?", (key,))
+            else:
+                self.__cur.execute("""
+                    INSERT INTO fsm_storage (key, state, data, expires_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, expires_at = excluded.expires_at
+                """, (key, state, data, expires_at))
+            self._commit()
             return True
+        except Exception as e:
+            print(f"Error saving FSM state: {e}")
+            return False
+
+    def delete_expired_fsm_records(self, now: float) -> int:
+        try:
+            self.__cur.execute("DELETE FROM fsm_storage WHERE expires_at < ?", (now,))
+            self._commit()
+            return self.__cur.rowcount
+        except: return 0
+
+    def acquire_lease(self, name: str, holder: str, ttl: float, now: float) -> bool:
+        # Захват или продление аренды одним UPSERT: чужую аренду можно забрать только после истечения.
+        # Коммит сразу, в обход batch(): отложенный heartbeat означал бы потерю лидерства
+        try:
+            self.__cur.execute("""
+                INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+            """, (name, holder, now + ttl, now))
+            acquired = self.__cur.rowcount > 0
+            self.__db.commit()
+            return acquired
+        except Exception as e:
+            print(f"Error acquiring lease {name}: {e}")
+            return False
+
+    def release_lease(self, name: str, holder: str) -> bool:
+        try:
+            self.__cur.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+            self.__db.commit()
+            return self.__cur.rowcount > 0
         except: return False
 
+    def get_lease(self, name: str) -> Union[Dict, None]:
+        try:
+            self.__cur.execute("SELECT * FROM leases WHERE name = ?", (name,))
+            res = self.__cur.fetchone()
+            return dict(res) if res else None
+        except: return None
+
     def get_user(self, telegram_id: int) -> Union[Dict, None]:
         try:
             self.__cur.execute("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,))
@@ -152,7 +652,7 @@ class FDataBase:
     def add_user(self, telegram_id: int, username: str, full_name: str = None) -> bool:
         try:
             self.__cur.execute("INSERT OR IGNORE INTO users (telegram_id, username, full_name, status) VALUES (?, ?, ?, 'pending')", (telegram_id, username, full_name))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
@@ -171,14 +671,14 @@ class FDataBase:
             else:
                 return False
                 
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
         
     def update_user_activity(self, telegram_id: int):
         try:
             self.__cur.execute("UPDATE users SET last_activity = CURRENT_TIMESTAMP WHERE telegram_id = ?", (telegram_id,))
-            self.__db.commit()
+            self._commit()
         except: pass
 
     def get_user_manager(self, telegram_id: int) -> Union[Dict, None]:
@@ -194,26 +694,98 @@ class FDataBase:
                 INSERT INTO events (title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source))
-            self.__db.commit()
+            self._commit()
+            self._touch_events()
             return True
         except Exception as e:
             print(f"Error adding event: {e}")
             return False
 
+    def add_new_events_bulk(self, rows: List[Dict]) -> int:
+        if not rows: return 0
+        try:
+            with self._savepoint('bulk_events'):
+                self.__cur.executemany("""
+                    INSERT INTO events (title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source)
+                    VALUES (:title, :description, :location, :date_str, :url, :analysis, :score, :priority, :required_rank, :event_datetime, :status, :source)
+                """, rows)
+            self._commit(len(rows))
+            self._touch_events()
+            return len(rows)
+        except Exception as e:
+            print(f"Error bulk adding events: {e}")
+            return 0
+
+    def get_moderated_parser_events(self, limit: int = 5000) -> List[Dict]:
+        try:
+            self.__cur.execute("SELECT title, description, status FROM events WHERE source = 'parser' AND status IN ('approved', 'rejected') ORDER BY id DESC LIMIT ?", (limit,))
+            return self._dict_factory(self.__cur.fetchall())
+        except: return []
+
     def get_event_by_id(self, event_id: int) -> Union[Dict, None]:
+        self._sync_external_changes()
+        row = self._event_cache.get(event_id)
+        if row is not None:
+            self._event_cache.move_to_end(event_id)
+            self.event_cache_stats['hits'] += 1
+            return dict(row)
+        self.event_cache_stats['misses'] += 1
         try:
             self.__cur.execute("SELECT * FROM events WHERE id = ?", (event_id,))
             res = self.__cur.fetchone()
+            if not res: return None
+            row = dict(res)
+            self._event_cache[event_id] = row
+            while len(self._event_cache) > self._event_cache_size:
+                self._event_cache.popitem(last=False)
+            return dict(row)
+        except: return None
+
+    def get_archived_event_by_id(self, event_id: int) -> Union[Dict, None]:
+        try:
+            self.__cur.execute("SELECT * FROM events_archive WHERE id = ?", (event_id,))
+            res = self.__cur.fetchone()
             return dict(res) if res else None
         except: return None
 
+    def get_event_id_by_url(self, url: str) -> Union[int, None]:
+        if not url: return None
+        try:
+            self.__cur.execute("SELECT id FROM events WHERE url = ? LIMIT 1", (url,))
+            res = self.__cur.fetchone()
+            return res[0] if res else None
+        except: return None
+
     def check_event_exists_by_url(self, url: str) -> bool:
+        # Архив тоже проверяется: иначе парсер заново добавит уже прошедшее событие
         if not url: return False
         try:
-            self.__cur.execute("SELECT id FROM events WHERE url = ?", (url,))
+            self.__cur.execute("SELECT id FROM events WHERE url = ? UNION ALL SELECT id FROM events_archive WHERE url = ? LIMIT 1", (url, url))
             return bool(self.__cur.fetchone())
         except: return False
 
+    def archive_events(self, past_before: str, rejected_before: str, limit: int = 500) -> int:
+        # Прошедшие и давно отклонённые события переносятся в events_archive одной транзакцией,
+        # пачками по limit — чтобы не держать блокировку записи долго
+        try:
+            self.__cur.execute(
+                "SELECT id FROM events WHERE event_datetime < ? OR (status = 'rejected' AND created_at < ?) LIMIT ?",
+                (past_before, rejected_before, limit)
+            )
+            ids = [row[0] for row in self.__cur.fetchall()]
+            if not ids: return 0
+            marks = ",".join("?" * len(ids))
+            with self._savepoint('archive'):
+                self.__cur.execute(f"INSERT OR REPLACE INTO events_archive ({self.EVENT_COLUMNS}) SELECT {self.EVENT_COLUMNS} FROM events WHERE id IN ({marks})", ids)
+                self.__cur.execute(f"DELETE FROM events WHERE id IN ({marks})", ids)
+            self._commit(len(ids))
+            for event_id in ids:
+                self._forget_event(event_id)
+            return len(ids)
+        except Exception as e:
+            print(f"Error in archive_events: {e}")
+            return 0
+
     def get_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1, source: str = None) -> List[Dict]:
         try:
             user_rank = self._get_user_rank(telegram_id)
@@ -301,7 +873,7 @@ class FDataBase:
             if not user:
                 return 0
             self.__cur.execute(
-                "SELECT COUNT(*) FROM user_events WHERE user_id = ?",
+                "SELECT COUNT(*) FROM user_events ue JOIN events e ON e.id = ue.event_id WHERE ue.user_id = ?",
                 (user['id'],)
             )
             res = self.__cur.fetchone()
@@ -345,7 +917,7 @@ class FDataBase:
     def update_admin_notification(self, telegram_id: int, day: str, time: str):
         try:
             self.__cur.execute("UPDATE admins SET notification_day = ?, notification_time = ? WHERE telegram_id = ?", (day, time, telegram_id))
-            self.__db.commit()
+            self._commit()
         except: pass
 
     def get_pending_events_paginated(self, page: int = 0, limit: int = 1) -> List[Dict]:
@@ -364,15 +936,17 @@ class FDataBase:
 
     def update_status(self, event_id: int, status: str):
         try:
-            self.__cur.execute("UPDATE events SET status = ? WHERE id = ?", (status, event_id))
-            self.__db.commit()
+            self.__cur.execute("UPDATE events SET status = ?, version = version + 1 WHERE id = ?", (status, event_id))
+            self._commit()
         except: pass
+        self._forget_event(event_id)
 
     def delete_event(self, event_id: int):
         try:
             self.__cur.execute("DELETE FROM events WHERE id = ?", (event_id,))
-            self.__db.commit()
+            self._commit()
         except: pass
+        self._forget_event(event_id)
 
     def update_event(self, event_id: int, **kwargs) -> bool:
         if not kwargs: return False
@@ -380,10 +954,18 @@ class FDataBase:
         values = list(kwargs.values())
         values.append(event_id)
         try:
-            self.__cur.execute(f"UPDATE events SET {columns} WHERE id = ?", values)
-            self.__db.commit()
+            self.__cur.execute(f"UPDATE events SET {columns}, version = version + 1 WHERE id = ?", values)
+            if 'event_datetime' in kwargs:
+                # Перенос события: напоминания пересчитываются и, если уже ушли, будут отправлены заново
+                self.__cur.execute(
+                    f"UPDATE user_events SET remind_at = {self.REMIND_AT}, reminded = 0 WHERE event_id = ? AND status = 'approved'",
+                    (self._remind_modifier(), event_id)
+                )
+            self._commit()
             return True
         except: return False
+        finally:
+            self._forget_event(event_id)
         
     def get_all_events_paginated(self, page: int = 0, limit: int = 1) -> List[Dict]:
         try:
@@ -415,14 +997,16 @@ class FDataBase:
     def add_user_event(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("INSERT INTO user_events (user_id, event_id, status) VALUES (?, ?, 'pending')", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
+            self._touch_events()
             return True
         except: return False
 
     def remove_user_event(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM user_events WHERE user_id = ? AND event_id = ?", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
+            self._touch_events()
             return True
         except: return False
 
@@ -459,8 +1043,12 @@ class FDataBase:
             query = "SELECT u.telegram_id, e.title, e.date_str FROM user_events ue JOIN users u ON ue.user_id = u.id JOIN events e ON ue.event_id = e.id WHERE ue.event_id = ? AND ue.status = 'pending'"
             self.__cur.execute(query, (event_id,))
             users = self._dict_factory(self.__cur.fetchall())
-            self.__cur.execute("UPDATE user_events SET status = 'approved' WHERE event_id = ? AND status = 'pending'", (event_id,))
-            self.__db.commit()
+            self.__cur.execute(
+                f"UPDATE user_events SET status = 'approved', remind_at = {self.REMIND_AT}, reminded = 0 WHERE event_id = ? AND status = 'pending'",
+                (self._remind_modifier(), event_id)
+            )
+            self._commit()
+            self._touch_events()
             return users
         except: return []
 
@@ -470,21 +1058,27 @@ class FDataBase:
             self.__cur.execute(query, (event_id,))
             users = self._dict_factory(self.__cur.fetchall())
             self.__cur.execute("DELETE FROM user_events WHERE event_id = ? AND status = 'pending'", (event_id,))
-            self.__db.commit()
+            self._commit()
+            self._touch_events()
             return users
         except: return []
 
     def approve_registration(self, user_id: int, event_id: int) -> bool:
         try:
-            self.__cur.execute("UPDATE user_events SET status = 'approved' WHERE user_id = ? AND event_id = ?", (user_id, event_id))
-            self.__db.commit()
+            self.__cur.execute(
+                f"UPDATE user_events SET status = 'approved', remind_at = {self.REMIND_AT}, reminded = 0 WHERE user_id = ? AND event_id = ?",
+                (self._remind_modifier(), user_id, event_id)
+            )
+            self._commit()
+            self._touch_events()
             return True
         except: return False
 
     def reject_registration(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM user_events WHERE user_id = ? AND event_id = ?", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
+            self._touch_events()
             return True
         except: return False
 
@@ -517,33 +1111,33 @@ class FDataBase:
     def approve_user(self, user_id: int) -> bool:
         try:
             self.__cur.execute("UPDATE users SET status = 'approved' WHERE id = ?", (user_id,))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
     def reject_user(self, user_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
     def force_approve_user(self, telegram_id: int):
         try:
             self.__cur.execute("UPDATE users SET status = 'approved' WHERE telegram_id = ?", (telegram_id,))
-            self.__db.commit()
+            self._commit()
         except: pass
 
     def add_admin(self, telegram_id: int, username: str, role: str):
         try:
             self.__cur.execute("INSERT OR REPLACE INTO admins (telegram_id, username, role, is_active) VALUES (?, ?, ?, 1)", (telegram_id, username, role))
-            self.__db.commit()
+            self._commit()
         except: pass
     
     def remove_admin(self, telegram_id: int):
         try:
             self.__cur.execute("DELETE FROM admins WHERE telegram_id = ?", (telegram_id,))
-            self.__db.commit()
+            self._commit()
         except: pass
 
     def get_all_admins(self):
@@ -555,7 +1149,7 @@ class FDataBase:
     def update_admin_role(self, telegram_id: int, new_role: str):
         try:
             self.__cur.execute("UPDATE admins SET role = ? WHERE telegram_id = ?", (new_role, telegram_id))
-            self.__db.commit()
+            self._commit()
         except: pass
 
     def get_stats(self) -> Dict:
@@ -574,6 +1168,8 @@ class FDataBase:
             stats["approved_events"] = self.__cur.fetchone()[0]
             self.__cur.execute("SELECT COUNT(*) FROM events WHERE status = 'pending' OR status = 'new'")
             stats["pending_events"] = self.__cur.fetchone()[0]
+            self.__cur.execute("SELECT COUNT(*) FROM events_archive")
+            stats["archived_events"] = self.__cur.fetchone()[0]
             
             self.__cur.execute("SELECT COUNT(*) FROM user_events")
             stats["total_registrations"] = self.__cur.fetchone()[0]
@@ -582,6 +1178,135 @@ class FDataBase:
             return stats
         except: return {}
     
+    def get_recommendation_candidates(self, now_str: str) -> List[Dict]:
+        try:
+            self.__cur.execute(
+                "SELECT id, version, title, description, analysis, score, priority, required_rank FROM events WHERE status = 'approved' AND event_datetime >= ? ORDER BY id",
+                (now_str,)
+            )
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_recommendation_candidates: {e}")
+            return []
+
+    def get_events_index_state(self) -> List[Dict]:
+        try:
+            self.__cur.execute("SELECT id, version FROM events")
+            return self._dict_factory(self.__cur.fetchall())
+        except: return []
+
+    def get_events_for_index(self, ids: List[int]) -> List[Dict]:
+        if not ids: return []
+        try:
+            marks = ",".join("?" * len(ids))
+            self.__cur.execute(f"SELECT id, version, title, description, analysis, required_rank, status, event_datetime FROM events WHERE id IN ({marks})", ids)
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_events_for_index: {e}")
+            return []
+
+    def get_events_for_index_after(self, last_id: int, limit: int = 500) -> List[Dict]:
+        try:
+            self.__cur.execute(
+                "SELECT id, version, title, description, analysis, required_rank, status, event_datetime FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, limit)
+            )
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_events_for_index_after: {e}")
+            return []
+
+    def get_user_interest_events(self, user_id: int, limit: int = 50) -> List[Dict]:
+        # История записей для вектора интересов; прошедшие события к этому времени уже в архиве
+        try:
+            self.__cur.execute("""
+                SELECT * FROM (
+                    SELECT e.id, e.version, e.title, e.description, e.analysis, ue.status, ue.registration_date
+                    FROM user_events ue JOIN events e ON e.id = ue.event_id WHERE ue.user_id = ?
+                    UNION ALL
+                    SELECT a.id, a.version, a.title, a.description, a.analysis, ue.status, ue.registration_date
+                    FROM user_events ue JOIN events_archive a ON a.id = ue.event_id WHERE ue.user_id = ?
+                ) ORDER BY registration_date DESC LIMIT ?
+            """, (user_id, user_id, limit))
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_user_interest_events: {e}")
+            return []
+
+    def get_digest_candidates(self, start: str, end: str, limit: int = 500) -> List[Dict]:
+        # Одна выборка на весь прогон дайджеста: фильтр по рангу делается уже в памяти по когортам
+        try:
+            self.__cur.execute("""
+                SELECT id, title, date_str, location, url, score, priority, required_rank, source, event_datetime
+                FROM events WHERE status = 'approved' AND event_datetime >= ? AND event_datetime < ?
+                ORDER BY CASE priority WHEN 'high' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END, score DESC, event_datetime ASC
+                LIMIT ?
+            """, (start, end, limit))
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_digest_candidates: {e}")
+            return []
+
+    def get_digest_recipients(self, mode: str, sent_before: str, after_id: int = 0, limit: int = 1000) -> List[Dict]:
+        try:
+            self.__cur.execute("""
+                SELECT id, telegram_id, position FROM users
+                WHERE digest_mode = ? AND status = 'approved' AND (digest_sent_at IS NULL OR digest_sent_at < ?) AND id > ?
+                ORDER BY id LIMIT ?
+            """, (mode, sent_before, after_id, limit))
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_digest_recipients: {e}")
+            return []
+
+    def mark_digest_sent(self, user_ids: List[int], sent_at: str) -> bool:
+        if not user_ids: return True
+        try:
+            self.__cur.executemany("UPDATE users SET digest_sent_at = ? WHERE id = ?", [(sent_at, i) for i in user_ids])
+            self._commit(len(user_ids))
+            return True
+        except Exception as e:
+            print(f"Error in mark_digest_sent: {e}")
+            return False
+
+    def get_next_reminder_at(self) -> Union[str, None]:
+        try:
+            self.__cur.execute("SELECT MIN(remind_at) FROM user_events WHERE reminded = 0")
+            res = self.__cur.fetchone()
+            return res[0] if res else None
+        except: return None
+
+    def get_due_reminders(self, now_str: str, limit: int = 200) -> List[Dict]:
+        # LEFT JOIN: записи на удалённые или архивные события тоже возвращаются, чтобы их снять с очереди
+        try:
+            self.__cur.execute("""
+                SELECT ue.id, ue.remind_at, u.telegram_id, e.id AS event_id, e.title, e.date_str, e.location, e.url,
+                       e.event_datetime, e.status AS event_status
+                FROM user_events ue
+                LEFT JOIN users u ON u.id = ue.user_id
+                LEFT JOIN events e ON e.id = ue.event_id
+                WHERE ue.reminded = 0 AND ue.remind_at <= ?
+                ORDER BY ue.remind_at LIMIT ?
+            """, (now_str, limit))
+            return self._dict_factory(self.__cur.fetchall())
+        except Exception as e:
+            print(f"Error in get_due_reminders: {e}")
+            return []
+
+    def mark_reminders_sent(self, reminders: List[Dict]) -> bool:
+        # Сверка с remind_at: если событие перенесли во время отправки, новое напоминание не теряется
+        if not reminders: return True
+        try:
+            self.__cur.executemany(
+                "UPDATE user_events SET reminded = 1 WHERE id = ? AND remind_at = ?",
+                [(r['id'], r['remind_at']) for r in reminders]
+            )
+            self._commit(len(reminders))
+            return True
+        except Exception as e:
+            print(f"Error in mark_reminders_sent: {e}")
+            return False
+
     def get_upcoming_events(self, telegram_id: int, days: int = 31) -> List[Dict]:
         try:
             user_rank = self._get_user_rank(telegram_id)
@@ -662,9 +1387,9 @@ class FDataBase:
             print(f"Error in search_events_with_filters: {e}")
             return []
 
-    def search_admin_events_with_filters(self, keywords: list, status_filter: str = None, source_filter: str = None, limit: int = 20) -> List[Dict]:
+    def search_admin_events_with_filters(self, keywords: list, status_filter: str = None, source_filter: str = None, limit: int = 20, include_archive: bool = True) -> List[Dict]:
         try:
-            query = "SELECT * FROM events WHERE 1=1"
+            query = "1=1"
             params = []
             
             if keywords:
@@ -684,10 +1409,15 @@ class FDataBase:
                 query += " AND source = ?"
                 params.append(source_filter)
             
-            query += " ORDER BY created_at DESC LIMIT ?"
+            # Админский поиск идёт и по архиву; у архивных строк archived = 1
+            sql = f"SELECT {self.EVENT_COLUMNS}, 0 AS archived FROM events WHERE {query}"
+            if include_archive:
+                sql += f" UNION ALL SELECT {self.EVENT_COLUMNS}, 1 AS archived FROM events_archive WHERE {query}"
+                params = params * 2
+            sql += " ORDER BY created_at DESC LIMIT ?"
             params.append(limit)
             
-            self.__cur.execute(query, params)
+            self.__cur.execute(sql, params)
             return self._dict_factory(self.__cur.fetchall())
         except Exception as e:
             print(f"Error in search_admin_events_with_filters: {e}")
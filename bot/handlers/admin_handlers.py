@@ -1,20 +1,18 @@
-from aiogram import Router, F, types, Bot
+from aiogram import Router, F, types
 from aiogram.fsm.context import FSMContext
-from aiogram.types import BufferedInputFile, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton
 import json
+import html
 import asyncio
 import csv
 import io
-from datetime import datetime, timedelta
-
-try:
-    import dateparser
-except ImportError:
-    dateparser = None
 
 from utils.keyboards import *
 from utils.states import AdminStates
 from utils.ics_generator import IcsGenerator
+from utils.event_cards import get_event_card
+from utils.dates import parse_date_safe
+from services.job_queue import JOB_STATUS_ICONS
 from database import FDataBase
 
 router = Router()
@@ -49,20 +47,6 @@ async def handle_cancel(message: types.Message, state: FSMContext, db: FDataBase
     else:
         await message.answer("❌ Действие отменено", reply_markup=get_main_keyboard(False))
 
-def parse_date_safe(date_str):
-    if not date_str:
-        return datetime.now()
-    if dateparser:
-        try:
-            dt = dateparser.parse(date_str, languages=['ru', 'en'], settings={'PREFER_DATES_FROM': 'future'})
-            if dt:
-                if dt < datetime.now() - timedelta(days=1):
-                     try: dt = dt.replace(year=datetime.now().year + 1)
-                     except: pass
-                return dt
-        except: pass
-    return datetime.now()
-
 @router.message(lambda msg: msg.text == "⚙️ Админ-панель")
 async def admin_panel(message: types.Message, db: FDataBase):
     admin = check_access(message, db)
@@ -186,7 +170,8 @@ async def show_stats(message: types.Message, db: FDataBase):
         f"• Активных: <b>{stats.get('active_users', 0)}</b>\n\n"
         f"📅 <b>Мероприятия:</b>\n"
         f"• Опубл.: <b>{stats.get('approved_events', 0)}</b>\n"
-        f"• На модерации: <b>{stats.get('pending_events', 0)}</b>\n\n"
+        f"• На модерации: <b>{stats.get('pending_events', 0)}</b>\n"
+        f"• В архиве: <b>{stats.get('archived_events', 0)}</b>\n\n"
         f"📝 <b>Регистрации:</b>\n"
         f"• Всего: <b>{stats.get('total_registrations', 0)}</b>\n"
         f"• Ожидают: <b>{stats.get('pending_registrations', 0)}</b>"
@@ -233,31 +218,6 @@ async def show_manager_events_list_page(message: types.Message, db: FDataBase, p
     
     await message.answer(text, parse_mode="HTML", reply_markup=get_manager_events_pagination_keyboard(events, page, max(1, total)))
 
-def get_manager_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
-    buttons = []
-    
-    nav_buttons = []
-    if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"manager_events_prev_{current_page - 1}"))
-    
-    nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
-    
-    if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"manager_events_next_{current_page + 1}"))
-    
-    if nav_buttons:
-        buttons.append(nav_buttons)
-    
-    if events:
-        buttons.append([
-            InlineKeyboardButton(text="🔍 Детали", callback_data=f"manager_event_details_{events[0]['id']}"),
-            InlineKeyboardButton(text="👥 Участники", callback_data=f"event_participants_{events[0]['id']}")
-        ])
-    
-    buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
 @router.callback_query(F.data.startswith("manager_events_prev_"))
 async def manager_events_prev(c: types.CallbackQuery, db: FDataBase):
     admin = check_callback_access(c, db)
@@ -281,24 +241,14 @@ async def manager_event_details(c: types.CallbackQuery, db: FDataBase):
     await show_manager_event_detail(c.message, db, int(c.data.split("_")[3]))
 
 async def show_manager_event_detail(message, db, eid):
-    e = db.get_event_by_id(eid)
-    if not e: return
-    text = f"📝 <b>{e['title']}</b>\nID: {eid}\n📅 {e['date_str']}\n📍 {e['location']}\n🔗 {e['url']}"
-    kb = get_manager_event_detail_keyboard(eid)
+    card = get_event_card(db, eid, 'manager')
+    if not card: return
+    text, kb = card.text, card.keyboard
     if isinstance(message, types.Message):
         await message.answer(text, parse_mode="HTML", reply_markup=kb)
     else:
         await message.edit_text(text, parse_mode="HTML", reply_markup=kb)
 
-def get_manager_event_detail_keyboard(event_id: int) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="👥 Участники", callback_data=f"event_participants_{event_id}"),
-            InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_manager_events")
-        ],
-        [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")]
-    ])
-
 @router.callback_query(F.data == "back_to_manager_events")
 async def back_to_manager_events(c: types.CallbackQuery, db: FDataBase):
     admin = check_callback_access(c, db)
@@ -586,7 +536,6 @@ async def update_registrations_view(c: types.CallbackQuery, db: FDataBase, event
         )
         return
     
-    event = db.get_event_by_id(event_id)
     await show_event_registrations_page(c.message, db, event_id, 0)
 
 @router.callback_query(F.data.startswith("event_users_prev_"))
@@ -647,44 +596,19 @@ async def back_to_pending_list(c: types.CallbackQuery, db: FDataBase):
     await show_pending_registrations_list(c.message, db, page, c.from_user.id)
 
 @router.callback_query(F.data.startswith("bulk_approve_"))
-async def bulk_approve_handler(c: types.CallbackQuery, db: FDataBase):
+async def bulk_approve_handler(c: types.CallbackQuery, db: FDataBase, jobs):
     admin = check_callback_access(c, db)
     if not admin: return
     
     event_id = int(c.data.split("_")[2])
 
-    approved_users = await asyncio.to_thread(db.approve_all_event_registrations, event_id)
-    
-    await c.answer(f"✅ Утверждено записей: {len(approved_users)}")
-    
-    if approved_users:
-        event = db.get_event_by_id(event_id)
-        if event:
-            try:
-                ics_content = await asyncio.to_thread(
-                    IcsGenerator.generate_ics, 
-                    event['title'], 
-                    event['description'] or "",
-                    event['location'] or "",
-                    event['date_str']
-                )
-                file_name = f"invite_{event['id']}.ics"
-                
-                for u in approved_users:
-                    try:
-                        file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
-                        
-                        await c.bot.send_document(
-                            u['telegram_id'],
-                            document=file,
-                            caption=f"✅ <b>Ваша заявка подтверждена!</b>\n\n🎯 <b>{event['title']}</b>",
-                            parse_mode="HTML"
-                        )
-                        await asyncio.sleep(0.1) 
-                    except Exception as e:
-                        print(f"Не удалось отправить файл юзеру {u.get('telegram_id')}: {e}")
-            except Exception as e:
-                print(f"Ошибка генерации ICS для рассылки: {e}")
+    status_msg = await c.message.answer("🕓 Утверждение записей поставлено в очередь...")
+    job_id = jobs.enqueue('bulk_approve', {
+        'event_id': event_id,
+        'chat_id': status_msg.chat.id,
+        'message_id': status_msg.message_id
+    }, priority=2, created_by=c.from_user.id)
+    await c.answer("⏳ Задача поставлена в очередь" if job_id else "❌ Ошибка постановки задачи")
         
     await c.message.delete()
     await show_pending_registrations_list(c.message, db, 0, c.from_user.id)
@@ -698,15 +622,14 @@ async def bulk_reject_handler(c: types.CallbackQuery, db: FDataBase):
     rejected_users = await asyncio.to_thread(db.reject_all_event_registrations, event_id)
     await c.answer(f"❌ Отклонено записей: {len(rejected_users)}")
     
-    for u in rejected_users:
+    event = db.get_event_by_id(event_id)
+    for u in rejected_users if event else []:
         try:
-            event = db.get_event_by_id(event_id)
-            if event:
-                await c.bot.send_message(
-                    u['telegram_id'], 
-                    f"❌ <b>Ваша запись отклонена руководителем</b>\n\n🎯 <b>{event['title']}</b>", 
-                    parse_mode="HTML"
-                )
+            await c.bot.send_message(
+                u['telegram_id'], 
+                f"❌ <b>Ваша запись отклонена руководителем</b>\n\n🎯 <b>{event['title']}</b>", 
+                parse_mode="HTML"
+            )
         except: pass
 
     await c.message.delete()
@@ -805,7 +728,7 @@ async def scan_sources_start(message: types.Message, state: FSMContext, db: FDat
     )
 
 @router.message(AdminStates.waiting_for_parsing_criteria)
-async def scan_sources_process(message: types.Message, state: FSMContext, db: FDataBase, parser, gigachat):
+async def scan_sources_process(message: types.Message, state: FSMContext, db: FDataBase, jobs):
     admin = check_access(message, db)
     if not admin: return
     
@@ -835,46 +758,63 @@ async def scan_sources_process(message: types.Message, state: FSMContext, db: FD
     
     await state.clear()
     criteria_text = message.text if message.text == "🔍 Все темы" else ", ".join(criteria)
-    status_msg = await message.answer(f"⏳ <b>Сканирование...</b>\nТема: {criteria_text}", parse_mode="HTML")
+    status_msg = await message.answer(f"🕓 <b>Сканирование поставлено в очередь</b>\nТема: {criteria_text}", parse_mode="HTML")
     
-    try:
-        db_sources = await asyncio.to_thread(db.get_active_sources)
-        raw_events = await asyncio.to_thread(parser.get_events, db_sources, criteria)
-        
-        if not raw_events:
-            await status_msg.edit_text("❌ Событий не найдено.")
-            return
-            
-        await status_msg.edit_text(f"🔍 Найдено {len(raw_events)}. Анализ AI...", parse_mode="HTML")
-        
-        added_count = 0
-        for raw_event in raw_events:
-            if db.check_event_exists_by_url(raw_event.get('url')): continue
-            
-            analysis = await asyncio.to_thread(gigachat.analyze_event, raw_event.get('text', ''), criteria)
-            dt_obj = parse_date_safe(analysis.get('date', ''))
-            dt_str = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
-            priority = analysis.get('priority', 'medium')
-
-            db.add_new_event(
-                title=analysis.get('title', 'Без названия'),
-                description=raw_event.get('text', ''),
-                location=analysis.get('location', 'СПб'),
-                date_str=analysis.get('date', 'Не указана'),
-                url=raw_event.get('url', ''),
-                analysis=json.dumps(analysis, ensure_ascii=False),
-                score=analysis.get('score', 0),
-                priority=priority,
-                required_rank=1,
-                event_datetime=dt_str,
-                status='new',
-                source='parser'
-            )
-            added_count += 1
-                
-        await status_msg.edit_text(f"✅ <b>Готово!</b> Добавлено: {added_count}", parse_mode="HTML")
-    except Exception as e:
-        await status_msg.edit_text(f"❌ Ошибка: {str(e)}")
+    job_id = jobs.enqueue('scan', {
+        'criteria': criteria,
+        'criteria_text': criteria_text,
+        'chat_id': status_msg.chat.id,
+        'message_id': status_msg.message_id
+    }, priority=1, created_by=message.from_user.id)
+    if not job_id:
+        await status_msg.edit_text("❌ Не удалось поставить задачу в очередь.")
+
+JOB_KIND_NAMES = {'scan': 'Сканирование', 'file_import': 'Импорт файла', 'bulk_approve': 'Утверждение записей'}
+
+@router.message(lambda msg: msg.text == "/jobs")
+async def show_jobs_status(message: types.Message, db: FDataBase, jobs):
+    admin = check_access(message, db)
+    if not admin: return
+    
+    recent = await asyncio.to_thread(jobs.get_recent, 10)
+    if not recent:
+        await message.answer("📭 Фоновых задач пока не было.")
+        return
+    
+    text = "🧵 <b>Фоновые задачи:</b>\n\n"
+    for job in recent:
+        icon = JOB_STATUS_ICONS.get(job['status'], '•')
+        text += f"{icon} #{job['id']} {JOB_KIND_NAMES.get(job['kind'], job['kind'])} — {job['status']} (попыток: {job['attempts']})\n"
+        if job.get('progress') and job['status'] in ('queued', 'running'):
+            text += f"   {job['progress']}\n"
+        if job.get('error') and job['status'] != 'done':
+            text += f"   ⚠️ {job['error'][:100]}\n"
+    await message.answer(text, parse_mode="HTML")
+
+@router.message(lambda msg: msg.text in ("/queries", "/queries p99", "/queries reset"))
+async def show_query_stats(message: types.Message, db: FDataBase):
+    admin = check_access(message, db)
+    if not admin: return
+
+    if message.text == "/queries reset":
+        db.query_stats.reset()
+        await message.answer("🧹 Статистика запросов сброшена.")
+        return
+
+    order = 'p99_ms' if message.text == "/queries p99" else 'total_ms'
+    top = db.query_stats.top(10, order)
+    if not top:
+        await message.answer("📭 Запросов пока не было.")
+        return
+
+    text = f"🐢 <b>Топ запросов ({'по p99' if order == 'p99_ms' else 'по суммарному времени'}):</b>\n\n"
+    for i, q in enumerate(top, 1):
+        text += (
+            f"{i}. <code>{html.escape(q['sql'][:150])}</code>\n"
+            f"   ×{q['count']} · Σ {q['total_ms']:.0f} мс · p50 {q['p50_ms']:.1f} · p99 {q['p99_ms']:.1f} · max {q['max_ms']:.1f} мс\n"
+            f"   строк: {q['rows']} · медленных: {q['slow']}\n"
+        )
+    await message.answer(text, parse_mode="HTML")
 
 @router.message(lambda msg: msg.text == "📝 Управление мероприятиями")
 async def manage_events_menu(message: types.Message, db: FDataBase):
@@ -1034,10 +974,10 @@ async def upload_file_start(message: types.Message, state: FSMContext, db: FData
     admin = check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_file)
-    await message.answer("📂 <b>Отправьте файл</b> (.txt, .json)", parse_mode="HTML", reply_markup=get_cancel_keyboard())
+    await message.answer("📂 <b>Отправьте файл</b> (.txt, .csv, .json, .jsonl, .ics)", parse_mode="HTML", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_file)
-async def process_file_upload(message: types.Message, state: FSMContext, db: FDataBase, gigachat: any, bot: Bot):
+async def process_file_upload(message: types.Message, state: FSMContext, db: FDataBase, jobs):
     admin = check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
@@ -1047,37 +987,17 @@ async def process_file_upload(message: types.Message, state: FSMContext, db: FDa
         await message.answer("❌ Прикрепите файл.")
         return
 
-    wait_msg = await message.answer("⏳ Анализирую файл...")
-    try:
-        file_info = await bot.get_file(message.document.file_id)
-        downloaded = await bot.download_file(file_info.file_path)
-        content = downloaded.read().decode('utf-8', errors='ignore')
-        events_data = await asyncio.to_thread(gigachat.analyze_file_content, content)
-        
-        count = 0
-        for ev in events_data:
-            dt_obj = parse_date_safe(ev.get('date', ''))
-            db.add_new_event(
-                title=ev.get('title', 'Без названия'),
-                description=ev.get('description', ''),
-                location=ev.get('location', 'Не указано'),
-                date_str=ev.get('date', 'Не указана'),
-                url='',
-                analysis=json.dumps(ev, ensure_ascii=False),
-                score=50,
-                priority='medium',
-                required_rank=1,
-                event_datetime=dt_obj.strftime('%Y-%m-%d %H:%M:%S'),
-                status='pending',
-                source='file'
-            )
-            count += 1
-        await state.clear()
-        await wait_msg.delete()
-        await message.answer(f"✅ Загружено черновиков: <b>{count}</b>", parse_mode="HTML", reply_markup=get_events_mgmt_kb())
-    except Exception as e:
-        await state.clear()
-        await message.answer(f"❌ Ошибка: {str(e)}", reply_markup=get_events_mgmt_kb())
+    await state.clear()
+    await message.answer("📂 Файл принят в обработку.", reply_markup=get_events_mgmt_kb())
+    status_msg = await message.answer("🕓 Импорт поставлен в очередь...")
+    job_id = jobs.enqueue('file_import', {
+        'file_id': message.document.file_id,
+        'file_name': message.document.file_name,
+        'chat_id': status_msg.chat.id,
+        'message_id': status_msg.message_id
+    }, created_by=message.from_user.id)
+    if not job_id:
+        await status_msg.edit_text("❌ Не удалось поставить задачу в очередь.")
 
 @router.message(F.text == "📋 Список всех мероприятий")
 async def list_all_events(message: types.Message, db: FDataBase):
@@ -1116,31 +1036,6 @@ async def show_admin_events_list_page(message: types.Message, db: FDataBase, pag
     
     await message.answer(text, parse_mode="HTML", reply_markup=get_admin_events_pagination_keyboard(events, page, max(1, total)))
 
-def get_admin_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
-    buttons = []
-    
-    nav_buttons = []
-    if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"admin_events_prev_{current_page - 1}"))
-    
-    nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
-    
-    if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"admin_events_next_{current_page + 1}"))
-    
-    if nav_buttons:
-        buttons.append(nav_buttons)
-    
-    if events:
-        buttons.append([
-            InlineKeyboardButton(text="🔍 Детали", callback_data=f"admin_event_details_{events[0]['id']}"),
-            InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"admin_event_details_{events[0]['id']}")
-        ])
-    
-    buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
 @router.callback_query(F.data.startswith("admin_events_prev_"))
 async def admin_events_prev(c: types.CallbackQuery, db: FDataBase):
     admin = check_callback_access(c, db)
@@ -1275,7 +1170,7 @@ async def perform_admin_smart_search(message: types.Message, state: FSMContext,
             
         text = "🔍 <b>Результаты поиска:</b>\n\n"
         for res in results:
-            status_icon = "✅" if res['status'] == 'approved' else "⏳"
+            status_icon = "🗄" if res.get('archived') else "✅" if res['status'] == 'approved' else "⏳"
             source_icon = "🤝" if res['source'] == 'partner' else "📂" if res['source'] == 'file' else "🤖"
             text += f"{status_icon}{source_icon} <b>{res['title']}</b>\nID: /admin_event_details_{res['id']}\n\n"
         
@@ -1300,10 +1195,12 @@ async def admin_det_cb(c: types.CallbackQuery, db: FDataBase):
     await show_admin_detail(c.message, db, int(c.data.split("_")[3]))
 
 async def show_admin_detail(message, db, eid):
-    e = db.get_event_by_id(eid)
-    if not e: return
-    text = f"📝 <b>{e['title']}</b>\nID: {eid}\n📅 {e['date_str']}\n📍 {e['location']}\n🔗 {e['url']}"
-    kb = get_event_edit_keyboard(eid)
+    card = get_event_card(db, eid, 'admin')
+    if not card:
+        archived = db.get_archived_event_by_id(eid)
+        if not archived: return
+        card = get_event_card(db, eid, 'archive', archived)
+    text, kb = card.text, card.keyboard
     if isinstance(message, types.Message):
         await message.answer(text, parse_mode="HTML", reply_markup=kb)
     else:
@@ -9,6 +9,10 @@ from datetime import datetime, timedelta
 from utils.keyboards import *
 from utils.states import UserStates
 from utils.ics_generator import IcsGenerator
+from utils.event_cards import get_event_card
+from utils.page_prefetch import PagePrefetcher
+from services.recommendation_service import recommender
+from services.search_index import search_index
 from database import FDataBase
 
 router = Router()
@@ -173,27 +177,32 @@ async def show_main_events(message: types.Message, db: FDataBase):
     
     await show_events_page(message, db, 0, 'main')
 
-async def show_events_page(message: types.Message, db: FDataBase, page: int, event_type='main'):
+def render_events_page(db: FDataBase, user_id: int, event_type: str, page: int):
     if event_type == 'main':
-        events = await asyncio.to_thread(db.get_events_paginated, message.from_user.id, page, 1, None)
-        total = await asyncio.to_thread(db.get_total_approved_events, 'main')
+        events = db.get_events_paginated(user_id, page, 1, None)
+        total = db.get_total_approved_events('main')
         title = "📅 Основные мероприятия"
     elif event_type == 'priority':
-        events = await asyncio.to_thread(db.get_high_priority_events_paginated, message.from_user.id, page, 1)
-        total = await asyncio.to_thread(db.get_total_priority_events, message.from_user.id)
+        events = db.get_high_priority_events_paginated(user_id, page, 1)
+        total = db.get_total_priority_events(user_id)
         title = "🔥 Приоритетные мероприятия"
     elif event_type == 'partner':
-        events = await asyncio.to_thread(db.get_partner_events_paginated, message.from_user.id, page, 1)
-        total = await asyncio.to_thread(db.get_total_partner_events, message.from_user.id)
+        events = db.get_partner_events_paginated(user_id, page, 1)
+        total = db.get_total_partner_events(user_id)
         title = "🤝 Партнёрские мероприятия"
+    elif event_type == 'recommended':
+        ids = recommender.recommend(db, user_id)
+        event = db.get_event_by_id(ids[page]) if page < len(ids) else None
+        events = [event] if event else []
+        total = len(ids)
+        title = "⭐ Рекомендуемые"
     elif event_type == 'my_events':
-        events = await asyncio.to_thread(db.get_user_events_paginated, message.from_user.id, page, 1)
-        total = await asyncio.to_thread(db.get_total_user_events, message.from_user.id)
+        events = db.get_user_events_paginated(user_id, page, 1)
+        total = db.get_total_user_events(user_id)
         title = "📅 Мои мероприятия"
     
     if not events:
-        await message.answer("📭 Мероприятий пока нет.")
-        return
+        return None
 
     event = events[0]
     
@@ -226,30 +235,24 @@ async def show_events_page(message: types.Message, db: FDataBase, page: int, eve
         )
     
     kb = get_events_pagination_keyboard(events, page, max(1, total), event_type)
-    
-    await message.answer(text, parse_mode="HTML", reply_markup=kb)
+    return text, kb, total
 
-def get_events_pagination_keyboard(events: list, current_page: int, total_pages: int, event_type: str = 'main') -> InlineKeyboardMarkup:
-    buttons = []
-    
-    nav_buttons = []
-    if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{event_type}_page_{current_page - 1}"))
-    
-    nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
-    
-    if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{event_type}_page_{current_page + 1}"))
-    
-    if nav_buttons:
-        buttons.append(nav_buttons)
-    
-    if events:
-        buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=f"event_details_{events[0]['id']}")])
-    
-    buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
+page_prefetcher = PagePrefetcher(render_events_page)
+
+async def show_events_page(message: types.Message, db: FDataBase, page: int, event_type='main'):
+    # chat.id, а не from_user: в колбэках message.from_user — это сам бот
+    user_id = message.chat.id
+    rendered = page_prefetcher.get(db, user_id, event_type, page)
+    if rendered is None:
+        rendered = await asyncio.to_thread(render_events_page, db, user_id, event_type, page)
     
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    if not rendered:
+        await message.answer("📭 Мероприятий пока нет.")
+        return
+
+    text, kb, total = rendered
+    await message.answer(text, parse_mode="HTML", reply_markup=kb)
+    page_prefetcher.schedule(db, user_id, event_type, page, total)
 
 @router.callback_query(F.data.startswith("main_page_"))
 async def main_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
@@ -278,6 +281,15 @@ async def partner_pagination_handler(callback: types.CallbackQuery, db: FDataBas
     except Exception as e:
         await callback.answer("❌ Ошибка навигации")
 
+@router.callback_query(F.data.startswith("recommended_page_"))
+async def recommended_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
+    try:
+        page = int(callback.data.split("_")[2])
+        await callback.message.delete()
+        await show_events_page(callback.message, db, page, 'recommended')
+    except Exception as e:
+        await callback.answer("❌ Ошибка навигации")
+
 @router.callback_query(F.data.startswith("my_events_page_"))
 async def my_events_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
     try:
@@ -296,6 +308,15 @@ async def show_priority(message: types.Message, db: FDataBase):
     
     await show_events_page(message, db, 0, 'priority')
 
+@router.message(F.text == "⭐ Рекомендуемые")
+async def show_recommended(message: types.Message, db: FDataBase):
+    user = db.get_user(message.from_user.id)
+    if not user or user.get('status') != 'approved':
+        await message.answer("⏳ Аккаунт не подтвержден")
+        return
+    
+    await show_events_page(message, db, 0, 'recommended')
+
 @router.message(F.text == "🤝 Партнёрские мероприятия")
 async def show_partner_events(message: types.Message, db: FDataBase):
     user = db.get_user(message.from_user.id)
@@ -313,7 +334,7 @@ async def search_start(message: types.Message, state: FSMContext, db: FDataBase)
     await state.set_state(UserStates.waiting_for_search_text)
     await message.answer(
         "🔍 <b>Выберите фильтры для поиска:</b>\n"
-        "Можно выбрать несколько фильтров по очереди",
+        "Можно выбрать несколько фильтров по очереди или написать запрос своими словами",
         parse_mode="HTML", 
         reply_markup=get_search_filters_keyboard()
     )
@@ -343,7 +364,10 @@ async def search_process(message: types.Message, state: FSMContext, db: FDataBas
     }
     
     if message.text not in filter_map:
-        await message.answer("❌ Пожалуйста, выберите фильтр из меню.")
+        if message.text and len(message.text.strip()) >= 2:
+            await perform_semantic_search(message, db, message.text.strip())
+        else:
+            await message.answer("❌ Пожалуйста, выберите фильтр из меню или напишите запрос.")
         return
     
     selected_filter = filter_map[message.text]
@@ -432,6 +456,27 @@ async def perform_smart_search(message: types.Message, state: FSMContext, db: FD
         await wait_msg.delete()
         await message.answer(f"❌ Ошибка при поиске: {str(e)}")
 
+async def perform_semantic_search(message: types.Message, db: FDataBase, query: str):
+    # Свободный текст ищется по локальному векторному индексу: без сети и без GigaChat
+    user_rank = db.get_user_rank(message.from_user.id)
+    found = await asyncio.to_thread(search_index.search, db, query, None, user_rank)
+    # индекс сверяет правки статусов раз в reconcile_interval — статус перепроверяется по строке
+    events = [e for e in (db.get_event_by_id(event_id) for event_id, _ in found) if e and e['status'] == 'approved']
+
+    if not events:
+        await message.answer(
+            "🔍 <b>По вашему запросу ничего не найдено</b>\n"
+            "Попробуйте переформулировать или выберите фильтры",
+            parse_mode="HTML",
+            reply_markup=get_search_filters_keyboard()
+        )
+        return
+
+    if len(events) == 1:
+        await show_event_details(message, events[0], db)
+    else:
+        await show_search_results(message, events, db)
+
 async def show_search_results(message: types.Message, events: list, db: FDataBase):
     text = f"🔍 <b>Найдено мероприятий: {len(events)}</b>\n\n"
     
@@ -456,20 +501,12 @@ async def show_event_details(message: types.Message, event: dict, db: FDataBase)
             break
             
     is_admin = bool(db.get_admin(message.from_user.id))
-    
-    text = (
-        f"🎯 <b>{event['title']}</b>\n\n"
-        f"📅 <b>Дата:</b> {event['date_str']}\n"
-        f"📍 <b>Место:</b> {event['location']}\n"
-        f"🔗 <b>Ссылка:</b> {event['url'] or 'Нет'}\n"
-        f"📊 <b>Релевантность:</b> {event['score']}/100\n\n"
-        f"📝 <b>Описание:</b>\n{event['description'][:500]}..."
-    )
+    card = get_event_card(db, event['id'], 'user_brief', event)
     
     await message.answer(
-        text, 
+        card.text, 
         parse_mode="HTML", 
-        reply_markup=get_event_detail_keyboard(event['id'], event.get('url', ''), reg_status, is_admin)
+        reply_markup=get_event_detail_keyboard(event['id'], card.url, reg_status, is_admin)
     )
 
 @router.message(F.text == "👤 Профиль")
@@ -484,9 +521,23 @@ async def show_profile(message: types.Message, db: FDataBase):
         f"👤 {user['full_name']}\n"
         f"💼 {user['position']}\n"
         f"📧 {user['email']}\n\n"
-        f"📅 Мероприятий: <b>{stats.get('total_events', 0)}</b>"
+        f"📅 Мероприятий: <b>{stats.get('total_events', 0)}</b>\n\n"
+        f"📬 Дайджест мероприятий:"
     )
-    await message.answer(text, parse_mode="HTML", reply_markup=get_profile_keyboard())
+    await message.answer(text, parse_mode="HTML", reply_markup=get_profile_keyboard(user.get('digest_mode') or 'weekly'))
+
+@router.callback_query(F.data.startswith("digest_mode_"))
+async def set_digest_mode(callback: types.CallbackQuery, db: FDataBase):
+    mode = callback.data.replace("digest_mode_", "")
+    if mode not in DIGEST_MODES:
+        await callback.answer()
+        return
+    db.update_user_profile(telegram_id=callback.from_user.id, digest_mode=mode)
+    try:
+        await callback.message.edit_reply_markup(reply_markup=get_profile_keyboard(mode))
+    except:
+        pass
+    await callback.answer(f"📬 Дайджест: {DIGEST_MODES[mode].lower()}")
 
 @router.message(F.text == "📅 Мои мероприятия")
 async def show_my_events(message: types.Message, db: FDataBase):
@@ -575,8 +626,8 @@ async def event_details(callback: types.CallbackQuery, db: FDataBase):
         eid = int(callback.data.split("_")[2])
     except: return
     
-    event = db.get_event_by_id(eid)
-    if not event:
+    card = get_event_card(db, eid, 'user')
+    if not card:
         await callback.answer("Событие не найдено")
         return
     
@@ -591,25 +642,10 @@ async def event_details(callback: types.CallbackQuery, db: FDataBase):
             
     is_admin = bool(db.get_admin(callback.from_user.id))
     
-    try:
-        analysis = json.loads(event['analysis'])
-    except:
-        analysis = {}
-        
-    text = (
-        f"🎯 <b>{event['title']}</b>\n\n"
-        f"📅 <b>Дата:</b> {event['date_str']}\n"
-        f"📍 <b>Место:</b> {event['location']}\n"
-        f"🔗 <b>Ссылка:</b> {event['url'] or 'Нет'}\n"
-        f"📊 <b>Релевантность:</b> {event['score']}/100\n\n"
-        f"📝 <b>Описание:</b>\n{event['description'][:500]}...\n\n"
-        f"👥 <b>Аудитория:</b> {analysis.get('target_audience', 'Все желающие')}"
-    )
-    
     await callback.message.answer(
-        text, 
+        card.text, 
         parse_mode="HTML", 
-        reply_markup=get_event_detail_keyboard(eid, event.get('url', ''), reg_status, is_admin)
+        reply_markup=get_event_detail_keyboard(eid, card.url, reg_status, is_admin)
     )
     await callback.answer()
 
@@ -621,11 +657,11 @@ async def request_reg(callback: types.CallbackQuery, db: FDataBase):
     user_rank = db._get_position_rank(user['position'])
     
     if db.add_user_event(user['id'], eid):
+        event = db.get_event_by_id(eid)
         if user_rank >= 3:
             await callback.answer("✅ Вы успешно записаны (Автоподтверждение)!")
             db.approve_registration(user['id'], eid)
             
-            event = db.get_event_by_id(eid)
             if event:
                 ics_content = await asyncio.to_thread(IcsGenerator.generate_ics, 
                                                      event['title'], 
@@ -651,9 +687,8 @@ async def request_reg(callback: types.CallbackQuery, db: FDataBase):
                  admins = db.get_all_admins()
                  if admins: manager = admins[0]
 
-            if manager:
+            if manager and event:
                 try:
-                    event = db.get_event_by_id(eid)
                     await callback.bot.send_message(
                         manager['telegram_id'],
                         f"📝 <b>ЗАПРОС НА РЕГИСТРАЦИЮ</b>\n\n"
@@ -669,7 +704,6 @@ async def request_reg(callback: types.CallbackQuery, db: FDataBase):
                     )
                 except: pass
         
-        event = db.get_event_by_id(eid)
         is_admin = bool(db.get_admin(callback.from_user.id))
         try:
             status_display = 'approved' if user_rank >= 3 else 'pending'
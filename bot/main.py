@@ -1,8 +1,6 @@
 import asyncio
-import sqlite3
 import logging
 from aiogram import Bot, Dispatcher, BaseMiddleware
-from aiogram.fsm.storage.memory import MemoryStorage
 from typing import Callable, Dict, Any, Awaitable
 from aiogram.types import TelegramObject
 from datetime import datetime, timedelta, timezone
@@ -13,12 +11,37 @@ except ImportError:
     BOT_TOKEN = "YOUR_TOKEN_HERE"
     BOT_CONFIG = {'admin_ids': []}
 
-from database import FDataBase
+try:
+    from config import WEBHOOK_CONFIG, SHARDING_CONFIG, METRICS_CONFIG
+except ImportError:
+    WEBHOOK_CONFIG = {'enabled': False}
+    SHARDING_CONFIG = {'processes': 0}
+    METRICS_CONFIG = {'enabled': False}
+
+from database import FDataBase, connect_db
 from services.gigachat_service import GigaChatService
 from services.parser_service import ParserService
+from services.relevance_service import RelevanceClassifier
+from services.job_queue import JobQueue
+from services.background_jobs import register_jobs
+from services.webhook_server import WebhookServer
+from services.sharding import ShardSupervisor, ShardConsumer
+from services.leader_election import LeaderElector
+from services.archiver import archive_scheduler
+from services.broadcast import ThrottledSender
+from services.digest import digest_scheduler, DIGEST_CONFIG
+from services.reminders import reminder_scheduler, REMINDER_CONFIG
 from handlers.user_handlers import router as user_router
 from handlers.admin_handlers import router as admin_router
 from utils.keyboards import get_admin_main_kb
+from utils.fsm_storage import SQLiteStorage
+from utils.metrics import REGISTRY, MetricsMiddleware, start_metrics_server
+from utils.warmup import start_warm_up
+from utils import dates
+from handlers.user_handlers import page_prefetcher
+from utils.event_cards import card_cache
+from services.recommendation_service import recommender
+from services.search_index import search_index, SEARCH_CONFIG
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,13 +54,16 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+DB_PATH = 'sber_events.db'
 OWNER_ID = BOT_CONFIG['admin_ids'][0] if BOT_CONFIG.get('admin_ids') else 0
 
 class DataMiddleware(BaseMiddleware):
-    def __init__(self, db: FDataBase, gigachat: GigaChatService, parser: ParserService):
+    def __init__(self, db: FDataBase, gigachat: GigaChatService, parser: ParserService, relevance: RelevanceClassifier, jobs: JobQueue):
         self.db = db
         self.gigachat = gigachat
         self.parser = parser
+        self.relevance = relevance
+        self.jobs = jobs
 
     async def __call__(
         self,
@@ -48,6 +74,8 @@ class DataMiddleware(BaseMiddleware):
         data["db"] = self.db
         data["gigachat"] = self.gigachat
         data["parser"] = self.parser
+        data["relevance"] = self.relevance
+        data["jobs"] = self.jobs
         return await handler(event, data)
 
 async def notification_scheduler(bot: Bot, db: FDataBase):
@@ -97,18 +125,53 @@ async def notification_scheduler(bot: Bot, db: FDataBase):
             logger.error(f"Scheduler error: {e}")
             await asyncio.sleep(60)
 
-async def main():
-    logger.info("🚀 Starting AI Media Agent Sber...")
-    
+def create_dispatcher(db: FDataBase, gigachat: GigaChatService, parser: ParserService, relevance: RelevanceClassifier, jobs: JobQueue) -> Dispatcher:
+    dp = Dispatcher(storage=SQLiteStorage(db))
+
+    middleware = DataMiddleware(db, gigachat, parser, relevance, jobs)
+    user_router.message.middleware(middleware)
+    user_router.callback_query.middleware(middleware)
+    admin_router.message.middleware(middleware)
+    admin_router.callback_query.middleware(middleware)
+
+    # Внутренние middleware диспетчера наследуются роутерами — замер времени для всех хендлеров
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
+
+    dp.include_router(admin_router)
+    dp.include_router(user_router)
+    return dp
+
+async def start_metrics(db: FDataBase, port_offset: int = 0):
+    if not METRICS_CONFIG.get('enabled'):
+        return None
+    REGISTRY.add_collector('bot_event_cache_total', 'FDataBase event row cache', lambda: db.event_cache_stats, type='counter')
+    REGISTRY.add_collector('bot_card_cache_total', 'Rendered event card cache', lambda: card_cache.stats, type='counter')
+    REGISTRY.add_collector('bot_page_prefetch_total', 'Event page prefetch cache', lambda: page_prefetcher.stats, type='counter')
+    REGISTRY.add_collector('bot_search_index_total', 'Semantic search index operations', lambda: search_index.stats, type='counter')
+    REGISTRY.add_collector('bot_recommendations_total', 'Recommendation cache and matrix rebuilds', lambda: recommender.stats, type='counter')
     try:
-        conn = sqlite3.connect('sber_events.db', check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        db = FDataBase(conn)
-        logger.info("✅ Database initialized successfully")
-    except Exception as e:
-        logger.error(f"❌ Database initialization failed: {e}")
-        return
+        return await start_metrics_server(port=METRICS_CONFIG.get('port', 9100) + port_offset)
+    except OSError as e:
+        logger.error(f"❌ Metrics server failed to start: {e}")
+        return None
 
+async def stop_metrics(runner):
+    if runner:
+        await runner.cleanup()
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    server = WebhookServer(bot, dp)
+    REGISTRY.add_collector('bot_webhook_updates', 'Webhook server counters', lambda: {**server.stats, 'queued': server.queue.qsize()})
+    await dp.emit_startup(bot=bot)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        await dp.emit_shutdown(bot=bot)
+
+def setup_owner(db: FDataBase):
     try:
         if OWNER_ID != 0:
             admin_data = db.get_admin(OWNER_ID)
@@ -126,9 +189,132 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Owner setup error: {e}")
 
+def create_services(db: FDataBase) -> Dict[str, Any]:
+    jobs = JobQueue(db)
+    register_jobs(jobs)
+    return {
+        'gigachat': GigaChatService(),
+        'parser': ParserService(),
+        'relevance': RelevanceClassifier(),
+        'jobs': jobs,
+    }
+
+def start_background(bot: Bot, db: FDataBase, services: Dict[str, Any]) -> asyncio.Task:
+    jobs = services['jobs']
+
+    async def run_jobs():
+        await jobs.start(bot=bot, db=db, gigachat=services['gigachat'], parser=services['parser'], relevance=services['relevance'])
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await jobs.stop()
+
+    # Один отправитель на процесс: лимит Telegram общий для всех рассылок
+    sender = ThrottledSender(bot)
+    REGISTRY.add_collector('bot_broadcast_total', 'Throttled broadcast sender', lambda: sender.stats, type='counter')
+
+    # Планировщик, очередь задач, архивация и рассылки работают только у лидера — на любом числе экземпляров и шардов
+    elector = LeaderElector(db)
+    elector.add_singleton('notifications', lambda: notification_scheduler(bot, db))
+    elector.add_singleton('jobs', run_jobs)
+    elector.add_singleton('archiver', lambda: archive_scheduler(db))
+    if DIGEST_CONFIG.get('enabled', True):
+        elector.add_singleton('digest', lambda: digest_scheduler(db, sender))
+    if REMINDER_CONFIG.get('enabled', True):
+        elector.add_singleton('reminders', lambda: reminder_scheduler(db, sender))
+    return asyncio.create_task(elector.run())
+
+async def stop_background(task: asyncio.Task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+def start_services_warm_up(db: FDataBase, services: Dict[str, Any]) -> asyncio.Task:
+    return start_warm_up([
+        ('dateparser', dates.warm_up),
+        ('gigachat', services['gigachat'].warm_up),
+        ('parser', services['parser'].warm_up),
+        ('search_index', lambda: search_index.refresh(db)),
+    ])
+
+async def stop_warm_up(task: asyncio.Task):
+    if task:
+        await stop_background(task)
+
+async def run_shard(index: int, processes: int, inbox):
+    conn = connect_db(DB_PATH)
+    db = FDataBase(conn)
+    services = create_services(db)
+    if SEARCH_CONFIG.get('path'):
+        # у шардов одного экземпляра общий BOT_INSTANCE_ID, файл индекса различается номером шарда
+        search_index.open(f"{SEARCH_CONFIG['path']}.shard{index}")
+    bot = Bot(token=BOT_TOKEN)
+    dp = create_dispatcher(db, **services)
+
+    background = start_background(bot, db, services)
+    metrics = await start_metrics(db, port_offset=1 + index)
+    warm_up = start_services_warm_up(db, services)
+    logger.info(f"🧩 Shard {index}/{processes} ready")
+
     try:
-        gigachat = GigaChatService()
-        parser = ParserService()
+        await ShardConsumer(bot, dp).consume(inbox)
+    finally:
+        await stop_warm_up(warm_up)
+        await stop_metrics(metrics)
+        await stop_background(background)
+        await bot.session.close()
+        conn.close()
+
+def shard_process(index: int, processes: int, inbox):
+    try:
+        asyncio.run(run_shard(index, processes, inbox))
+    except KeyboardInterrupt:
+        pass
+
+async def run_supervisor(bot: Bot):
+    supervisor = ShardSupervisor(shard_process, SHARDING_CONFIG['processes'])
+    supervisor.start()
+    monitor = asyncio.create_task(supervisor.monitor())
+    server = None
+    try:
+        if WEBHOOK_CONFIG.get('enabled'):
+            server = WebhookServer(bot, None, handler=supervisor.route)
+            await server.start()
+            await asyncio.Event().wait()
+        else:
+            await bot.delete_webhook()
+            await supervisor.poll(bot)
+    finally:
+        monitor.cancel()
+        if server:
+            await server.stop()
+        await supervisor.stop()
+
+async def main():
+    logger.info("🚀 Starting AI Media Agent Sber...")
+    
+    try:
+        conn = connect_db(DB_PATH)
+        db = FDataBase(conn)
+        logger.info("✅ Database initialized successfully")
+    except Exception as e:
+        logger.error(f"❌ Database initialization failed: {e}")
+        return
+
+    setup_owner(db)
+
+    if SHARDING_CONFIG.get('processes'):
+        bot = Bot(token=BOT_TOKEN)
+        logger.info(f"🤖 Starting supervisor with {SHARDING_CONFIG['processes']} shard processes...")
+        try:
+            await run_supervisor(bot)
+        finally:
+            await bot.session.close()
+            conn.close()
+            logger.info("👋 Bot stopped")
+        return
+
+    try:
+        services = create_services(db)
         logger.info("✅ Services initialized successfully")
     except Exception as e:
         logger.error(f"❌ Services initialization failed: {e}")
@@ -136,30 +322,30 @@ async def main():
 
     try:
         bot = Bot(token=BOT_TOKEN)
-        dp = Dispatcher(storage=MemoryStorage())
+        dp = create_dispatcher(db, **services)
         logger.info("✅ Bot initialized successfully")
     except Exception as e:
         logger.error(f"❌ Bot initialization failed: {e}")
         return
 
-    middleware = DataMiddleware(db, gigachat, parser)
-    user_router.message.middleware(middleware)
-    user_router.callback_query.middleware(middleware)
-    admin_router.message.middleware(middleware)
-    admin_router.callback_query.middleware(middleware)
-
-    dp.include_router(admin_router)
-    dp.include_router(user_router)
-    
-    asyncio.create_task(notification_scheduler(bot, db))
+    background = start_background(bot, db, services)
+    metrics = await start_metrics(db)
+    warm_up = start_services_warm_up(db, services)
 
-    logger.info("🤖 AI Media Agent Sber is ready! Starting polling...")
-    
     try:
-        await dp.start_polling(bot)
+        if WEBHOOK_CONFIG.get('enabled'):
+            logger.info("🤖 AI Media Agent Sber is ready! Starting webhook server...")
+            await run_webhook(bot, dp)
+        else:
+            logger.info("🤖 AI Media Agent Sber is ready! Starting polling...")
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except Exception as e:
         logger.error(f"❌ Polling error: {e}")
     finally:
+        await stop_warm_up(warm_up)
+        await stop_metrics(metrics)
+        await stop_background(background)
         await bot.session.close()
         conn.close()
         logger.info("👋 Bot stopped")
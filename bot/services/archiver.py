@@ -0,0 +1,34 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+try:
+    from config import ARCHIVE_CONFIG
+except ImportError:
+    ARCHIVE_CONFIG = {'interval': 3600, 'grace_hours': 24, 'rejected_days': 30, 'batch': 500}
+
+logger = logging.getLogger(__name__)
+
+def archive_old_events(db, now: datetime = None) -> int:
+    # event_datetime хранится в локальном времени, а created_at SQLite пишет в UTC
+    now = now or datetime.now()
+    past_before = (now - timedelta(hours=ARCHIVE_CONFIG.get('grace_hours', 24))).strftime('%Y-%m-%d %H:%M:%S')
+    rejected_before = (datetime.now(timezone.utc) - timedelta(days=ARCHIVE_CONFIG.get('rejected_days', 30))).strftime('%Y-%m-%d %H:%M:%S')
+    batch = ARCHIVE_CONFIG.get('batch', 500)
+    total = 0
+    while True:
+        moved = db.archive_events(past_before, rejected_before, batch)
+        total += moved
+        if moved < batch: return total
+
+async def archive_scheduler(db):
+    # Пользовательские выборки работают только с горячей таблицей events, архив — для админского поиска
+    logger.info("🗄 Archiver started")
+    while True:
+        try:
+            moved = await asyncio.to_thread(archive_old_events, db)
+            if moved:
+                logger.info(f"🗄 Archived {moved} events")
+        except Exception as e:
+            logger.error(f"Archiver error: {e}")
+        await asyncio.sleep(ARCHIVE_CONFIG.get('interval', 3600))
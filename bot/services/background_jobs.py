@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+from aiogram.types import BufferedInputFile
+
+from utils.dates import parse_date_safe, parse_date_fast
+from utils.ics_generator import IcsGenerator
+from services.file_ingest import FileIngestor, iter_decoded, iter_text_chunks
+from services.structured_import import detect_format, iter_structured_rows, map_row, is_complete, row_to_text
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 500
+
+def format_scan_deltas(deltas: list) -> str:
+    lines = ["📡 <b>Источники:</b>"]
+    for d in deltas:
+        if d['status'] == 'unchanged':
+            lines.append(f"• {d['name']}: без изменений")
+        elif d['status'] == 'error':
+            lines.append(f"• {d['name']}: ⚠️ нет ответа")
+        else:
+            lines.append(f"• {d['name']}: +{d['new']} новых, {d['changed']} изм.")
+    return "\n".join(lines)
+
+async def run_scan_job(ctx):
+    db, parser, gigachat, relevance = ctx.deps['db'], ctx.deps['parser'], ctx.deps['gigachat'], ctx.deps['relevance']
+    criteria = ctx.payload.get('criteria') or []
+    criteria_text = ctx.payload.get('criteria_text', '')
+
+    if 'candidates' not in ctx.checkpoint:
+        await ctx.progress(f"⏳ <b>Сканирование...</b>\nТема: {criteria_text}", force=True)
+        db_sources = await asyncio.to_thread(db.get_active_sources)
+        crawl_state = await asyncio.to_thread(db.get_crawl_state)
+        raw_events, deltas = await asyncio.to_thread(parser.get_new_events, db_sources, crawl_state, criteria)
+
+        # Изменённая карточка уже добавленного события идёт на повторный анализ мимо фильтра:
+        # строка события обновляется, а не добавляется заново
+        fresh_events, changed_events = [], []
+        for e in raw_events:
+            event_id = db.get_event_id_by_url(e.get('url')) if e.get('changed') else None
+            if event_id:
+                changed_events.append({**e, 'event_id': event_id})
+            elif not db.check_event_exists_by_url(e.get('url')):
+                fresh_events.append(e)
+        await asyncio.to_thread(relevance.train_from_db, db)
+        candidates, skipped = relevance.filter_candidates(fresh_events)
+
+        await asyncio.to_thread(db.save_crawl_state, crawl_state)
+        await ctx.save(
+            candidates=changed_events + candidates, done=0, added=0, updated=0, found=len(raw_events), skipped=len(skipped),
+            deltas_text=format_scan_deltas(deltas)
+        )
+
+    cp = ctx.checkpoint
+    cp.setdefault('updated', 0)
+    candidates = cp['candidates']
+    if not candidates:
+        await ctx.progress(f"❌ Новых событий не найдено.\n\n{cp['deltas_text']}", force=True)
+        return {'added': 0, 'found': cp['found']}
+
+    for i in range(cp['done'], len(candidates)):
+        raw_event = candidates[i]
+        analysis = await asyncio.to_thread(gigachat.analyze_event, raw_event.get('text', ''), criteria)
+        dt_obj = parse_date_safe(analysis.get('date', ''))
+
+        fields = dict(
+            title=analysis.get('title', 'Без названия'),
+            description=raw_event.get('text', ''),
+            location=analysis.get('location', 'СПб'),
+            date_str=analysis.get('date', 'Не указана'),
+            analysis=json.dumps(analysis, ensure_ascii=False),
+            score=analysis.get('score', 0),
+            priority=analysis.get('priority', 'medium'),
+            event_datetime=dt_obj.strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+        # Событие и чекпоинт — одним коммитом, уже после ответа GigaChat: транзакция не ждёт сеть
+        progress = f"🔍 Найдено {cp['found']}. Анализ AI: {i + 1}/{len(candidates)}..."
+        with db.batch():
+            if raw_event.get('event_id'):
+                # Статус модерации и ранг не трогаем; версия растёт, напоминания пересчитываются при переносе
+                if not db.update_event(raw_event['event_id'], **fields):
+                    raise RuntimeError(f"failed to update event {raw_event['event_id']}")
+                ctx.save_checkpoint(progress, done=i + 1, updated=cp['updated'] + 1)
+            else:
+                db.add_new_event(url=raw_event.get('url', ''), required_rank=1, status='new', source='parser', **fields)
+                ctx.save_checkpoint(progress, done=i + 1, added=cp['added'] + 1)
+        await ctx.progress(progress)
+
+    report = f"✅ <b>Готово!</b> Добавлено: {cp['added']}, обновлено: {cp['updated']}"
+    if relevance.is_trained:
+        report += (
+            f"\n🧠 Отсеяно фильтром: {cp['skipped']} (сэкономлено вызовов AI)"
+            f"\n📉 Оценка пропусков: {relevance.validation.get('missed_rate', 0):.0%} одобряемых событий"
+        )
+    report += f"\n\n{cp['deltas_text']}"
+    await ctx.progress(report, force=True)
+    return {'added': cp['added'], 'updated': cp['updated'], 'found': cp['found'], 'skipped': cp['skipped']}
+
+def _file_event_row(ev: dict) -> dict:
+    date_str = ev.get('date') or 'Не указана'
+    dt_obj = parse_date_fast(date_str) or parse_date_safe(ev.get('date', ''))
+    return {
+        'title': ev.get('title') or 'Без названия',
+        'description': ev.get('description', ''),
+        'location': ev.get('location') or 'Не указано',
+        'date_str': date_str,
+        'url': ev.get('url', ''),
+        'analysis': json.dumps(ev, ensure_ascii=False),
+        'score': 50,
+        'priority': 'medium',
+        'required_rank': 1,
+        'event_datetime': dt_obj.strftime('%Y-%m-%d %H:%M:%S'),
+        'status': 'pending',
+        'source': 'file'
+    }
+
+def _insert_events(db, rows: list):
+    # Пачка не должна пропасть молча: ошибка вставки роняет задачу, и она повторится с последнего чекпоинта
+    if db.add_new_events_bulk(rows) != len(rows):
+        raise RuntimeError(f"failed to insert {len(rows)} events")
+
+def _save_rows(ctx, db, batch: list):
+    # rows_done — число пройденных полных строк файла, по нему пропускаются строки при возобновлении
+    cp = ctx.checkpoint
+    with db.batch():
+        _insert_events(db, batch)
+        ctx.save_checkpoint(rows_done=cp['rows_done'] + len(batch), count=cp['count'] + len(batch))
+
+async def _import_structured_rows(ctx, db, fmt, pieces, spool) -> int:
+    # Полные строки пишутся в БД пачками без AI; неполные дописываются в spool для разбора через GigaChat
+    cp = ctx.checkpoint
+    leftovers, batch, complete = 0, [], 0
+    for raw in iter_structured_rows(fmt, pieces):
+        row = map_row(raw)
+        if not is_complete(row):
+            spool.write(row_to_text(raw) + "\n")
+            leftovers += 1
+            continue
+        complete += 1
+        if complete <= cp['rows_done']: continue
+        batch.append(_file_event_row(row))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _save_rows(ctx, db, batch)
+            batch = []
+            await ctx.progress(f"📂 Импорт строк: {cp['rows_done']}...")
+            await asyncio.sleep(0)
+    if batch:
+        _save_rows(ctx, db, batch)
+    return leftovers
+
+async def run_file_import_job(ctx):
+    db, gigachat, bot = ctx.deps['db'], ctx.deps['gigachat'], ctx.deps['bot']
+    cp = ctx.checkpoint
+    cp.setdefault('chunks_done', 0)
+    cp.setdefault('rows_done', 0)
+    cp.setdefault('keys', [])
+    cp.setdefault('count', 0)
+
+    await ctx.progress("⏳ Загружаю файл...", force=True)
+    ingestor = FileIngestor(gigachat)
+
+    async def save_chunk(done, new_events):
+        rows = [_file_event_row(ev) for ev in new_events]
+        progress = f"📂 Обработано фрагментов: {done}. Найдено событий: {cp['count'] + len(new_events)}"
+        # Ключи уже сохранённых событий нужны, чтобы после рестарта не задублировать фрагменты за чекпоинтом
+        with db.batch():
+            _insert_events(db, rows)
+            ctx.save_checkpoint(progress, chunks_done=done, keys=sorted(ingestor.seen_keys), count=cp['count'] + len(new_events))
+        await ctx.progress(progress)
+
+    # Файл пишется на диск потоком и читается фрагментами — в памяти не держим его целиком
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'upload')
+        file_info = await bot.get_file(ctx.payload['file_id'])
+        await bot.download_file(file_info.file_path, destination=path)
+        with open(path, 'rb') as f:
+            head = f.read(4096).decode('utf-8', errors='ignore')
+            f.seek(0)
+            fmt = detect_format(ctx.payload.get('file_name'), head)
+            text_path = path
+            if fmt:
+                await ctx.progress(f"⏳ Структурированный файл ({fmt.upper()}), импорт без AI...", force=True)
+                # Неполные строки тоже копятся на диске, а не в списке: их может быть сколько угодно
+                text_path = os.path.join(tmp_dir, 'leftovers')
+                with open(text_path, 'w', encoding='utf-8') as spool:
+                    await _import_structured_rows(ctx, db, fmt, iter_decoded(f), spool)
+        with open(text_path, 'rb') as f:
+            await ingestor.ingest(iter_text_chunks(iter_decoded(f)), save_chunk, start=cp['chunks_done'], seen_keys=cp['keys'])
+
+    await ctx.progress(f"✅ Загружено черновиков: <b>{cp['count']}</b>", force=True)
+    return {'count': cp['count'], 'format': fmt or 'text', 'rows': cp['rows_done'], 'chunks': cp['chunks_done']}
+
+async def run_bulk_approve_job(ctx):
+    db, bot = ctx.deps['db'], ctx.deps['bot']
+    event_id = ctx.payload['event_id']
+
+    if 'users' not in ctx.checkpoint:
+        approved_users = await asyncio.to_thread(db.approve_all_event_registrations, event_id)
+        await ctx.save(users=[u['telegram_id'] for u in approved_users], sent=0)
+
+    users = ctx.checkpoint['users']
+    event = db.get_event_by_id(event_id)
+    if users and event:
+        ics_content = await asyncio.to_thread(
+            IcsGenerator.generate_ics,
+            event['title'],
+            event['description'] or "",
+            event['location'] or "",
+            event['date_str']
+        )
+        file_name = f"invite_{event['id']}.ics"
+
+        for i in range(ctx.checkpoint['sent'], len(users)):
+            try:
+                file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
+                await bot.send_document(
+                    users[i],
+                    document=file,
+                    caption=f"✅ <b>Ваша заявка подтверждена!</b>\n\n🎯 <b>{event['title']}</b>",
+                    parse_mode="HTML"
+                )
+            except Exception as e:
+                logger.warning(f"Не удалось отправить файл юзеру {users[i]}: {e}")
+            await ctx.save(progress=f"📨 Рассылка приглашений: {i + 1}/{len(users)}", sent=i + 1)
+            await asyncio.sleep(0.1)
+
+    await ctx.progress(f"✅ Утверждено записей: {len(users)}", force=True)
+    return {'approved': len(users)}
+
+def register_jobs(queue):
+    queue.register('scan', run_scan_job)
+    queue.register('file_import', run_file_import_job)
+    queue.register('bulk_approve', run_bulk_approve_job)
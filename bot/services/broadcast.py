@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter, TelegramBadRequest
+
+try:
+    from config import BROADCAST_CONFIG
+except ImportError:
+    BROADCAST_CONFIG = {'rate': 25, 'concurrency': 10, 'max_retries': 3}
+
+logger = logging.getLogger(__name__)
+
+# Рассылка в обход лимитов Telegram: сообщения уходят не чаще rate в секунду на весь бот,
+# 429 (RetryAfter) ставит на паузу всех отправителей, а не только упавший запрос.
+# Один экземпляр на процесс: лимит общий для дайджестов и напоминаний.
+class ThrottledSender:
+    def __init__(self, bot: Bot, rate: float = None, concurrency: int = None, max_retries: int = None):
+        self.bot = bot
+        self.interval = 1.0 / (rate or BROADCAST_CONFIG.get('rate', 25))
+        self.concurrency = concurrency or BROADCAST_CONFIG.get('concurrency', 10)
+        self.max_retries = BROADCAST_CONFIG.get('max_retries', 3) if max_retries is None else max_retries
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {'sent': 0, 'failed': 0, 'blocked': 0, 'retried': 0}
+
+    async def _acquire(self):
+        # Слоты выдаются по очереди под замком, ждут их уже без замка
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> bool:
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            try:
+                await self.bot.send_message(chat_id, text, **kwargs)
+                self.stats['sent'] += 1
+                return True
+            except TelegramRetryAfter as e:
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                self.stats['retried'] += 1
+            except TelegramForbiddenError:
+                self.stats['blocked'] += 1
+                raise
+            except TelegramBadRequest as e:
+                logger.error(f"Broadcast to {chat_id} rejected: {e}")
+                break
+            except Exception as e:
+                logger.error(f"Broadcast to {chat_id} failed (attempt {attempt + 1}): {e}")
+                self.stats['retried'] += 1
+        self.stats['failed'] += 1
+        return False
+
+    async def send_many(self, messages: Iterable[Tuple[int, str, dict]],
+                        on_blocked: Callable[[int], Awaitable] = None) -> int:
+        # messages: (chat_id, text, kwargs); возвращает число доставленных
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        delivered = 0
+
+        async def worker():
+            nonlocal delivered
+            while True:
+                try:
+                    chat_id, text, kwargs = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    sent = await self.send(chat_id, text, **kwargs)
+                    delivered += sent
+                except TelegramForbiddenError:
+                    if on_blocked: await on_blocked(chat_id)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, queue.qsize()))))
+        return delivered
@@ -0,0 +1,104 @@
+import asyncio
+import html
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from services.broadcast import ThrottledSender
+
+try:
+    from config import DIGEST_CONFIG
+except ImportError:
+    DIGEST_CONFIG = {
+        'enabled': True, 'hour': 10, 'weekday': 0, 'interval': 300,
+        'max_events': 7, 'batch': 1000, 'windows': {'daily': 1, 'weekly': 7},
+    }
+
+logger = logging.getLogger(__name__)
+
+MAX_RANK = 5
+TITLES = {'daily': "📬 <b>Мероприятия на ближайшие сутки</b>", 'weekly': "📬 <b>Дайджест мероприятий на неделю</b>"}
+PRIORITY_ICONS = {'high': '🔥 ', 'medium': '', 'low': ''}
+
+def period_start(mode: str, now: datetime) -> datetime:
+    # Начало текущего периода рассылки: сегодня (или в день недели weekday) в hour часов
+    start = now.replace(hour=DIGEST_CONFIG.get('hour', 10), minute=0, second=0, microsecond=0)
+    if mode == 'weekly':
+        start -= timedelta(days=(now.weekday() - DIGEST_CONFIG.get('weekday', 0)) % 7)
+        if start > now: start -= timedelta(days=7)
+    elif start > now:
+        start -= timedelta(days=1)
+    return start
+
+def render_digest(mode: str, events: List[Dict]) -> str:
+    lines = [TITLES.get(mode, TITLES['weekly']), ""]
+    # Отбор — по приоритету и оценке, показ — по дате
+    for event in sorted(events, key=lambda e: e['event_datetime'] or ''):
+        icon = PRIORITY_ICONS.get(event['priority'], '') + ('🤝 ' if event['source'] == 'partner' else '')
+        lines.append(f"• {icon}<b>{html.escape(event['title'] or '')}</b>")
+        lines.append(f"   📅 {html.escape(event['date_str'] or '')}  📍 {html.escape(event['location'] or '')}")
+    lines.append("\nПодробности и запись — в разделе «📅 Мероприятия». Настроить рассылку можно в «👤 Профиль».")
+    return "\n".join(lines)
+
+def build_digests(db, mode: str, now: datetime) -> Dict[int, str]:
+    # Когорта = (ранг, режим рассылки): выборка событий одна на режим, текст — один на уникальный
+    # набор событий. Стоимость растёт с числом когорт, а не получателей.
+    days = DIGEST_CONFIG.get('windows', {}).get(mode, 7)
+    candidates = db.get_digest_candidates(now.strftime('%Y-%m-%d %H:%M:%S'), (now + timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S'))
+    max_events = DIGEST_CONFIG.get('max_events', 7)
+    rendered, digests = {}, {}
+    for rank in range(1, MAX_RANK + 1):
+        events = [e for e in candidates if (e['required_rank'] or 1) <= rank][:max_events]
+        if not events: continue
+        key = tuple(e['id'] for e in events)
+        if key not in rendered:
+            rendered[key] = render_digest(mode, events)
+        digests[rank] = rendered[key]
+    return digests
+
+async def send_digests(db, sender: ThrottledSender, mode: str, now: datetime = None) -> Dict[str, int]:
+    now = now or datetime.now()
+    start = period_start(mode, now).strftime('%Y-%m-%d %H:%M:%S')
+    stats = {'recipients': 0, 'delivered': 0, 'variants': 0}
+    digests = None
+    after_id = 0
+    batch = DIGEST_CONFIG.get('batch', 1000)
+
+    async def on_blocked(chat_id: int):
+        # Заблокировавшим бота больше не пишем
+        await asyncio.to_thread(db.update_user_profile, telegram_id=chat_id, digest_mode='off')
+
+    while True:
+        recipients = await asyncio.to_thread(db.get_digest_recipients, mode, start, after_id, batch)
+        if not recipients: break
+        if digests is None:
+            digests = await asyncio.to_thread(build_digests, db, mode, now)
+            stats['variants'] = len(set(digests.values()))
+        after_id = recipients[-1]['id']
+        messages = []
+        for user in recipients:
+            text = digests.get(db.get_position_rank(user['position']))
+            if text:
+                messages.append((user['telegram_id'], text, {'parse_mode': 'HTML', 'disable_web_page_preview': True}))
+        # Пачка отмечается до отправки (не больше одного дайджеста за период): падение или смена лидера
+        # посреди рассылки оставят часть пачки без дайджеста, но никому не придёт второй.
+        # Отмечаются все, включая тех, кому нечего прислать: период для них закрыт
+        sent_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if not await asyncio.to_thread(db.mark_digest_sent, [u['id'] for u in recipients], sent_at):
+            raise RuntimeError("failed to mark digest recipients")
+        stats['recipients'] += len(recipients)
+        stats['delivered'] += await sender.send_many(messages, on_blocked=on_blocked)
+    return stats
+
+async def digest_scheduler(db, sender: ThrottledSender):
+    # Повторный запуск после рестарта или смены лидера не дублирует рассылку: отметка digest_sent_at
+    logger.info("📬 Digest scheduler started")
+    while True:
+        for mode in DIGEST_CONFIG.get('windows', {}):
+            try:
+                stats = await send_digests(db, sender, mode)
+                if stats['recipients']:
+                    logger.info(f"📬 {mode} digest: {stats['delivered']}/{stats['recipients']} delivered, {stats['variants']} variants")
+            except Exception as e:
+                logger.error(f"Digest error ({mode}): {e}")
+        await asyncio.sleep(DIGEST_CONFIG.get('interval', 300))
@@ -0,0 +1,115 @@
+import asyncio
+import codecs
+import re
+import logging
+from typing import Iterable, Iterator, Callable, Awaitable, List, Dict, BinaryIO
+
+try:
+    from config import INGEST_CONFIG
+except ImportError:
+    INGEST_CONFIG = {'chunk_tokens': 1000, 'overlap_tokens': 100, 'concurrency': 4}
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+READ_SIZE = 64 * 1024
+
+def iter_decoded(stream: BinaryIO, encoding: str = 'utf-8') -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+    while True:
+        block = stream.read(READ_SIZE)
+        if not block:
+            tail = decoder.decode(b'', final=True)
+            if tail: yield tail
+            return
+        text = decoder.decode(block)
+        if text: yield text
+
+def iter_lines(pieces: Iterable[str]) -> Iterator[str]:
+    buffer = ''
+    for piece in pieces:
+        buffer += piece
+        lines = buffer.split('\n')
+        buffer = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if buffer:
+        yield buffer
+
+def iter_text_chunks(pieces: Iterable[str], max_tokens: int = None, overlap_tokens: int = None) -> Iterator[str]:
+    # Режем текст по строкам на фрагменты не больше max_tokens; хвост предыдущего
+    # фрагмента (overlap_tokens) повторяется в начале следующего, чтобы не терять события на стыке
+    max_chars = (max_tokens or INGEST_CONFIG.get('chunk_tokens', 1000)) * CHARS_PER_TOKEN
+    overlap_chars = (overlap_tokens if overlap_tokens is not None else INGEST_CONFIG.get('overlap_tokens', 100)) * CHARS_PER_TOKEN
+    overlap_chars = min(overlap_chars, max_chars // 2)
+
+    lines, size, has_new = [], 0, False
+    for line in iter_lines(pieces):
+        while len(line) > max_chars:
+            head, line = line[:max_chars], line[max_chars:]
+            if lines and has_new: yield ''.join(lines)
+            yield head
+            lines, size, has_new = [], 0, False
+        if size + len(line) > max_chars and has_new:
+            yield ''.join(lines)
+            tail, tail_size = [], 0
+            for prev in reversed(lines):
+                if tail_size + len(prev) > overlap_chars: break
+                tail.insert(0, prev)
+                tail_size += len(prev)
+            lines, size, has_new = tail, tail_size, False
+        lines.append(line)
+        size += len(line)
+        has_new = has_new or bool(line.strip())
+    if lines and has_new:
+        yield ''.join(lines)
+
+def event_key(ev: Dict) -> str:
+    title = re.sub(r'[\W_]+', ' ', str(ev.get('title') or '').lower()).strip()
+    date = re.sub(r'\s+', ' ', str(ev.get('date') or '').lower()).strip()
+    return f"{title}|{date}"
+
+class FileIngestor:
+    def __init__(self, gigachat, concurrency: int = None):
+        self.gigachat = gigachat
+        self.concurrency = concurrency or INGEST_CONFIG.get('concurrency', 4)
+        self.seen_keys = set()
+
+    async def ingest(self, chunks: Iterable[str], on_chunk: Callable[[int, List[Dict]], Awaitable[None]], start: int = 0, seen_keys: Iterable[str] = ()) -> int:
+        # on_chunk(done, new_events) вызывается по мере готовности фрагментов; done — число
+        # фрагментов, обработанных подряд с начала файла (безопасная точка для чекпоинта)
+        self.seen_keys = set(seen_keys)
+        pending, finished = {}, set()
+        watermark = start
+
+        async def drain(return_when):
+            nonlocal watermark
+            done, _ = await asyncio.wait(pending, return_when=return_when)
+            for task in done:
+                index = pending.pop(task)
+                try:
+                    events = task.result()
+                except Exception as e:
+                    logger.error(f"Chunk {index} analysis failed: {e}")
+                    events = []
+                new_events = []
+                for ev in events if isinstance(events, list) else []:
+                    if not isinstance(ev, dict) or not ev.get('title'): continue
+                    key = event_key(ev)
+                    if key in self.seen_keys: continue
+                    self.seen_keys.add(key)
+                    new_events.append(ev)
+                finished.add(index)
+                while watermark in finished:
+                    finished.discard(watermark)
+                    watermark += 1
+                await on_chunk(watermark, new_events)
+
+        for index, chunk in enumerate(chunks):
+            if index < start: continue
+            while len(pending) >= self.concurrency:
+                await drain(asyncio.FIRST_COMPLETED)
+            pending[asyncio.create_task(asyncio.to_thread(self.gigachat.analyze_file_content, chunk))] = index
+        while pending:
+            await drain(asyncio.ALL_COMPLETED)
+        return watermark
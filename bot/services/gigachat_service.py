@@ -1,21 +1,63 @@
-import gigachat
-from gigachat.models import Chat, Messages, MessagesRole
 import json
 import re
+import time
 
 try:
-    from config import GIGACHAT_API_KEY
+    from config import GIGACHAT_API_KEY, GIGACHAT_CONFIG
 except ImportError:
     GIGACHAT_API_KEY = "YOUR_KEY"
+    GIGACHAT_CONFIG = {'base_url': None, 'auth_url': None, 'model': 'GigaChat', 'timeout': 30}
+
+from services.file_ingest import iter_text_chunks, event_key, CHARS_PER_TOKEN
+from utils.warmup import import_modules
+from utils.metrics import LLM_SECONDS, LLM_TOKENS, LLM_FAILURES
 
 class GigaChatService:
-    def __init__(self):
-        self.api_key = GIGACHAT_API_KEY
+    # Столько текста уходит в один запрос анализа файла; длинный текст режется на фрагменты
+    FILE_CHUNK_CHARS = 4000
+
+    def __init__(self, api_key: str = None, base_url: str = None, auth_url: str = None):
+        self.api_key = api_key or GIGACHAT_API_KEY
+        self.base_url = base_url or GIGACHAT_CONFIG.get('base_url')
+        self.auth_url = auth_url or GIGACHAT_CONFIG.get('auth_url')
+        self.model = GIGACHAT_CONFIG.get('model', 'GigaChat')
+        self.timeout = GIGACHAT_CONFIG.get('timeout', 30)
+        self._client = None
+
+    def warm_up(self):
+        import_modules('gigachat', 'gigachat.models')
+
+    def _get_client(self):
+        # Один клиент на сервис: OAuth-токен и HTTP-соединения переиспользуются между запросами.
+        # SDK импортируется здесь: он тянет httpx и pydantic-модели и заметно замедляет старт
+        if self._client is None:
+            import gigachat
+            urls = {k: v for k, v in (('base_url', self.base_url), ('auth_url', self.auth_url)) if v}
+            self._client = gigachat.GigaChat(
+                credentials=self.api_key, model=self.model, verify_ssl_certs=False, timeout=self.timeout, **urls
+            )
+        return self._client
+
+    def _chat(self, operation: str, prompt: str) -> str:
+        from gigachat.models import Chat, Messages, MessagesRole
+        client = self._get_client()
+        messages = [Messages(role=MessagesRole.USER, content=prompt)]
+        started = time.perf_counter()
+        try:
+            response = client.chat(Chat(messages=messages, temperature=0.1))
+        except Exception:
+            LLM_FAILURES.inc(1, operation, 'request')
+            raise
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - started, operation)
+        usage = getattr(response, 'usage', None)
+        if usage:
+            LLM_TOKENS.inc(usage.prompt_tokens or 0, operation, 'prompt')
+            LLM_TOKENS.inc(usage.completion_tokens or 0, operation, 'completion')
+        return response.choices[0].message.content
         
     def analyze_event(self, text: str, user_criteria: list = None) -> dict:
         try:
-            client = gigachat.GigaChat(credentials=self.api_key, verify_ssl_certs=False)
-            
             criteria_str = ", ".join(user_criteria) if user_criteria else "IT, Разработка, Менеджмент, AI, Data Science"
             
             prompt = f"""
@@ -50,13 +92,15 @@ class GigaChatService:
     "key_themes": ["theme1", "theme2"]
 }}
 """
-            messages = [Messages(role=MessagesRole.USER, content=prompt)]
-            response = client.chat(Chat(messages=messages, temperature=0.1))
-            content = response.choices[0].message.content
+            content = self._chat('analyze_event', prompt)
             
             content = re.sub(r"```json|```", "", content).strip()
             
-            result = json.loads(content)
+            try:
+                result = json.loads(content)
+            except ValueError:
+                LLM_FAILURES.inc(1, 'analyze_event', 'parse')
+                raise
             
             result = self._post_process_analysis(result, user_criteria)
             return result
@@ -78,16 +122,29 @@ class GigaChatService:
         return result
 
     def analyze_file_content(self, text: str) -> list:
+        if len(text) <= self.FILE_CHUNK_CHARS:
+            return self._analyze_file_chunk(text)
+
+        events, seen = [], set()
+        for chunk in iter_text_chunks([text], max_tokens=self.FILE_CHUNK_CHARS // CHARS_PER_TOKEN):
+            for ev in self._analyze_file_chunk(chunk):
+                if not isinstance(ev, dict) or event_key(ev) in seen: continue
+                seen.add(event_key(ev))
+                events.append(ev)
+        return events
+
+    def _analyze_file_chunk(self, text: str) -> list:
         try:
-            client = gigachat.GigaChat(credentials=self.api_key, verify_ssl_certs=False)
             prompt = f"""Найди все мероприятия в тексте и верни список JSON объектов.
-Текст: {text[:4000]}
+Текст: {text}
 JSON Format: [{{ "title": "...", "date": "...", "location": "...", "description": "..." }}]"""
             
-            messages = [Messages(role=MessagesRole.USER, content=prompt)]
-            response = client.chat(Chat(messages=messages, temperature=0.1))
-            content = re.sub(r"```json|```", "", response.choices[0].message.content).strip()
-            return json.loads(content)
+            content = re.sub(r"```json|```", "", self._chat('analyze_file', prompt)).strip()
+            try:
+                return json.loads(content)
+            except ValueError:
+                LLM_FAILURES.inc(1, 'analyze_file', 'parse')
+                raise
         except: return []
 
     def _get_default_analysis(self):
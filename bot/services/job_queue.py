@@ -0,0 +1,164 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+import logging
+from typing import Callable, Dict, Any, Awaitable
+
+try:
+    from config import JOBS_CONFIG
+except ImportError:
+    JOBS_CONFIG = {'workers': 2, 'poll_interval': 1.0, 'retry_backoff': 5, 'max_attempts': 3, 'heartbeat': 5, 'stale_after': 30}
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_ICONS = {'queued': '🕓', 'running': '⚙️', 'done': '✅', 'failed': '❌'}
+
+class JobLostError(RuntimeError):
+    # Задачу вернули в очередь и, возможно, уже выполняет другой лидер — дальше её не продолжаем
+    pass
+
+class JobContext:
+    PROGRESS_INTERVAL = 2.0
+
+    def __init__(self, queue: "JobQueue", job: Dict):
+        self.queue = queue
+        self.job = job
+        self.payload = job.get('payload') or {}
+        self.checkpoint = job.get('checkpoint') or {}
+        self.deps = queue.deps
+        self._last_progress = 0.0
+
+    def save_checkpoint(self, progress: str = None, **checkpoint):
+        # Синхронно — чтобы чекпоинт можно было записать в одной пачке с результатом шага
+        self.checkpoint.update(checkpoint)
+        if not self.queue.db.save_job_checkpoint(self.job['id'], self.queue.holder, self.checkpoint, progress):
+            raise JobLostError(f"job #{self.job['id']} is no longer held by {self.queue.holder}")
+
+    async def save(self, progress: str = None, **checkpoint):
+        # Чекпоинт сохраняется в БД: после рестарта задача продолжится с этого места
+        self.save_checkpoint(progress, **checkpoint)
+        if progress:
+            await self.progress(progress)
+
+    async def progress(self, text: str, force: bool = False):
+        chat_id, message_id = self.payload.get('chat_id'), self.payload.get('message_id')
+        bot = self.deps.get('bot')
+        if not (bot and chat_id and message_id): return
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.PROGRESS_INTERVAL: return
+        self._last_progress = now
+        try:
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, parse_mode="HTML")
+        except Exception:
+            pass
+
+class JobQueue:
+    def __init__(self, db, workers: int = None, poll_interval: float = None, retry_backoff: float = None):
+        self.db = db
+        self.workers = workers or JOBS_CONFIG.get('workers', 2)
+        self.poll_interval = poll_interval or JOBS_CONFIG.get('poll_interval', 1.0)
+        self.retry_backoff = retry_backoff or JOBS_CONFIG.get('retry_backoff', 5)
+        self.heartbeat = JOBS_CONFIG.get('heartbeat', 5)
+        self.stale_after = JOBS_CONFIG.get('stale_after', 30)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers: Dict[str, Callable[[JobContext], Awaitable[Any]]] = {}
+        self.deps: Dict[str, Any] = {}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+
+    def register(self, kind: str, handler: Callable[[JobContext], Awaitable[Any]]):
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict, priority: int = 0, max_attempts: int = None, created_by: int = None):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = self.db.enqueue_job(kind, payload, priority, max_attempts or JOBS_CONFIG.get('max_attempts', 3), created_by)
+        self._wakeup.set()
+        return job_id
+
+    def get_status(self, job_id: int):
+        return self.db.get_job(job_id)
+
+    def get_recent(self, limit: int = 10):
+        return self.db.get_recent_jobs(limit)
+
+    async def start(self, **deps):
+        self.deps.update(deps)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._requeue_stale()))
+        logger.info(f"🧵 Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        released = self.db.release_jobs(self.holder)
+        if released:
+            logger.info(f"⏸ Released {released} running jobs")
+
+    async def _requeue_stale(self):
+        # Задачи упавшего или потерявшего лидерство процесса возобновляются, когда их heartbeat устарел
+        while True:
+            resumed = self.db.requeue_stale_jobs(self.stale_after)
+            if resumed:
+                logger.info(f"♻️ Resuming {resumed} interrupted jobs")
+                self._wakeup.set()
+            await asyncio.sleep(self.heartbeat)
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            if not self.db.heartbeat_job(job_id, self.holder):
+                logger.warning(f"⚠️ Job #{job_id} was taken over by another worker")
+                return
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job = self.db.claim_next_job(time.time(), self.holder)
+                if not job:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, job: Dict):
+        ctx = JobContext(self, job)
+        handler = self.handlers.get(job['kind'])
+        logger.info(f"▶️ Job #{job['id']} ({job['kind']}), attempt {job['attempts']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job['id']))
+        try:
+            if not handler:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+            result = await handler(ctx)
+            if not self.db.finish_job(job['id'], self.holder, result):
+                logger.warning(f"⚠️ Job #{job['id']} finished, but is no longer held by this worker")
+        except asyncio.CancelledError:
+            # Остановка бота: stop() вернёт задачу в очередь, при падении её возобновят по устаревшему heartbeat
+            raise
+        except JobLostError as e:
+            logger.warning(f"⚠️ Job #{job['id']} abandoned: {e}")
+        except Exception as e:
+            error = str(e)
+            if job['attempts'] < job['max_attempts']:
+                delay = self.retry_backoff * 2 ** (job['attempts'] - 1)
+                if not self.db.retry_job(job['id'], self.holder, error, time.time() + delay): return
+                logger.warning(f"🔁 Job #{job['id']} failed ({error}), retry in {delay:.0f}s")
+                await ctx.progress(f"⚠️ Ошибка: {error}\nПовтор через {delay:.0f} сек. (попытка {job['attempts']}/{job['max_attempts']})", force=True)
+            else:
+                if not self.db.fail_job(job['id'], self.holder, error): return
+                logger.error(f"❌ Job #{job['id']} failed permanently: {error}")
+                await ctx.progress(f"❌ Ошибка: {error}", force=True)
+        finally:
+            heartbeat.cancel()
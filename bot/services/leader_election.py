@@ -0,0 +1,68 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+import logging
+from typing import Callable, Awaitable, Dict
+
+try:
+    from config import LEADER_CONFIG
+except ImportError:
+    LEADER_CONFIG = {'ttl': 10, 'heartbeat': 3}
+
+logger = logging.getLogger(__name__)
+
+# Выбор лидера через аренду в SQLite: лидер продлевает строку в leases каждые heartbeat секунд,
+# остальные экземпляры забирают её, только когда аренда истекла. Singleton-задачи
+# (планировщик уведомлений, очередь фоновых задач) работают только у текущего лидера.
+class LeaderElector:
+    def __init__(self, db, name: str = 'leader', ttl: float = None, heartbeat: float = None):
+        self.db = db
+        self.name = name
+        self.ttl = ttl or LEADER_CONFIG.get('ttl', 10)
+        self.heartbeat = heartbeat or LEADER_CONFIG.get('heartbeat', 3)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self._singletons: Dict[str, Callable[[], Awaitable]] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def add_singleton(self, name: str, factory: Callable[[], Awaitable]):
+        self._singletons[name] = factory
+        if self.is_leader:
+            self._running[name] = asyncio.create_task(factory())
+
+    def _on_elected(self):
+        self.is_leader = True
+        logger.info(f"👑 {self.holder} became leader ({self.name})")
+        for name, factory in self._singletons.items():
+            self._running[name] = asyncio.create_task(factory())
+
+    async def _on_demoted(self):
+        self.is_leader = False
+        logger.warning(f"⬇️ {self.holder} lost leadership ({self.name})")
+        tasks = list(self._running.values())
+        self._running.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self):
+        try:
+            while True:
+                acquired = self.db.acquire_lease(self.name, self.holder, self.ttl, time.time())
+                if acquired and not self.is_leader:
+                    self._on_elected()
+                elif not acquired and self.is_leader:
+                    await self._on_demoted()
+
+                if self.is_leader:
+                    for name, task in list(self._running.items()):
+                        if task.done() and not task.cancelled():
+                            logger.error(f"Singleton {name} stopped: {task.exception()}, restarting")
+                            self._running[name] = asyncio.create_task(self._singletons[name]())
+                await asyncio.sleep(self.heartbeat)
+        finally:
+            if self.is_leader:
+                await self._on_demoted()
+                self.db.release_lease(self.name, self.holder)
@@ -1,10 +1,12 @@
-import requests
 import re
-from bs4 import BeautifulSoup
 import time
+import hashlib
 import logging
 from urllib.parse import urljoin
 
+from utils.warmup import import_modules
+from utils.metrics import PARSER_FETCH_SECONDS, PARSER_PARSE_SECONDS, PARSER_FAILURES
+
 logger = logging.getLogger(__name__)
 
 class ParserService:
@@ -15,17 +17,37 @@ class ParserService:
             'Cache-Control': 'no-cache'
         }
 
-    def _get_soup(self, url):
+    MAX_SEEN_LINKS = 500
+    # пауза между источниками, чтобы не нарваться на бан; стенд ставит 0
+    REQUEST_DELAY = 1.5
+
+    def warm_up(self):
+        import_modules('requests', 'bs4')
+
+    def _parse_html(self, html):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
+
+    def _fetch_html(self, url):
+        # requests и bs4 импортируются при первом обходе, а не при старте бота
+        import requests
         try:
             response = requests.get(url, headers=self.headers, timeout=20)
             if response.status_code == 200:
                 if response.encoding == 'ISO-8859-1':
                     response.encoding = response.apparent_encoding
-                return BeautifulSoup(response.text, 'html.parser')
+                return response.text
         except Exception as e:
             logger.error(f"Ошибка доступа к {url}: {e}")
         return None
 
+    def _get_soup(self, url):
+        html = self._fetch_html(url)
+        return self._parse_html(html) if html is not None else None
+
+    def _fingerprint(self, *parts):
+        return hashlib.sha1("\x1f".join(parts).encode('utf-8')).hexdigest()[:16]
+
     def _clean_text(self, text):
         if not text: return ""
         return re.sub(r'\s+', ' ', text).strip()
@@ -37,7 +59,7 @@ class ParserService:
             if kw.lower() in text_lower: return True
         return False
 
-    def _heuristic_parse(self, soup, source_config, keywords):
+    def _heuristic_parse(self, soup, source_config, keywords, seen: dict = None):
         events = []
         seen_links = set()
         base_url = source_config.get('base_url', source_config['url'])
@@ -68,12 +90,16 @@ class ParserService:
             is_event = any(w in clean_text.lower() for w in ['регистрац', 'участие', 'conf', 'meetup', 'хакатон', 'форум', 'спб', 'онлайн', '2024', '2025'])
             
             if is_event:
+                text = clean_text[:1000]
+                fingerprint = self._fingerprint(link, text)
+                seen_links.add(link)
+                if seen and seen.get(link) == fingerprint: continue
                 events.append({
-                    "text": clean_text[:1000],
+                    "text": text,
                     "url": link,
-                    "source": source_config['name']
+                    "source": source_config['name'],
+                    "fingerprint": fingerprint
                 })
-                seen_links.add(link)
 
         return events[:10]
 
@@ -83,15 +109,67 @@ class ParserService:
         
         for source in db_sources:
             try:
-                soup = self._get_soup(source['url'])
-                if soup:
-                    events = self._heuristic_parse(soup, source, keywords)
+                with PARSER_FETCH_SECONDS.time(source['name']):
+                    html = self._fetch_html(source['url'])
+                if html is not None:
+                    with PARSER_PARSE_SECONDS.time(source['name']):
+                        events = self._heuristic_parse(self._parse_html(html), source, keywords)
                     logger.info(f"✅ {source['name']}: найдено {len(events)}")
                     all_events.extend(events)
                 else:
+                    PARSER_FAILURES.inc(1, source['name'])
                     logger.warning(f"⚠️ {source['name']}: нет ответа")
             except Exception as e:
+                PARSER_FAILURES.inc(1, source['name'])
                 logger.error(f"❌ Ошибка обработки {source['name']}: {e}")
-            time.sleep(1.5)
+            time.sleep(self.REQUEST_DELAY)
             
-        return all_events
\ No newline at end of file
+        return all_events
+
+    def get_new_events(self, db_sources: list, crawl_state: dict, keywords: list = None):
+        # Инкрементальный обход: crawl_state = {source_id: {'content_hash': str, 'links': {url: fingerprint}}}
+        # обновляется на месте. Возвращает только новые/изменённые элементы (флаг changed) и отчёт по каждому источнику.
+        all_events, deltas = [], []
+        criteria_key = ",".join(sorted(k.lower() for k in keywords or []))
+        logger.info(f"🔄 Инкрементальный парсинг. Источников: {len(db_sources)}")
+
+        for source in db_sources:
+            delta = {"source_id": source['id'], "name": source['name'], "status": "error", "new": 0, "changed": 0}
+            deltas.append(delta)
+            state = crawl_state.get(source['id']) or {}
+            try:
+                with PARSER_FETCH_SECONDS.time(source['name']):
+                    html = self._fetch_html(source['url'])
+                if html is None:
+                    PARSER_FAILURES.inc(1, source['name'])
+                    logger.warning(f"⚠️ {source['name']}: нет ответа")
+                    continue
+
+                content_hash = self._fingerprint(html, criteria_key)
+                if content_hash == state.get('content_hash'):
+                    delta["status"] = "unchanged"
+                    logger.info(f"⏭ {source['name']}: без изменений")
+                    continue
+
+                seen = state.get('links') or {}
+                with PARSER_PARSE_SECONDS.time(source['name']):
+                    events = self._heuristic_parse(self._parse_html(html), source, keywords, seen)
+                links = dict(seen)
+                for ev in events:
+                    ev['changed'] = ev['url'] in seen
+                    delta["changed" if ev['changed'] else "new"] += 1
+                    links.pop(ev['url'], None)
+                    links[ev['url']] = ev['fingerprint']
+                if len(links) > self.MAX_SEEN_LINKS:
+                    links = dict(list(links.items())[-self.MAX_SEEN_LINKS:])
+
+                crawl_state[source['id']] = {"content_hash": content_hash, "links": links}
+                delta["status"] = "changed"
+                logger.info(f"✅ {source['name']}: новых {delta['new']}, изменённых {delta['changed']}")
+                all_events.extend(events)
+            except Exception as e:
+                PARSER_FAILURES.inc(1, source['name'])
+                logger.error(f"❌ Ошибка обработки {source['name']}: {e}")
+            time.sleep(self.REQUEST_DELAY)
+
+        return all_events, deltas
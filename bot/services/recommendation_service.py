@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from utils.text_vectors import HashingVectorizer, event_text_parts
+
+try:
+    from config import RECOMMEND_CONFIG
+except ImportError:
+    RECOMMEND_CONFIG = {
+        'dim': 256, 'refresh_interval': 30, 'cache_ttl': 300, 'cache_size': 5000,
+        'max_results': 200, 'position_weight': 0.5, 'score_weight': 0.3,
+    }
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_BONUS = {'high': 0.1, 'medium': 0.05}
+HISTORY_WEIGHTS = {'approved': 1.0, 'pending': 0.7}
+
+# Персональная выдача: вектор интересов пользователя (записи на события + должность и отдел)
+# против матрицы векторов тем всех будущих опубликованных событий. Матрица пересобирается
+# при изменении событий (events_generation), векторы неизменённых событий берутся из кэша по (id, version).
+class RecommendationEngine:
+    def __init__(self, dim: int = None):
+        self.vectorizer = HashingVectorizer(dim or RECOMMEND_CONFIG.get('dim', 256))
+        self.refresh_interval = RECOMMEND_CONFIG.get('refresh_interval', 30)
+        self.cache_ttl = RECOMMEND_CONFIG.get('cache_ttl', 300)
+        self.cache_size = RECOMMEND_CONFIG.get('cache_size', 5000)
+        self.max_results = RECOMMEND_CONFIG.get('max_results', 200)
+        self.position_weight = RECOMMEND_CONFIG.get('position_weight', 0.5)
+        self.score_weight = RECOMMEND_CONFIG.get('score_weight', 0.3)
+
+        self._vectors: Dict[tuple, "np.ndarray"] = {}
+        self._matrix = None
+        self._ids = self._ranks = self._base = None
+        self._generation = None
+        self._refreshed = 0.0
+        self._version = 0
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        # Выдача считается в потоке to_thread; пересборку матрицы и кэш нельзя делить между потоками
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rebuilds': 0}
+
+    def _refresh(self, db):
+        import numpy as np
+        now = time.monotonic()
+        # Поколение берётся до выборки и с учётом коммитов других процессов (одобрения в соседнем шарде)
+        generation = db.get_events_generation()
+        if self._matrix is not None:
+            if generation == self._generation or now - self._refreshed < self.refresh_interval:
+                return
+        rows = db.get_recommendation_candidates(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        vectors = {}
+        for row in rows:
+            key = (row['id'], row['version'])
+            vector = self._vectors.get(key)
+            vectors[key] = vector if vector is not None else self.vectorizer.transform(event_text_parts(row))
+        self._vectors = vectors
+
+        dim = self.vectorizer.dim
+        self._matrix = np.vstack(list(vectors.values())) if rows else np.zeros((0, dim), np.float32)
+        self._ids = np.fromiter((r['id'] for r in rows), np.int64, len(rows))
+        self._ranks = np.fromiter((r['required_rank'] or 1 for r in rows), np.int64, len(rows))
+        # Базовая часть оценки общая для всех: score из анализа и приоритет события
+        self._base = np.fromiter(
+            (self.score_weight * (r['score'] or 0) / 100 + PRIORITY_BONUS.get(r['priority'], 0.0) for r in rows),
+            np.float32, len(rows)
+        )
+        self._generation = generation
+        self._refreshed = now
+        self._version += 1
+        self.stats['rebuilds'] += 1
+
+    def _user_vector(self, db, user: Dict):
+        import numpy as np
+        vector = np.zeros(self.vectorizer.dim, np.float32)
+        registered = []
+        for ev in db.get_user_interest_events(user['id']):
+            registered.append(ev['id'])
+            ev_vector = self._vectors.get((ev['id'], ev['version']))
+            if ev_vector is None:
+                ev_vector = self.vectorizer.transform(event_text_parts(ev))
+            vector += HISTORY_WEIGHTS.get(ev['status'], 0.5) * ev_vector
+        profile = [(user.get('position') or '', 1.0), (user.get('department') or '', 1.0)]
+        vector += self.position_weight * self.vectorizer.transform(profile)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector), registered
+
+    def recommend(self, db, telegram_id: int) -> List[int]:
+        with self._lock:
+            return self._recommend(db, telegram_id)
+
+    def _recommend(self, db, telegram_id: int) -> List[int]:
+        import numpy as np
+        user = db.get_user(telegram_id)
+        if not user: return []
+        self._refresh(db)
+
+        cached = self._cache.get(telegram_id)
+        if cached and cached[0] == self._version and time.monotonic() - cached[1] < self.cache_ttl:
+            self._cache.move_to_end(telegram_id)
+            self.stats['hits'] += 1
+            return cached[2]
+        self.stats['misses'] += 1
+
+        user_vector, registered = self._user_vector(db, user)
+        scores = self._matrix @ user_vector + self._base
+        mask = self._ranks <= db.get_user_rank(telegram_id)
+        if registered:
+            mask &= ~np.isin(self._ids, registered)
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > self.max_results:
+            candidates = candidates[np.argpartition(-scores[candidates], self.max_results - 1)[:self.max_results]]
+        ids = self._ids[candidates[np.argsort(-scores[candidates], kind='stable')]].tolist()
+
+        self._cache[telegram_id] = (self._version, time.monotonic(), ids)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return ids
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+recommender = RecommendationEngine()
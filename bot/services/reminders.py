@@ -0,0 +1,83 @@
+import asyncio
+import html
+import logging
+import time
+from datetime import datetime
+from typing import Dict
+
+from services.broadcast import ThrottledSender
+
+try:
+    from config import REMINDER_CONFIG
+except ImportError:
+    REMINDER_CONFIG = {'enabled': True, 'before_hours': 24, 'batch': 200, 'max_sleep': 300}
+
+logger = logging.getLogger(__name__)
+
+def _parse(value: str) -> datetime:
+    return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+
+def render_reminder(event: Dict, now: datetime) -> str:
+    hours = max(1, round((_parse(event['event_datetime']) - now).total_seconds() / 3600))
+    when = "завтра" if 20 <= hours <= 28 else f"через {hours} ч."
+    text = (
+        f"⏰ <b>Напоминание:</b> {when} мероприятие\n\n"
+        f"🎯 <b>{html.escape(event['title'] or '')}</b>\n"
+        f"📅 {html.escape(event['date_str'] or '')}\n"
+        f"📍 {html.escape(event['location'] or '')}"
+    )
+    if event['url']:
+        text += f"\n🔗 {html.escape(event['url'])}"
+    return text
+
+async def send_due_reminders(db, sender: ThrottledSender, now: datetime = None) -> Dict[str, int]:
+    stats = {'sent': 0, 'skipped': 0}
+    batch = REMINDER_CONFIG.get('batch', 200)
+    while True:
+        now = now or datetime.now()
+        now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+        due = await asyncio.to_thread(db.get_due_reminders, now_str, batch)
+        if not due: return stats
+        # Текст один на событие в пачке; снятые с публикации, удалённые и уже начавшиеся — только отмечаются
+        texts, messages = {}, []
+        for reminder in due:
+            if (not reminder['telegram_id'] or reminder['event_status'] != 'approved'
+                    or not reminder['event_datetime'] or str(reminder['event_datetime']) <= now_str):
+                stats['skipped'] += 1
+                continue
+            if reminder['event_id'] not in texts:
+                texts[reminder['event_id']] = render_reminder(reminder, now)
+            messages.append((reminder['telegram_id'], texts[reminder['event_id']], {'parse_mode': 'HTML', 'disable_web_page_preview': True}))
+        # Как и дайджест, пачка отмечается до отправки: сбой или смена лидера посреди рассылки
+        # оставят часть напоминаний неотправленными, но повторно их никто не получит
+        if not await asyncio.to_thread(db.mark_reminders_sent, due):
+            raise RuntimeError("failed to mark reminders as sent")
+        stats['sent'] += await sender.send_many(messages)
+        if len(due) < batch: return stats
+        now = None
+
+async def _wait(db, delay: float):
+    # Спит до ближайшего напоминания, но просыпается раньше, если менялись записи или события —
+    # в том числе в других процессах: новое подтверждение может оказаться раньше известного срока
+    generation = await asyncio.to_thread(db.get_events_generation)
+    deadline = time.monotonic() + delay
+    while time.monotonic() < deadline:
+        await asyncio.sleep(min(1.0, deadline - time.monotonic()))
+        if await asyncio.to_thread(db.get_events_generation) != generation: return
+
+async def reminder_scheduler(db, sender: ThrottledSender):
+    logger.info("⏰ Reminder scheduler started")
+    max_sleep = REMINDER_CONFIG.get('max_sleep', 300)
+    while True:
+        delay = max_sleep
+        try:
+            stats = await send_due_reminders(db, sender)
+            if stats['sent'] or stats['skipped']:
+                logger.info(f"⏰ Reminders: {stats['sent']} sent, {stats['skipped']} skipped")
+            next_at = await asyncio.to_thread(db.get_next_reminder_at)
+            if next_at:
+                delay = min(max_sleep, max(1.0, (_parse(next_at) - datetime.now()).total_seconds()))
+        except Exception as e:
+            logger.error(f"Reminder scheduler error: {e}")
+            delay = 60
+        await _wait(db, delay)
@@ -0,0 +1,210 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from utils.text_vectors import HashingVectorizer, event_text_parts
+
+try:
+    from config import SEARCH_CONFIG
+except ImportError:
+    SEARCH_CONFIG = {'path': None, 'dim': 256, 'char_ngrams': 3, 'reconcile_interval': 60, 'min_score': 0.15, 'limit': 20}
+
+logger = logging.getLogger(__name__)
+
+STATUS_CODES = {'new': 1, 'pending': 2, 'approved': 3, 'rejected': 4}
+DELETED = 0
+# Описание dtype списком: numpy импортируется лениво, при первом обращении к индексу
+META_DTYPE = [('id', 'i8'), ('version', 'i8'), ('rank', 'i2'), ('status', 'i1'), ('dt', 'i8')]
+INITIAL_CAPACITY = 1024
+EMBED_BATCH = 500
+
+def instance_path(path: str) -> str:
+    # Запись в общий memmap из нескольких процессов небезопасна, поэтому файлы у каждого экземпляра свои:
+    # имя хоста + BOT_INSTANCE_ID. Без постоянного идентификатора индекс держится в памяти — иначе
+    # каждый перезапуск оставлял бы на диске файлы с новым pid
+    instance = os.environ.get('BOT_INSTANCE_ID')
+    if not path or not instance: return None
+    return f"{path}.{socket.gethostname()}-{instance}"
+
+def _epoch(value) -> int:
+    if not value: return 0
+    try:
+        return int(datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S').timestamp())
+    except ValueError:
+        return 0
+
+# Локальный семантический поиск: хешированные векторы (слова + n-граммы символов) событий из горячей
+# таблицы в memory-mapped матрице float32 и параллельный массив метаданных (id, версия, ранг, статус, дата).
+# Индекс сам догоняет базу: новые события — по водяной метке id при каждом изменении events_generation,
+# правки, удаления и архивация — сверкой лёгких колонок не чаще reconcile_interval. Так видны и записи
+# других процессов. Файлы у каждого процесса свои (instance_path), по умолчанию индекс в памяти.
+class SemanticIndex:
+    def __init__(self, path: str = None, dim: int = None, char_ngrams: int = None):
+        self.vectorizer = HashingVectorizer(
+            dim or SEARCH_CONFIG.get('dim', 256),
+            SEARCH_CONFIG.get('char_ngrams', 3) if char_ngrams is None else char_ngrams
+        )
+        self.reconcile_interval = SEARCH_CONFIG.get('reconcile_interval', 60)
+        self.min_score = SEARCH_CONFIG.get('min_score', 0.15)
+        self._lock = threading.RLock()
+        self._generation = None
+        self._reconciled = 0.0
+        self._reconcile_pending = False
+        self.stats = {'searches': 0, 'indexed': 0, 'updated': 0, 'deleted': 0}
+        self.open(path if path is not None else SEARCH_CONFIG.get('path'))
+
+    def _files(self, path: str) -> Tuple[str, str]:
+        # Размерность и n-граммы в имени: при смене настроек индекс строится заново, а не читается чужой
+        base = f"{path}.{self.vectorizer.dim}x{self.vectorizer.char_ngrams}"
+        return f"{base}.vectors.npy", f"{base}.meta.npy"
+
+    def open(self, path: str = None):
+        # Файлы открываются при первом обращении, а не при импорте модуля
+        with self._lock:
+            self.path = instance_path(path)
+            if path and not self.path:
+                logger.info("Search index kept in memory: set BOT_INSTANCE_ID to persist it")
+            self._generation = None
+            self._vectors = self._meta = None
+            self.size = 0
+
+    def _load(self):
+        if self._vectors is not None: return
+        import numpy as np
+        if self.path:
+            vectors_file, meta_file = self._files(self.path)
+            if os.path.exists(vectors_file) and os.path.exists(meta_file):
+                self._vectors = np.load(vectors_file, mmap_mode='r+')
+                self._meta = np.load(meta_file, mmap_mode='r+')
+            else:
+                self._vectors, self._meta = self._allocate(INITIAL_CAPACITY)
+        else:
+            self._vectors, self._meta = self._allocate(INITIAL_CAPACITY)
+        self.size = int(np.count_nonzero(self._meta['id']))
+        self._rows = {int(event_id): row for row, event_id in enumerate(self._meta['id'][:self.size])}
+        self._watermark = max(self._rows, default=0)
+
+    def _allocate(self, capacity: int, copy_from: int = 0):
+        import numpy as np
+        shape = (capacity, self.vectorizer.dim)
+        if not self.path:
+            vectors, meta = np.zeros(shape, np.float32), np.zeros(capacity, META_DTYPE)
+        else:
+            vectors_file, meta_file = self._files(self.path)
+            tmp_vectors, tmp_meta = vectors_file + '.tmp', meta_file + '.tmp'
+            vectors = np.lib.format.open_memmap(tmp_vectors, mode='w+', dtype=np.float32, shape=shape)
+            meta = np.lib.format.open_memmap(tmp_meta, mode='w+', dtype=META_DTYPE, shape=(capacity,))
+        if copy_from:
+            vectors[:copy_from] = self._vectors[:copy_from]
+            meta[:copy_from] = self._meta[:copy_from]
+        if self.path:
+            vectors.flush()
+            meta.flush()
+            del vectors, meta
+            os.replace(tmp_vectors, vectors_file)
+            os.replace(tmp_meta, meta_file)
+            vectors, meta = np.load(vectors_file, mmap_mode='r+'), np.load(meta_file, mmap_mode='r+')
+        return vectors, meta
+
+    def _ensure_capacity(self, extra: int):
+        capacity = len(self._meta)
+        if self.size + extra <= capacity: return
+        while capacity < self.size + extra:
+            capacity *= 2
+        self._vectors, self._meta = self._allocate(capacity, copy_from=self.size)
+
+    def _write(self, row: int, event: Dict):
+        self._vectors[row] = self.vectorizer.transform(event_text_parts(event))
+        # id пишется последним: строка без id после сбоя считается пустой и будет переиндексирована
+        self._meta[row] = (event['id'], event['version'] or 0, event['required_rank'] or 1,
+                           STATUS_CODES.get(event['status'], 5), _epoch(event['event_datetime']))
+
+    def _index(self, events: List[Dict]):
+        self._ensure_capacity(len(events))
+        for event in events:
+            row = self._rows.get(event['id'])
+            if row is None:
+                row = self._rows[event['id']] = self.size
+                self.size += 1
+                self.stats['indexed'] += 1
+            else:
+                self.stats['updated'] += 1
+            self._write(row, event)
+            self._watermark = max(self._watermark, event['id'])
+
+    def _reconcile(self, db):
+        import numpy as np
+        state = db.get_events_index_state()
+        if not state and not self.size: return
+        ids = np.fromiter((r['id'] for r in state), np.int64, len(state))
+        versions = np.fromiter((r['version'] or 0 for r in state), np.int64, len(state))
+        meta = self._meta[:self.size]
+
+        live = meta['status'] != DELETED
+        gone = live & ~np.isin(meta['id'], ids)
+        if gone.any():
+            meta['status'][gone] = DELETED
+            self.stats['deleted'] += int(gone.sum())
+
+        rows = np.fromiter((self._rows.get(int(i), -1) for i in ids), np.int64, len(ids))
+        known = rows >= 0
+        stale = np.zeros(len(ids), bool)
+        stale[known] = meta['version'][rows[known]] != versions[known]
+        stale |= ~known
+        changed = ids[stale].tolist()
+        for i in range(0, len(changed), EMBED_BATCH):
+            self._index(db.get_events_for_index(changed[i:i + EMBED_BATCH]))
+
+    def refresh(self, db):
+        with self._lock:
+            self._load()
+            # get_events_generation учитывает коммиты других процессов: их вставки тоже попадут в индекс
+            generation = db.get_events_generation()
+            now = time.monotonic()
+            due = now - self._reconciled >= self.reconcile_interval
+            # Путь по водяной метке видит только новые id: правки, попавшие в него, дожидаются сверки,
+            # и она выполняется по истечении интервала, даже если поколение больше не менялось
+            if generation == self._generation and self.size and not (self._reconcile_pending and due): return
+            if not self.size or due:
+                self._reconcile(db)
+                self._reconciled = now
+                self._reconcile_pending = False
+            else:
+                self._reconcile_pending = True
+                while True:
+                    events = db.get_events_for_index_after(self._watermark, EMBED_BATCH)
+                    if not events: break
+                    self._index(events)
+            self._generation = generation
+            if self.path:
+                self._vectors.flush()
+                self._meta.flush()
+
+    def search(self, db, query: str, limit: int = None, max_rank: int = None, status: str = 'approved',
+               require_date: bool = True) -> List[Tuple[int, float]]:
+        import numpy as np
+        query_vector = self.vectorizer.transform([(query, 1.0)])
+        if not query_vector.any(): return []
+        with self._lock:
+            self.refresh(db)
+            self.stats['searches'] += 1
+            if not self.size: return []
+            meta = self._meta[:self.size]
+            scores = self._vectors[:self.size] @ query_vector
+            mask = meta['status'] == (STATUS_CODES[status] if status else meta['status'])
+            mask &= meta['status'] != DELETED
+            if max_rank is not None: mask &= meta['rank'] <= max_rank
+            if require_date: mask &= meta['dt'] > 0
+            mask &= scores >= self.min_score
+            candidates = np.flatnonzero(mask)
+            limit = limit or SEARCH_CONFIG.get('limit', 20)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(int(meta['id'][row]), float(scores[row])) for row in candidates]
+
+search_index = SemanticIndex()
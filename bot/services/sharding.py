@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+from typing import Callable, Dict, List
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+try:
+    from config import SHARDING_CONFIG
+except ImportError:
+    SHARDING_CONFIG = {'processes': 0, 'queue_size': 1000, 'concurrency': 16}
+
+logger = logging.getLogger(__name__)
+
+def update_chat_id(update: Update) -> int:
+    try:
+        event = update.event
+    except Exception:
+        return 0
+    chat = getattr(event, 'chat', None)
+    if chat is None and getattr(event, 'message', None) is not None:
+        chat = event.message.chat
+    if chat is not None:
+        return chat.id
+    user = getattr(event, 'from_user', None)
+    return user.id if user else 0
+
+def shard_for(chat_id: int, shards: int) -> int:
+    return chat_id % shards
+
+# Обработка внутри шарда: апдейты одного чата выполняются строго по очереди,
+# разные чаты — параллельно (не больше concurrency одновременно)
+class ShardConsumer:
+    def __init__(self, bot: Bot, dp: Dispatcher, concurrency: int = None):
+        self.bot = bot
+        self.dp = dp
+        self._slots = asyncio.Semaphore(concurrency or SHARDING_CONFIG.get('concurrency', 16))
+        self._tails: Dict[int, asyncio.Task] = {}
+
+    async def _process(self, previous, update: Update):
+        if previous:
+            await asyncio.gather(previous, return_exceptions=True)
+        async with self._slots:
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                logger.error(f"Update {update.update_id} failed: {e}")
+
+    def submit(self, update: Update):
+        chat_id = update_chat_id(update)
+        task = asyncio.create_task(self._process(self._tails.get(chat_id), update))
+        self._tails[chat_id] = task
+        task.add_done_callback(lambda t: self._tails.pop(chat_id, None) if self._tails.get(chat_id) is t else None)
+
+    async def consume(self, inbox):
+        loop = asyncio.get_running_loop()
+        while True:
+            raw = await loop.run_in_executor(None, inbox.get)
+            if raw is None: break
+            try:
+                self.submit(Update.model_validate_json(raw, context={"bot": self.bot}))
+            except Exception as e:
+                logger.error(f"Broken update in shard inbox: {e}")
+        if self._tails:
+            await asyncio.gather(*self._tails.values(), return_exceptions=True)
+
+# Супервизор: получает апдейты (polling или webhook) и раскладывает их по процессам-шардам
+# по chat_id, поэтому FSM-состояние и порядок сообщений пользователя живут в одном процессе
+class ShardSupervisor:
+    RESTART_CHECK_INTERVAL = 5.0
+
+    def __init__(self, target: Callable, processes: int = None, queue_size: int = None):
+        self.target = target
+        self.processes = processes or SHARDING_CONFIG.get('processes', 2)
+        self._ctx = mp.get_context('spawn')
+        self.inboxes = [self._ctx.Queue(queue_size or SHARDING_CONFIG.get('queue_size', 1000)) for _ in range(self.processes)]
+        self.workers: List = [None] * self.processes
+        self.stats = {'routed': 0, 'restarts': 0}
+
+    def _spawn(self, index: int):
+        proc = self._ctx.Process(target=self.target, args=(index, self.processes, self.inboxes[index]), name=f"shard-{index}")
+        proc.start()
+        self.workers[index] = proc
+        logger.info(f"🧩 Shard {index} started (pid {proc.pid})")
+
+    def start(self):
+        for i in range(self.processes):
+            self._spawn(i)
+
+    def check_workers(self):
+        for i, proc in enumerate(self.workers):
+            if proc is not None and not proc.is_alive():
+                logger.error(f"💥 Shard {i} exited with code {proc.exitcode}, restarting")
+                self.stats['restarts'] += 1
+                self._spawn(i)
+
+    async def route(self, update: Update):
+        index = shard_for(update_chat_id(update), self.processes)
+        raw = update.model_dump_json(by_alias=True, exclude_unset=True)
+        while True:
+            try:
+                self.inboxes[index].put_nowait(raw)
+                break
+            except queue.Full:
+                # Шард не успевает — притормаживаем приём, а не теряем апдейты
+                await asyncio.sleep(0.05)
+        self.stats['routed'] += 1
+
+    async def poll(self, bot: Bot, allowed_updates: List[str] = None):
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+            except Exception as e:
+                logger.error(f"Polling error: {e}")
+                await asyncio.sleep(5)
+                continue
+            for update in updates:
+                await self.route(update)
+                offset = update.update_id + 1
+
+    async def monitor(self):
+        while True:
+            await asyncio.sleep(self.RESTART_CHECK_INTERVAL)
+            self.check_workers()
+
+    async def stop(self, timeout: float = 15.0):
+        for inbox in self.inboxes:
+            try:
+                inbox.put(None, timeout=1)
+            except queue.Full:
+                pass
+        loop = asyncio.get_running_loop()
+        for proc in self.workers:
+            if proc is None: continue
+            await loop.run_in_executor(None, proc.join, timeout)
+            if proc.is_alive():
+                proc.terminate()
@@ -0,0 +1,169 @@
+import csv
+import json
+import logging
+from datetime import datetime
+from typing import Iterable, Iterator, Dict, Optional
+
+from services.file_ingest import iter_lines
+
+logger = logging.getLogger(__name__)
+
+STRUCTURED_FORMATS = ('csv', 'jsonl', 'json', 'ics')
+REQUIRED_FIELDS = ('title', 'date')
+
+# Названия колонок/ключей у партнёров различаются — сводим к полям таблицы events
+FIELD_ALIASES = {
+    'title': ('title', 'name', 'summary', 'event', 'название', 'мероприятие', 'событие', 'тема'),
+    'date': ('date', 'datetime', 'start', 'dtstart', 'start_date', 'дата', 'дата и время', 'начало', 'когда'),
+    'location': ('location', 'place', 'venue', 'address', 'city', 'место', 'адрес', 'город', 'площадка'),
+    'description': ('description', 'details', 'about', 'text', 'описание', 'подробности'),
+    'url': ('url', 'link', 'href', 'site', 'ссылка', 'сайт'),
+}
+_ALIAS_INDEX = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+ICS_FIELDS = {'SUMMARY': 'title', 'DTSTART': 'date', 'LOCATION': 'location', 'DESCRIPTION': 'description', 'URL': 'url'}
+ICS_DATE_FORMATS = ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d')
+
+def detect_format(file_name: str, head: str) -> Optional[str]:
+    ext = (file_name or '').rsplit('.', 1)[-1].lower() if '.' in (file_name or '') else ''
+    if ext in ('csv', 'tsv'): return 'csv'
+    if ext in ('jsonl', 'ndjson'): return 'jsonl'
+    if ext == 'ics': return 'ics'
+
+    sample = head.lstrip('﻿ \r\n\t')
+    if sample.startswith('BEGIN:VCALENDAR'): return 'ics'
+    if sample.startswith('['): return 'json'
+    if sample.startswith('{'):
+        first_line = sample.split('\n', 1)[0].strip()
+        try:
+            json.loads(first_line)
+            return 'jsonl'
+        except ValueError:
+            return 'json'
+    if ext == 'json': return 'json'
+
+    lines = [l for l in sample.splitlines()[:5] if l.strip()]
+    if len(lines) >= 2:
+        for delimiter in (';', ',', '\t'):
+            counts = {l.count(delimiter) for l in lines}
+            if len(counts) == 1 and counts.pop() > 0:
+                return 'csv'
+    return None
+
+def map_row(raw: Dict) -> Dict:
+    row = {}
+    for key, value in raw.items():
+        if key is None or value is None: continue
+        field = _ALIAS_INDEX.get(str(key).strip().lower())
+        if field and not row.get(field):
+            row[field] = str(value).strip()
+    return row
+
+def is_complete(row: Dict) -> bool:
+    return all(row.get(f) for f in REQUIRED_FIELDS)
+
+def row_to_text(raw: Dict) -> str:
+    return "; ".join(f"{k}: {v}" for k, v in raw.items() if k and v not in (None, ''))
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[Dict]:
+    lines = iter(lines)
+    header = next(lines, '').lstrip('﻿')
+    delimiter = max((';', ',', '\t'), key=header.count)
+
+    def all_lines():
+        yield header
+        yield from lines
+
+    for raw in csv.DictReader(all_lines(), delimiter=delimiter):
+        yield raw
+
+def iter_jsonl_rows(lines: Iterable[str]) -> Iterator[Dict]:
+    for line in lines:
+        line = line.strip()
+        if not line: continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            logger.warning(f"Skipping broken JSONL line: {line[:80]}")
+            continue
+        if isinstance(obj, dict): yield obj
+
+def iter_json_rows(pieces: Iterable[str]) -> Iterator[Dict]:
+    # Потоковый разбор массива верхнего уровня: объекты декодируются по одному по мере чтения
+    decoder = json.JSONDecoder()
+    buffer, started = '', False
+    for piece in pieces:
+        buffer += piece
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \r\n\t,﻿':
+                pos += 1
+            if pos >= len(buffer): break
+            if not started:
+                if buffer[pos] == '{':
+                    # Одиночный объект, возможно с массивом событий внутри — читаем целиком
+                    break
+                if buffer[pos] != '[':
+                    return
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']': return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                break
+            pos = end
+            if isinstance(obj, dict): yield obj
+        buffer = buffer[pos:]
+
+    if not started and buffer.strip():
+        try:
+            obj = json.loads(buffer)
+        except ValueError:
+            return
+        items = next((v for v in obj.values() if isinstance(v, list)), [obj]) if isinstance(obj, dict) else []
+        for item in items:
+            if isinstance(item, dict): yield item
+
+def _unescape_ics(value: str) -> str:
+    return value.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+def _parse_ics_date(value: str) -> str:
+    for fmt in ICS_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d %H:%M')
+        except ValueError:
+            continue
+    return value
+
+def iter_ics_rows(lines: Iterable[str]) -> Iterator[Dict]:
+    event, last_key = None, None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if event is not None and line[:1] in (' ', '\t') and last_key:
+            # Свёрнутая строка (RFC 5545) — продолжение предыдущего значения
+            event[last_key] += _unescape_ics(line[1:])
+            continue
+        if line == 'BEGIN:VEVENT':
+            event, last_key = {}, None
+        elif line == 'END:VEVENT':
+            if event is not None:
+                if 'date' in event: event['date'] = _parse_ics_date(event['date'])
+                yield event
+            event, last_key = None, None
+        elif event is not None and ':' in line:
+            name, value = line.split(':', 1)
+            field = ICS_FIELDS.get(name.split(';', 1)[0].upper())
+            last_key = field
+            if field:
+                event[field] = _unescape_ics(value)
+
+def iter_structured_rows(fmt: str, pieces: Iterable[str]) -> Iterator[Dict]:
+    if fmt == 'json':
+        return iter_json_rows(pieces)
+    lines = iter_lines(pieces)
+    if fmt == 'csv': return iter_csv_rows(lines)
+    if fmt == 'jsonl': return iter_jsonl_rows(lines)
+    if fmt == 'ics': return iter_ics_rows(lines)
+    raise ValueError(f"Unknown structured format: {fmt}")
@@ -0,0 +1,105 @@
+import asyncio
+import hmac
+import logging
+import secrets
+from typing import Callable, Awaitable, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+try:
+    from config import WEBHOOK_CONFIG
+except ImportError:
+    WEBHOOK_CONFIG = {'enabled': False, 'host': '0.0.0.0', 'port': 8080, 'path': '/webhook', 'url': '', 'secret_token': '', 'queue_size': 1000, 'workers': 8}
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Приём обновлений через webhook: HTTP-обработчик только кладёт апдейт в ограниченную очередь,
+# обработку ведут N воркеров. Переполненная очередь отвечает 503 — Telegram повторит доставку.
+class WebhookServer:
+    def __init__(self, bot: Bot, dp: Optional[Dispatcher], config: dict = None, handler: Callable[[Update], Awaitable] = None):
+        self.bot = bot
+        self.dp = dp
+        # handler заменяет обработку через dp — супервизор шардов так пересылает апдейты в процессы
+        self.handler = handler or (lambda update: dp.feed_update(bot, update))
+        self.config = {**WEBHOOK_CONFIG, **(config or {})}
+        # Без секрета любой, кто знает адрес, может подсовывать боту апдейты. Если webhook регистрирует
+        # сам бот (задан url), секрет генерируется при старте и передаётся в set_webhook
+        if not self.config.get('secret_token'):
+            if not self.config.get('url'):
+                raise ValueError("WEBHOOK_CONFIG['secret_token'] is required when the webhook is registered externally")
+            self.config['secret_token'] = secrets.token_urlsafe(32)
+            logger.warning("⚠️ Webhook secret_token is not set, generated one for this run; set it explicitly for several instances")
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=self.config.get('queue_size', 1000))
+        self.app = web.Application()
+        self.app.router.add_post(self.config.get('path', '/webhook'), self.handle_update)
+        self.app.router.add_get('/healthz', self.handle_health)
+        self.stats = {'received': 0, 'rejected': 0, 'dropped': 0, 'processed': 0, 'failed': 0}
+        self._runner = None
+        self._workers = []
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), self.config['secret_token']):
+            self.stats['rejected'] += 1
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception:
+            self.stats['rejected'] += 1
+            return web.Response(status=400)
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            return web.Response(status=503)
+        self.stats['received'] += 1
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, 'queued': self.queue.qsize(), 'workers': len(self._workers)})
+
+    async def _worker(self, index: int):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.handler(update)
+                self.stats['processed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Webhook worker {index} failed on update {update.update_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self):
+        workers = self.config.get('workers', 8)
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(workers)]
+
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        host, port = self.config.get('host', '0.0.0.0'), self.config.get('port', 8080)
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"🌐 Webhook server listening on {host}:{port}{self.config.get('path')} with {workers} workers")
+
+        if self.config.get('url'):
+            await self.bot.set_webhook(
+                self.config['url'].rstrip('/') + self.config.get('path', '/webhook'),
+                secret_token=self.config['secret_token'],
+                allowed_updates=self.dp.resolve_used_update_types() if self.dp else None
+            )
+            logger.info("✅ Webhook registered in Telegram")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Webhook queue not drained, {self.queue.qsize()} updates left")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
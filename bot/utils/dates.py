@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+# dateparser грузит данные языков и компилирует регулярки несколько секунд — импорт при первом разборе
+_dateparser = None
+
+def _get_dateparser():
+    global _dateparser
+    if _dateparser is None:
+        try:
+            import dateparser
+            _dateparser = dateparser
+        except ImportError:
+            _dateparser = False
+    return _dateparser
+
+FAST_DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d',
+    '%d.%m.%Y %H:%M', '%d.%m.%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+)
+
+def parse_date_fast(date_str):
+    # Машинные форматы разбираем без dateparser: при массовом импорте это в сотни раз быстрее
+    if not date_str: return None
+    value = str(date_str).strip()
+    for fmt in FAST_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+def parse_date_safe(date_str):
+    if not date_str:
+        return datetime.now()
+    dateparser = _get_dateparser()
+    if dateparser:
+        try:
+            dt = dateparser.parse(date_str, languages=['ru', 'en'], settings={'PREFER_DATES_FROM': 'future'})
+            if dt:
+                if dt < datetime.now() - timedelta(days=1):
+                     try: dt = dt.replace(year=datetime.now().year + 1)
+                     except: pass
+                return dt
+        except: pass
+    return datetime.now()
+
+def warm_up():
+    # Первый разбор догружает ленивые данные языков — делаем его заранее, в фоне
+    parse_date_safe("завтра в 10:00")
@@ -0,0 +1,88 @@
+import html
+import json
+from collections import OrderedDict, namedtuple
+from typing import Dict, Optional
+
+from utils.keyboards import get_event_edit_keyboard, get_manager_event_detail_keyboard
+
+CARD_CACHE_SIZE = 2048
+
+EventCard = namedtuple('EventCard', ['text', 'url', 'keyboard'])
+
+def _e(value) -> str:
+    return html.escape(str(value)) if value is not None else ''
+
+def _render_user(event: Dict, with_audience: bool) -> str:
+    text = (
+        f"🎯 <b>{_e(event['title'])}</b>\n\n"
+        f"📅 <b>Дата:</b> {_e(event['date_str'])}\n"
+        f"📍 <b>Место:</b> {_e(event['location'])}\n"
+        f"🔗 <b>Ссылка:</b> {_e(event['url'] or 'Нет')}\n"
+        f"📊 <b>Релевантность:</b> {_e(event['score'])}/100\n\n"
+        f"📝 <b>Описание:</b>\n{_e((event['description'] or '')[:500])}..."
+    )
+    if with_audience:
+        try:
+            analysis = json.loads(event['analysis'])
+        except:
+            analysis = {}
+        if not isinstance(analysis, dict): analysis = {}
+        text += f"\n\n👥 <b>Аудитория:</b> {_e(analysis.get('target_audience', 'Все желающие'))}"
+    return text
+
+def _render_staff(event: Dict) -> str:
+    return f"📝 <b>{_e(event['title'])}</b>\nID: {event['id']}\n📅 {_e(event['date_str'])}\n📍 {_e(event['location'])}\n🔗 {_e(event['url'])}"
+
+RENDERERS = {
+    'user': lambda e: _render_user(e, with_audience=True),
+    'user_brief': lambda e: _render_user(e, with_audience=False),
+    'admin': _render_staff,
+    'manager': _render_staff,
+    # архивная карточка только для просмотра: без кнопок правки и модерации
+    'archive': lambda e: _render_staff(e) + f"\n🗄 В архиве ({_e(e['status'])})",
+}
+
+# Клавиатура пользовательской карточки зависит от статуса записи конкретного пользователя,
+# поэтому кэшируется только для ролей персонала
+KEYBOARDS = {
+    'admin': get_event_edit_keyboard,
+    'manager': get_manager_event_detail_keyboard,
+}
+
+# Кэш отрисованных карточек по (id события, версия, роль). Версия берётся из кэша строк FDataBase,
+# поэтому для горячих событий карточка отдаётся без запроса к БД; правка события меняет версию.
+class EventCardCache:
+    def __init__(self, maxsize: int = CARD_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._cards: "OrderedDict[tuple, EventCard]" = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, db, event_id: int, role: str, event: Dict = None) -> Optional[EventCard]:
+        version = event.get('version') if event else db.get_event_version(event_id)
+        if version is not None:
+            key = (event_id, version, role)
+            card = self._cards.get(key)
+            if card is not None:
+                self._cards.move_to_end(key)
+                self.stats['hits'] += 1
+                return card
+
+        self.stats['misses'] += 1
+        if event is None:
+            event = db.get_event_by_id(event_id)
+            if not event: return None
+
+        keyboard = KEYBOARDS[role](event_id) if role in KEYBOARDS else None
+        card = EventCard(RENDERERS[role](event), event.get('url') or '', keyboard)
+        self._cards[(event_id, event.get('version') or 0, role)] = card
+        while len(self._cards) > self.maxsize:
+            self._cards.popitem(last=False)
+        return card
+
+    def clear(self):
+        self._cards.clear()
+
+card_cache = EventCardCache()
+
+def get_event_card(db, event_id: int, role: str, event: Dict = None) -> Optional[EventCard]:
+    return card_cache.get(db, event_id, role, event)
@@ -0,0 +1,89 @@
+import copy
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+
+try:
+    from config import FSM_CONFIG
+except ImportError:
+    FSM_CONFIG = {'ttl': 86400, 'cache_size': 1000}
+
+logger = logging.getLogger(__name__)
+
+# FSM в SQLite: состояние переживает рестарт, брошенные сессии истекают по TTL,
+# горячие ключи читаются из ограниченного LRU-кэша без обращения к БД.
+class SQLiteStorage(BaseStorage):
+    PURGE_INTERVAL = 600
+
+    def __init__(self, db, ttl: int = None, cache_size: int = None):
+        self.db = db
+        self.ttl = ttl or FSM_CONFIG.get('ttl', 86400)
+        self.cache_size = cache_size or FSM_CONFIG.get('cache_size', 1000)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._last_purge = 0.0
+
+    def _key(self, key: StorageKey) -> str:
+        parts = [key.bot_id, key.chat_id, key.user_id]
+        if key.thread_id or key.business_connection_id or key.destiny != 'default':
+            parts += [key.thread_id or '', key.business_connection_id or '', key.destiny]
+        return ':'.join(map(str, parts))
+
+    def _load(self, key: str):
+        now = time.time()
+        record = self._cache.get(key)
+        if record is not None:
+            self._cache.move_to_end(key)
+        else:
+            row = self.db.get_fsm_record(key)
+            record = (row['state'], json.loads(row['data']) if row['data'] else {}, row['expires_at']) if row else (None, {}, 0)
+            self._remember(key, record)
+        state, data, expires_at = record
+        if state is None and not data:
+            return None, {}
+        if expires_at < now:
+            self._remember(key, (None, {}, 0))
+            return None, {}
+        return state, data
+
+    def _remember(self, key: str, record: tuple):
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _store(self, key: str, state: Optional[str], data: Dict[str, Any]):
+        now = time.time()
+        expires_at = now + self.ttl
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')) if data else None
+        self.db.save_fsm_record(key, state, payload, expires_at)
+        self._remember(key, (state, copy.deepcopy(data), expires_at))
+
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self._last_purge = now
+            removed = self.db.delete_expired_fsm_records(now)
+            if removed:
+                logger.info(f"🧹 Removed {removed} expired FSM sessions")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k = self._key(key)
+        _, data = self._load(k)
+        self._store(k, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._load(self._key(key))[0]
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        k = self._key(key)
+        state, _ = self._load(k)
+        self._store(k, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return copy.deepcopy(self._load(self._key(key))[1])
+
+    async def close(self) -> None:
+        self._cache.clear()
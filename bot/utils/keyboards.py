@@ -1,5 +1,11 @@
+from functools import lru_cache
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+# Клавиатуры строятся один раз на вариант и переиспользуются: объекты общие, изменять их нельзя.
+# Параметризованные (пагинация, карточки) кэшируются по входным параметрам.
+KEYBOARD_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=None)
 def get_main_keyboard(is_admin=False) -> ReplyKeyboardMarkup:
     buttons = [
         [KeyboardButton(text="📅 Мероприятия"), KeyboardButton(text="🔍 Поиск мероприятий")],
@@ -10,19 +16,22 @@ def get_main_keyboard(is_admin=False) -> ReplyKeyboardMarkup:
         buttons.append([KeyboardButton(text="⚙️ Админ-панель")])
     return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_events_type_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="📋 Основные мероприятия"), KeyboardButton(text="🔥 Приоритетные")],
-        [KeyboardButton(text="🤝 Партнёрские мероприятия")],
+        [KeyboardButton(text="⭐ Рекомендуемые"), KeyboardButton(text="🤝 Партнёрские мероприятия")],
         [KeyboardButton(text="⬅️ Главное меню")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_export_calendar_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="📅 Экспорт моих мероприятий")],
         [KeyboardButton(text="⬅️ Главное меню")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_admin_export_period_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="📅 На неделю"), KeyboardButton(text="📅 На месяц")],
@@ -30,6 +39,7 @@ def get_admin_export_period_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="⬅️ Назад в админку")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_admin_main_kb(role):
     if role == 'Manager':
         return ReplyKeyboardMarkup(keyboard=[
@@ -51,6 +61,7 @@ def get_admin_main_kb(role):
     btns.append([KeyboardButton(text="⬅️ Главное меню")])
     return ReplyKeyboardMarkup(keyboard=btns, resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_events_mgmt_kb(role='TechSupport'):
     if role == 'Manager':
         btns = [
@@ -66,12 +77,14 @@ def get_events_mgmt_kb(role='TechSupport'):
         ]
     return ReplyKeyboardMarkup(keyboard=btns, resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_sources_mgmt_kb():
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="➕ Добавить источник"), KeyboardButton(text="➖ Удалить источник")],
         [KeyboardButton(text="📋 Список источников"), KeyboardButton(text="⬅️ Назад в админку")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_users_mgmt_kb():
     btns = [
         [KeyboardButton(text="✅ Подтверждение (Модерация)"), KeyboardButton(text="📋 Список сотрудников")],
@@ -79,6 +92,7 @@ def get_users_mgmt_kb():
     ]
     return ReplyKeyboardMarkup(keyboard=btns, resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_admin_management_keyboard():
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="📋 Список админов"), KeyboardButton(text="➕ Добавить админа")],
@@ -86,6 +100,7 @@ def get_admin_management_keyboard():
         [KeyboardButton(text="⬅️ Назад в админку")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_position_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="👨‍💻 Стажер"), KeyboardButton(text="👨‍💻 Junior разработчик")],
@@ -95,22 +110,30 @@ def get_position_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="❌ Отменить")]
     ], resize_keyboard=True)
 
-def get_profile_keyboard() -> InlineKeyboardMarkup:
+DIGEST_MODES = {'daily': "Каждый день", 'weekly': "Раз в неделю", 'off': "Выкл."}
+
+@lru_cache(maxsize=None)
+def get_profile_keyboard(digest_mode: str = 'weekly') -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=("✅ " if mode == digest_mode else "") + title, callback_data=f"digest_mode_{mode}")
+         for mode, title in DIGEST_MODES.items()],
         [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")]
     ])
 
+@lru_cache(maxsize=None)
 def get_admin_role_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="👑 ТехПоддержка (Full)"), KeyboardButton(text="👔 Руководитель")],
         [KeyboardButton(text="❌ Отменить")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="❌ Отменить")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_notification_day_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="🔄 Каждый день"), KeyboardButton(text="📅 Каждый месяц")],
@@ -120,6 +143,7 @@ def get_notification_day_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="❌ Отменить")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_notification_time_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="09:00"), KeyboardButton(text="10:00"), KeyboardButton(text="11:00")],
@@ -129,6 +153,7 @@ def get_notification_time_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="❌ Отменить")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_registration_confirm_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
@@ -138,10 +163,14 @@ def get_registration_confirm_keyboard() -> InlineKeyboardMarkup:
     ])
 
 def get_events_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+    return _events_keyboard(tuple(e['id'] for e in events), current_page, total_pages)
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _events_keyboard(event_ids: tuple, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = []
     row = []
-    for i in range(len(events)):
-        row.append(InlineKeyboardButton(text=str(i + 1), callback_data=f"event_details_{events[i]['id']}"))
+    for i, event_id in enumerate(event_ids):
+        row.append(InlineKeyboardButton(text=str(i + 1), callback_data=f"event_details_{event_id}"))
         if len(row) == 5:
             buttons.append(row)
             row = []
@@ -159,10 +188,14 @@ def get_events_keyboard(events: list, current_page: int, total_pages: int) -> In
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 def get_selection_keyboard(events: list) -> InlineKeyboardMarkup:
+    return _selection_keyboard(tuple(e['id'] for e in events))
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _selection_keyboard(event_ids: tuple) -> InlineKeyboardMarkup:
     buttons = []
     row = []
-    for i in range(len(events)):
-        row.append(InlineKeyboardButton(text=str(i + 1), callback_data=f"event_details_{events[i]['id']}"))
+    for i, event_id in enumerate(event_ids):
+        row.append(InlineKeyboardButton(text=str(i + 1), callback_data=f"event_details_{event_id}"))
         if len(row) == 5:
             buttons.append(row)
             row = []
@@ -170,6 +203,7 @@ def get_selection_keyboard(events: list) -> InlineKeyboardMarkup:
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_event_detail_keyboard(event_id: int, url: str, registration_status: str, is_admin: bool = False) -> InlineKeyboardMarkup:
     buttons = []
     if url:
@@ -193,6 +227,7 @@ def get_event_detail_keyboard(event_id: int, url: str, registration_status: str,
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_moderation_keyboard(event_id: int, current_index: int, total_count: int) -> InlineKeyboardMarkup:
     buttons = [
         [
@@ -210,13 +245,14 @@ def get_moderation_keyboard(event_id: int, current_index: int, total_count: int)
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 def get_user_approval_pagination_keyboard(users: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
-    if not users: return InlineKeyboardMarkup(inline_keyboard=[])
-    user = users[0]
-    
+    return _user_approval_pagination_keyboard(users[0]['id'], current_page, total_pages) if users else InlineKeyboardMarkup(inline_keyboard=[])
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _user_approval_pagination_keyboard(user_id: int, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = [
         [
-            InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"approve_user_{user['id']}"),
-            InlineKeyboardButton(text="❌ Отклонить", callback_data=f"reject_user_{user['id']}")
+            InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"approve_user_{user_id}"),
+            InlineKeyboardButton(text="❌ Отклонить", callback_data=f"reject_user_{user_id}")
         ]
     ]
     
@@ -232,6 +268,10 @@ def get_user_approval_pagination_keyboard(users: list, current_page: int, total_
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 def get_events_list_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+    return _events_list_keyboard(current_page, total_pages)
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _events_list_keyboard(current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = []
     nav = []
     if current_page > 0:
@@ -244,6 +284,7 @@ def get_events_list_keyboard(events: list, current_page: int, total_pages: int)
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_event_edit_keyboard(event_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
@@ -264,6 +305,7 @@ def get_event_edit_keyboard(event_id: int) -> InlineKeyboardMarkup:
         ]
     ])
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_participants_keyboard(event_id: int, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = []
     
@@ -282,19 +324,6 @@ def get_participants_keyboard(event_id: int, current_page: int, total_pages: int
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_employees_list_keyboard(users):
-    buttons = []
-    for user in users[:10]:
-        buttons.append([
-            InlineKeyboardButton(
-                text=f"👤 {user['full_name']}",
-                callback_data=f"view_user_events_{user['id']}"
-            )
-        ])
-    
-    buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
 def get_role_management_keyboard(users):
     buttons = []
     for user in users[:10]:
@@ -308,6 +337,7 @@ def get_role_management_keyboard(users):
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_reg_moderation_keyboard(user_id: int, event_id: int, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = [
         [
@@ -328,6 +358,7 @@ def get_reg_moderation_keyboard(user_id: int, event_id: int, current_page: int,
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_bulk_moderation_keyboard(event_id: int, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = [
         [
@@ -352,6 +383,10 @@ def get_bulk_moderation_keyboard(event_id: int, current_page: int, total_pages:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 def get_events_pagination_keyboard(events: list, current_page: int, total_pages: int, event_type: str = 'main') -> InlineKeyboardMarkup:
+    return _events_pagination_keyboard(events[0]['id'] if events else None, current_page, total_pages, event_type)
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _events_pagination_keyboard(event_id, current_page: int, total_pages: int, event_type: str) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
@@ -366,14 +401,18 @@ def get_events_pagination_keyboard(events: list, current_page: int, total_pages:
     if nav_buttons:
         buttons.append(nav_buttons)
     
-    if events:
-        buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=f"event_details_{events[0]['id']}")])
+    if event_id is not None:
+        buttons.append([InlineKeyboardButton(text="🔍 Подробнее", callback_data=f"event_details_{event_id}")])
     
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 def get_admin_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+    return _admin_events_pagination_keyboard(events[0]['id'] if events else None, current_page, total_pages)
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _admin_events_pagination_keyboard(event_id, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
@@ -388,10 +427,10 @@ def get_admin_events_pagination_keyboard(events: list, current_page: int, total_
     if nav_buttons:
         buttons.append(nav_buttons)
     
-    if events:
+    if event_id is not None:
         buttons.append([
-            InlineKeyboardButton(text="🔍 Детали", callback_data=f"admin_event_details_{events[0]['id']}"),
-            InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"admin_event_details_{events[0]['id']}")
+            InlineKeyboardButton(text="🔍 Детали", callback_data=f"admin_event_details_{event_id}"),
+            InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"admin_event_details_{event_id}")
         ])
     
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
@@ -399,6 +438,10 @@ def get_admin_events_pagination_keyboard(events: list, current_page: int, total_
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 def get_manager_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+    return _manager_events_pagination_keyboard(events[0]['id'] if events else None, current_page, total_pages)
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _manager_events_pagination_keyboard(event_id, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
@@ -413,16 +456,17 @@ def get_manager_events_pagination_keyboard(events: list, current_page: int, tota
     if nav_buttons:
         buttons.append(nav_buttons)
     
-    if events:
+    if event_id is not None:
         buttons.append([
-            InlineKeyboardButton(text="🔍 Детали", callback_data=f"manager_event_details_{events[0]['id']}"),
-            InlineKeyboardButton(text="👥 Участники", callback_data=f"event_participants_{events[0]['id']}")
+            InlineKeyboardButton(text="🔍 Детали", callback_data=f"manager_event_details_{event_id}"),
+            InlineKeyboardButton(text="👥 Участники", callback_data=f"event_participants_{event_id}")
         ])
     
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_manager_event_detail_keyboard(event_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
@@ -432,6 +476,7 @@ def get_manager_event_detail_keyboard(event_id: int) -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")]
     ])
     
+@lru_cache(maxsize=None)
 def get_search_filters_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="🎯 IT-тематика"), KeyboardButton(text="🤖 AI/ML")],
@@ -443,6 +488,7 @@ def get_search_filters_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="🔍 Все мероприятия"), KeyboardButton(text="❌ Отменить поиск")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_admin_search_filters_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="🎯 IT-тематика"), KeyboardButton(text="🤖 AI/ML")],
@@ -454,6 +500,7 @@ def get_admin_search_filters_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="🔍 Все мероприятия"), KeyboardButton(text="❌ Отменить поиск")]
     ], resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_parsing_filters_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="🎯 IT-тематика"), KeyboardButton(text="🤖 AI/ML")],
@@ -464,6 +511,7 @@ def get_parsing_filters_keyboard() -> ReplyKeyboardMarkup:
         [KeyboardButton(text="🔍 Все темы"), KeyboardButton(text="❌ Отменить")]
     ], resize_keyboard=True)
     
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_user_edit_keyboard(user_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
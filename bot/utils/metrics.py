@@ -0,0 +1,172 @@
+import functools
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Tuple
+
+try:
+    from config import METRICS_CONFIG
+except ImportError:
+    METRICS_CONFIG = {'enabled': True, 'host': '127.0.0.1', 'port': 9100}
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+# Метрики в формате Prometheus без внешних зависимостей. Запись — это только обновление словаря,
+# текст экспозиции собирается лишь при запросе /metrics, поэтому без скрейпа накладные расходы минимальны.
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики по корзинам (последняя — +Inf), сумма, количество]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self):
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, name: str, documentation: str, collect: Callable[[], Dict[str, float]], type: str = 'gauge', label: str = 'kind'):
+        # Значения, которые уже считаются в других местах (статистика кэшей, очереди), читаются при скрейпе
+        self._collectors.append((name, documentation, collect, type, label))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        for name, documentation, collect, type, label in self._collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type}")
+            lines.extend(f"{name}{_labels((label,), (key,))} {value}" for key, value in values.items())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.histogram('bot_handler_seconds', 'Handler latency', ('router', 'handler'))
+HANDLER_ERRORS = REGISTRY.counter('bot_handler_errors_total', 'Handlers that raised', ('router', 'handler'))
+DB_SECONDS = REGISTRY.histogram('bot_db_method_seconds', 'FDataBase method latency', ('method',))
+LLM_SECONDS = REGISTRY.histogram('bot_llm_request_seconds', 'GigaChat request latency', ('operation',))
+LLM_TOKENS = REGISTRY.counter('bot_llm_tokens_total', 'GigaChat tokens used', ('operation', 'kind'))
+LLM_FAILURES = REGISTRY.counter('bot_llm_failures_total', 'GigaChat failed requests and unparsable answers', ('operation', 'reason'))
+PARSER_FETCH_SECONDS = REGISTRY.histogram('bot_parser_fetch_seconds', 'Source page download time', ('source',))
+PARSER_PARSE_SECONDS = REGISTRY.histogram('bot_parser_parse_seconds', 'Source page parse time', ('source',))
+PARSER_FAILURES = REGISTRY.counter('bot_parser_failures_total', 'Sources that failed to download or parse', ('source',))
+
+def instrument_methods(histogram: Histogram, skip: Iterable[str] = ()):
+    # Декоратор класса: оборачивает все публичные методы замером времени с меткой method
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith('_') or name in skip or not callable(attr) or isinstance(attr, (staticmethod, classmethod, type)):
+                continue
+            setattr(cls, name, _timed_method(attr, histogram, name))
+        return cls
+    return decorate
+
+def _timed_method(method, histogram: Histogram, name: str):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, name)
+    return wrapper
+
+class MetricsMiddleware:
+    # Внутренний middleware диспетчера: время каждого хендлера по модулю-роутеру и имени функции
+    async def __call__(self, handler, event, data):
+        callback = getattr(data.get('handler'), 'callback', None)
+        labels = (getattr(callback, '__module__', '-').rsplit('.', 1)[-1], getattr(callback, '__name__', '-'))
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(1, *labels)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, *labels)
+
+async def start_metrics_server(host: str = None, port: int = None):
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    host = host or METRICS_CONFIG.get('host', '127.0.0.1')
+    port = port if port is not None else METRICS_CONFIG.get('port', 9100)
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    from config import PREFETCH_CONFIG
+except ImportError:
+    PREFETCH_CONFIG = {'ttl': 30, 'max_entries': 5000}
+
+logger = logging.getLogger(__name__)
+
+# Render-функция: (db, user_id, event_type, page) -> (text, keyboard, total) или None, если страницы нет
+PageRenderer = Callable[[object, int, str, int], Optional[Tuple[str, object, int]]]
+
+# Предзагрузка соседних страниц при листании событий: после показа страницы N в фоне
+# отрисовываются N-1 и N+1, и следующий тап отвечает из памяти. Запись в кэше живёт ttl секунд
+# и сбрасывается, когда меняется поколение событий в базе (правка событий или записей на них,
+# в том числе из других процессов). Отрисовка идёт в потоке: запросы страниц не держат цикл событий.
+class PagePrefetcher:
+    def __init__(self, render: PageRenderer, ttl: float = None, max_entries: int = None):
+        self.render = render
+        self.ttl = ttl or PREFETCH_CONFIG.get('ttl', 30)
+        self.max_entries = max_entries or PREFETCH_CONFIG.get('max_entries', 5000)
+        self._pages: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'prefetched': 0}
+
+    def get(self, db, user_id: int, event_type: str, page: int):
+        key = (user_id, event_type, page)
+        entry = self._pages.pop(key, None)
+        if entry:
+            expires, generation, rendered = entry
+            if expires > time.monotonic() and generation == db.get_events_generation():
+                self.stats['hits'] += 1
+                return rendered
+        self.stats['misses'] += 1
+        return None
+
+    def _put(self, generation: int, user_id: int, event_type: str, page: int, rendered):
+        self._pages[(user_id, event_type, page)] = (time.monotonic() + self.ttl, generation, rendered)
+        while len(self._pages) > self.max_entries:
+            self._pages.popitem(last=False)
+
+    def schedule(self, db, user_id: int, event_type: str, page: int, total: int):
+        # Одна фоновая задача на пользователя: быстрое листание отменяет устаревшую предзагрузку
+        previous = self._tasks.pop(user_id, None)
+        if previous and not previous.done():
+            previous.cancel()
+        neighbours = [p for p in (page + 1, page - 1) if 0 <= p < total]
+        if neighbours:
+            self._tasks[user_id] = asyncio.create_task(self._prefetch(db, user_id, event_type, neighbours))
+
+    def _render(self, db, user_id: int, event_type: str, page: int):
+        generation = db.get_events_generation()
+        return generation, self.render(db, user_id, event_type, page)
+
+    async def _prefetch(self, db, user_id: int, event_type: str, pages):
+        try:
+            for page in pages:
+                generation, rendered = await asyncio.to_thread(self._render, db, user_id, event_type, page)
+                if rendered and generation == db.events_generation:
+                    self._put(generation, user_id, event_type, page, rendered)
+                    self.stats['prefetched'] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Prefetch failed for user {user_id} ({event_type}): {e}")
+        finally:
+            if self._tasks.get(user_id) is asyncio.current_task():
+                del self._tasks[user_id]
@@ -0,0 +1,160 @@
+import logging
+import re
+import time
+from collections import deque
+from typing import Dict, List
+
+try:
+    from config import DB_CONFIG
+except ImportError:
+    DB_CONFIG = {'slow_query_ms': 100}
+
+logger = logging.getLogger(__name__)
+
+SAMPLES_PER_STATEMENT = 1000
+MAX_STATEMENTS = 500
+PARAMS_PREVIEW = 200
+# Запросы, у которых есть результат для fetch*; остальные закрываются сразу после execute
+READ_PREFIXES = ('SELECT', 'WITH', 'PRAGMA', 'EXPLAIN')
+EXPLAIN_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_sql(sql: str) -> str:
+    return _WHITESPACE.sub(' ', sql).strip()
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+class StatementStats:
+    __slots__ = ('sql', 'count', 'total', 'max', 'rows', 'slow', 'samples')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.samples = deque(maxlen=SAMPLES_PER_STATEMENT)
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.samples)
+        return {
+            'sql': self.sql, 'count': self.count, 'total_ms': self.total * 1000, 'max_ms': self.max * 1000,
+            'p50_ms': _percentile(ordered, 0.5) * 1000, 'p99_ms': _percentile(ordered, 0.99) * 1000,
+            'rows': self.rows, 'slow': self.slow,
+        }
+
+# Агрегаты по нормализованному тексту запроса: число выполнений, p50/p99 по последним
+# SAMPLES_PER_STATEMENT замерам, сколько строк вернули, сколько раз превышен порог
+class QueryStats:
+    def __init__(self, slow_ms: float = None):
+        self.slow_ms = slow_ms if slow_ms is not None else DB_CONFIG.get('slow_query_ms', 100)
+        self._statements: Dict[str, StatementStats] = {}
+
+    def record(self, sql: str, elapsed: float, rows: int) -> bool:
+        stats = self._statements.get(sql)
+        if stats is None:
+            if len(self._statements) >= MAX_STATEMENTS:
+                # динамический SQL (поиск по N ключевым словам) не должен раздувать таблицу
+                fewest = min(self._statements, key=lambda k: self._statements[k].count)
+                del self._statements[fewest]
+            stats = self._statements[sql] = StatementStats(sql)
+        stats.count += 1
+        stats.total += elapsed
+        stats.rows += rows
+        stats.samples.append(elapsed)
+        if elapsed > stats.max: stats.max = elapsed
+        slow = elapsed * 1000 >= self.slow_ms
+        if slow: stats.slow += 1
+        return slow
+
+    def top(self, limit: int = 10, key: str = 'total_ms') -> List[Dict]:
+        summaries = [s.summary() for s in list(self._statements.values())]
+        return sorted(summaries, key=lambda s: s[key], reverse=True)[:limit]
+
+    def reset(self):
+        self._statements.clear()
+
+# Обёртка над sqlite3.Cursor: время каждого запроса (execute + fetch), число возвращённых строк,
+# а для медленных — лог с параметрами и EXPLAIN QUERY PLAN через отдельный курсор соединения
+class ProfilingCursor:
+    def __init__(self, cursor, conn, stats: QueryStats):
+        self._cursor = cursor
+        self._conn = conn
+        self.stats = stats
+        self._pending = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _finish(self, extra: float = 0.0, rows: int = 0):
+        pending, self._pending = self._pending, None
+        if pending is None: return
+        sql, params, elapsed = pending
+        elapsed += extra
+        if self.stats.record(sql, elapsed, rows):
+            self._log_slow(sql, params, elapsed, rows)
+
+    def _log_slow(self, sql: str, params, elapsed: float, rows: int):
+        plan = '-'
+        if sql.upper().startswith(EXPLAIN_PREFIXES):
+            try:
+                plan = "; ".join(r[-1] for r in self._conn.execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()) or '-'
+            except Exception as e:
+                plan = f"n/a ({e})"
+        logger.warning(f"🐢 Slow query {elapsed * 1000:.1f} ms, rows={rows}: {sql[:300]} | params={repr(params)[:PARAMS_PREVIEW]} | plan: {plan}")
+
+    def _run(self, method, sql: str, params):
+        if self._pending is not None: self._finish()
+        started = time.perf_counter()
+        try:
+            result = method(sql, params) if params is not None else method(sql)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._pending = (normalize_sql(sql), params, elapsed)
+        if not self._pending[0].upper().startswith(READ_PREFIXES):
+            self._finish()
+        return result
+
+    def execute(self, sql: str, params=None):
+        self._run(self._cursor.execute, sql, params)
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        rows = seq_of_params if isinstance(seq_of_params, (list, tuple)) else list(seq_of_params)
+        if self._pending is not None: self._finish()
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, rows)
+        finally:
+            self._pending = (normalize_sql(sql), rows[0] if rows else None, time.perf_counter() - started)
+            self._finish()
+        return self
+
+    def executescript(self, script: str):
+        if self._pending is not None: self._finish()
+        return self._cursor.executescript(script)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._finish(time.perf_counter() - started, 1 if row is not None else 0)
+        return row
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._finish(time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchmany(self, size: int = None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._finish(time.perf_counter() - started, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
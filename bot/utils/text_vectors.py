@@ -0,0 +1,60 @@
+import json
+import re
+import zlib
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TOKEN_RE = re.compile(r"[a-zа-яё0-9]+", re.I)
+STEM_LEN = 6
+DESCRIPTION_CHARS = 500
+
+def stems(text: str) -> List[str]:
+    # Обрезанные слова, как в RelevanceClassifier, но от двух букв: темы вроде ML, AI, Go, QA важны
+    if not text: return []
+    return [t[:STEM_LEN] for t in TOKEN_RE.findall(text.lower()) if len(t) >= 2]
+
+def event_themes(event: Dict) -> List[str]:
+    try:
+        analysis = json.loads(event.get('analysis') or '{}')
+    except (TypeError, ValueError):
+        return []
+    themes = analysis.get('key_themes') if isinstance(analysis, dict) else None
+    return [str(t) for t in themes] if isinstance(themes, list) else []
+
+def event_text_parts(event: Dict) -> List[Tuple[str, float]]:
+    # Темы из анализа GigaChat весят больше всего, затем название, затем начало описания
+    return [
+        (" ".join(event_themes(event)), 3.0),
+        (event.get('title') or '', 2.0),
+        ((event.get('description') or '')[:DESCRIPTION_CHARS], 1.0),
+    ]
+
+# Хеширующий векторизатор: слово → корзина по crc32 (стабилен между процессами, в отличие от hash()),
+# знак по старшему биту гасит систематические коллизии. Вектор нормирован, скалярное произведение = косинус.
+class HashingVectorizer:
+    def __init__(self, dim: int = 256, char_ngrams: int = 0):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> Iterable[Tuple[str, float]]:
+        for stem in stems(text):
+            yield stem, 1.0
+            if self.char_ngrams and len(stem) > self.char_ngrams:
+                # n-граммы символов ловят опечатки и однокоренные слова с другим началом основы
+                for i in range(len(stem) - self.char_ngrams + 1):
+                    yield '#' + stem[i:i + self.char_ngrams], 0.5
+
+    def transform(self, parts: Iterable[Tuple[str, float]]) -> "np.ndarray":
+        # numpy импортируется при первом использовании, а не при старте бота
+        import numpy as np
+        indices, weights = [], []
+        for text, weight in parts:
+            for feature, feature_weight in self._features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                indices.append(h % self.dim)
+                weights.append(weight * feature_weight if h & 0x80000000 else -weight * feature_weight)
+        vector = np.bincount(indices, weights, minlength=self.dim).astype(np.float32) if indices else np.zeros(self.dim, np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
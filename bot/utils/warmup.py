@@ -0,0 +1,36 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+
+try:
+    from config import STARTUP_CONFIG
+except ImportError:
+    STARTUP_CONFIG = {'warm_up': True, 'warm_up_delay': 2.0}
+
+logger = logging.getLogger(__name__)
+
+def import_modules(*names: str):
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+async def warm_up(steps: List[Tuple[str, Callable[[], None]]], delay: float):
+    # Тяжёлые зависимости грузятся лениво при первом использовании; прогрев делает это заранее,
+    # когда бот уже отвечает. Импорт в потоке всё равно держит GIL — поэтому шаги идут по одному
+    await asyncio.sleep(delay)
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(step)
+            logger.info(f"🔥 Warm-up {name}: {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.warning(f"Warm-up {name} failed: {e}")
+
+def start_warm_up(steps: List[Tuple[str, Callable[[], None]]]) -> Optional[asyncio.Task]:
+    if not STARTUP_CONFIG.get('warm_up', True):
+        return None
+    return asyncio.create_task(warm_up(steps, STARTUP_CONFIG.get('warm_up_delay', 2.0)))